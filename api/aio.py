@@ -0,0 +1,29 @@
+import asyncio
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+
+
+# The schema serves both views: resolvers run their plain ORM code under the
+# sync view and return awaitables (async ORM calls) when the async view
+# executes them inside the event loop.
+
+
+def in_async_context():
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def sync_only(resolver):
+    # For resolvers the async ORM can't express: raw SQL, or writes spanning
+    # several statements or a transaction.atomic() block. Inside the event
+    # loop they run as a whole in Django's sync thread instead.
+    @wraps(resolver)
+    def wrapper(*args, **kwargs):
+        if in_async_context():
+            return sync_to_async(resolver)(*args, **kwargs)
+        return resolver(*args, **kwargs)
+    return wrapper
@@ -1,6 +1,14 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from . import signals
+        from .metrics import install_sql_timer, metrics_enabled
+
+        if metrics_enabled():
+            connection_created.connect(install_sql_timer)
@@ -0,0 +1,276 @@
+import base64
+import gc
+import json
+import statistics
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from .models import Author, Book, Genre
+
+
+# End-to-end benchmarks of the GraphQL and REST endpoints, run in-process
+# through Django's test client against the configured database (see the
+# `benchmark` command). Everything, writes included, runs in a transaction
+# that is rolled back, so the data stays the same from run to run.
+
+BENCHMARK_USER = 'benchmark'
+BENCHMARK_PASSWORD = 'benchmark'
+SAVEPOINT_SQL = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')
+# Cache of the response cache while benchmarking, so clearing it leaves the
+# configured caches alone.
+BENCHMARK_CACHE = 'benchmark'
+
+BOOKS_QUERY = '''
+query ($first: Int) {
+  books(first: $first) {
+    edges { node { id title publishedDate pageCount author { firstName lastName } genre { name } } }
+    pageInfo { hasNextPage endCursor }
+  }
+}'''
+
+FILTERED_BOOKS_QUERY = '''
+query ($genre: ID) {
+  books(first: 50, genreId: $genre, minPages: 300, orderBy: PAGE_COUNT_DESC) {
+    totalCount
+    edges { node { id title pageCount author { lastName } } }
+  }
+}'''
+
+AUTHORS_QUERY = '''
+{
+  authors(first: 20, orderBy: AGE) {
+    edges { node { id firstName lastName age bookCount bookSet { title publishedDate } } }
+  }
+}'''
+
+BOOK_QUERY = '''
+query ($id: ID) {
+  book(id: $id) { id title summary publishedDate pageCount author { id firstName lastName bookCount } genre { id name } }
+}'''
+
+SEARCH_QUERY = '''
+query ($query: String!) {
+  searchBooks(query: $query, first: 20) { edges { cursor node { id title author { lastName } } } }
+}'''
+
+STATS_QUERY = '''
+{
+  libraryStats {
+    authors { author { lastName } bookCount averagePageCount }
+    genres { genre { name } bookCount }
+    years { year bookCount }
+  }
+}'''
+
+CREATE_BOOK_MUTATION = '''
+mutation ($author: ID, $genre: ID) {
+  createBook(title: "Benchmark", summary: "Written by the benchmark.", authorId: $author, genresId: [$genre], pageCount: 320) {
+    book { id title }
+  }
+}'''
+
+UPDATE_BOOK_MUTATION = '''
+mutation ($id: ID) {
+  updateBook(id: $id, title: "Benchmark", pageCount: 321) { book { id title pageCount } }
+}'''
+
+
+class Scenario:
+    def __init__(self, name, method, path, body=None, status=200, auth=False):
+        self.name = name
+        self.method = method
+        # `path` and `body` may use the {book}, {author}, {genre} and
+        # {term} placeholders, see fixtures().
+        self.path = path
+        self.body = body
+        self.status = status
+        self.auth = auth
+
+    def request(self, client, fixtures, headers):
+        body = self.body(fixtures) if callable(self.body) else self.body
+        kwargs = dict(headers) if self.auth else {}
+        if body is not None:
+            kwargs.update(data=json.dumps(body), content_type='application/json')
+        response = getattr(client, self.method.lower())(self.path.format(**fixtures), **kwargs)
+        if response.status_code != self.status:
+            raise AssertionError(f'{self.name}: expected {self.status}, got {response.status_code}: {response.content[:200]!r}')
+        if self.path.startswith('/api/graphql') and response.json().get('errors'):
+            raise AssertionError(f'{self.name}: {response.json()["errors"]}')
+        return response
+
+
+def graphql(name, query, variables=None):
+    return Scenario(name, 'POST', '/api/graphql', lambda fixtures: {
+        'query': query,
+        'variables': {key: value.format(**fixtures) for key, value in (variables or {}).items()},
+    })
+
+
+def book_body(fixtures):
+    return {
+        'title': 'Benchmark',
+        'summary': 'Written by the benchmark.',
+        'author': fixtures['author_data'],
+        'genre': [{'name': fixtures['genre_name']}],
+        'page_count': 320,
+    }
+
+
+SCENARIOS = [
+    Scenario('graphql.books', 'POST', '/api/graphql', {'query': BOOKS_QUERY, 'variables': {'first': 50}}),
+    graphql('graphql.books_filtered', FILTERED_BOOKS_QUERY, {'genre': '{genre}'}),
+    graphql('graphql.authors', AUTHORS_QUERY),
+    graphql('graphql.book', BOOK_QUERY, {'id': '{book}'}),
+    graphql('graphql.search', SEARCH_QUERY, {'query': '{term}'}),
+    graphql('graphql.library_stats', STATS_QUERY),
+    graphql('graphql.create_book', CREATE_BOOK_MUTATION, {'author': '{author}', 'genre': '{genre}'}),
+    graphql('graphql.update_book', UPDATE_BOOK_MUTATION, {'id': '{book}'}),
+    Scenario('rest.books', 'GET', '/api/books/'),
+    Scenario('rest.books_filtered', 'GET', '/api/books/?genre_id={genre}&min_pages=300&ordering=-page_count'),
+    Scenario('rest.book', 'GET', '/api/books/{book}/'),
+    Scenario('rest.search', 'GET', '/api/books/?q={term}'),
+    Scenario('rest.authors', 'GET', '/api/authors/?ordering=age'),
+    Scenario('rest.author', 'GET', '/api/authors/{author}/'),
+    Scenario('rest.author_stats', 'GET', '/api/stats/authors/'),
+    Scenario('rest.create_book', 'POST', '/api/books/', book_body, status=201, auth=True),
+    Scenario('rest.update_book', 'PUT', '/api/books/{book}/', book_body, auth=True),
+]
+
+
+def fixtures():
+    # Objects the scenarios point at: the first book by id (with an author
+    # and a genre), its author and genre, and a word of its title to search.
+    book = Book.objects.filter(author__isnull=False, genre__isnull=False).order_by('pk').first()
+    if book is None:
+        raise LookupError('No books with an author and a genre to benchmark; run `manage.py seed_library`.')
+    author = book.author
+    genre = book.genre.order_by('pk').first()
+    return {
+        'book': book.pk,
+        'author': author.pk,
+        'genre': genre.pk,
+        'genre_name': genre.name,
+        # Identifies the author for BookSerializer's get_or_create().
+        'author_data': {
+            'first_name': author.first_name,
+            'last_name': author.last_name,
+            'date_of_birth': author.date_of_birth and author.date_of_birth.isoformat(),
+            'date_of_death': author.date_of_death and author.date_of_death.isoformat(),
+        },
+        'term': book.title.split()[0].lower(),
+    }
+
+
+def percentile(samples, p):
+    samples = sorted(samples)
+    index = min(len(samples) - 1, max(0, round(p / 100 * len(samples) + 0.5) - 1))
+    return samples[index]
+
+
+def measure(scenario, client, fixtures, headers, iterations, warmup, clear_cache):
+    cache = caches[BENCHMARK_CACHE]
+
+    def run():
+        # Each request's writes are rolled back, so every iteration sees
+        # the same data.
+        with transaction.atomic():
+            scenario.request(client, fixtures, headers)
+            transaction.set_rollback(True)
+
+    for _ in range(warmup):
+        run()
+
+    timings = []
+    for _ in range(iterations):
+        if clear_cache:
+            cache.clear()
+        gc.collect()
+        start = time.perf_counter()
+        run()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    # Queries and memory come from one more, separate run, as tracing
+    # would distort the timings.
+    if clear_cache:
+        cache.clear()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        with CaptureQueriesContext(connection) as queries:
+            run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'iterations': iterations,
+        'mean_ms': round(statistics.fmean(timings), 3),
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p90_ms': round(percentile(timings, 90), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+        'max_ms': round(max(timings), 3),
+        # Not counting the savepoints of run().
+        'queries': sum(not query['sql'].startswith(SAVEPOINT_SQL) for query in queries),
+        'peak_memory_kb': round(peak / 1024, 1),
+    }
+
+
+def run_benchmarks(scenarios, iterations=50, warmup=5, clear_cache=True, report=None):
+    # Returns {scenario name: metrics}. `report` is called with each
+    # scenario's name and metrics as soon as they are known.
+    results = {}
+    # Reads stay on the primary, where the rolled back transaction is, and
+    # writes run inline instead of through the write queue (api/writer.py).
+    # Responses are cached in BENCHMARK_CACHE. A fast password hasher keeps basic auth out of the REST write timings.
+    with override_settings(
+        ALLOWED_HOSTS=['testserver'], REPLICA_DATABASES=[], WRITE_QUEUE=False,
+        PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+        CACHES={**settings.CACHES, BENCHMARK_CACHE: {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': BENCHMARK_CACHE,
+        }},
+        GRAPHENE={**settings.GRAPHENE, 'RESPONSE_CACHE_ALIAS': BENCHMARK_CACHE},
+    ), transaction.atomic():
+        User.objects.create_superuser(BENCHMARK_USER, password=BENCHMARK_PASSWORD)
+        credentials = base64.b64encode(f'{BENCHMARK_USER}:{BENCHMARK_PASSWORD}'.encode()).decode()
+        headers = {'HTTP_AUTHORIZATION': f'Basic {credentials}'}
+        client = Client()
+        data = fixtures()
+        for scenario in scenarios:
+            results[scenario.name] = measure(scenario, client, data, headers, iterations, warmup, clear_cache)
+            if report:
+                report(scenario.name, results[scenario.name])
+        transaction.set_rollback(True)
+    return results
+
+
+def library_size():
+    return {'authors': Author.objects.count(), 'genres': Genre.objects.count(), 'books': Book.objects.count()}
+
+
+def compare(results, baseline, latency_tolerance=0.25, memory_tolerance=0.25):
+    # Regressions of `results` against a previous run's scenarios, as
+    # messages. More queries always count; latency (p50, p95) and peak
+    # memory may grow by the given fractions, plus a little slack for noise
+    # on very fast scenarios.
+    regressions = []
+    for name, metrics in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if metrics['queries'] > base['queries']:
+            regressions.append(f'{name}: {metrics["queries"]} queries, was {base["queries"]}')
+        for key in ('p50_ms', 'p95_ms'):
+            if metrics[key] > max(base[key] * (1 + latency_tolerance), base[key] + 1):
+                regressions.append(f'{name}: {key} {metrics[key]}, was {base[key]}')
+        limit = max(base['peak_memory_kb'] * (1 + memory_tolerance), base['peak_memory_kb'] + 64)
+        if metrics['peak_memory_kb'] > limit:
+            regressions.append(f'{name}: peak memory {metrics["peak_memory_kb"]} KiB, was {base["peak_memory_kb"]} KiB')
+    return regressions
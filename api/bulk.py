@@ -0,0 +1,177 @@
+from django.db import transaction
+from django.db.models import Q
+
+from .cache import invalidate, pk_tag, table_tag
+from .changes import record_changes
+from .models import Author, Change, Genre, Book
+from .stats import StatsDelta, book_stats_values
+
+
+# Set-based writes for many books at once. bulk_create/bulk_update don't send
+# model signals, so the summary tables and the change feed are updated and
+# the response cache is invalidated (after commit) here. The search index
+# follows the book table by itself (api/search.py).
+
+BOOK_FIELDS = ['title', 'author_id', 'summary', 'published_date', 'page_count']
+
+
+def to_pk(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def book_errors(data, authors, genres):
+    # Same rules as BookSerializer; `authors`/`genres` are the ids known to
+    # exist, while `data` holds the ids as the client sent them, so ones that
+    # aren't numbers are reported as given. Only the keys present in `data`
+    # are checked.
+    errors = []
+    if 'title' in data and not data['title']:
+        errors.append('Title cannot be empty.')
+    if 'summary' in data:
+        if not data['summary']:
+            errors.append('Summary cannot be empty.')
+        elif len(data['summary']) > 1024:
+            errors.append('Summary cannot exceed 1024 characters.')
+    if data.get('page_count') is not None and data['page_count'] <= 0:
+        errors.append('Page count must be a positive integer.')
+    if data.get('author_id') is not None and to_pk(data['author_id']) not in authors:
+        errors.append(f"Author with ID {data['author_id']} does not exist.")
+    for genre_id in data.get('genre_ids') or ():
+        if to_pk(genre_id) not in genres:
+            errors.append(f'Genre with ID {genre_id} does not exist.')
+    return errors
+
+
+def existing_ids(model, ids):
+    ids = {pk for pk in ids if pk is not None}
+    if not ids:
+        return set()
+    return set(model.objects.filter(pk__in=ids).values_list('pk', flat=True))
+
+
+def create_books(rows):
+    # `rows` are dicts of BOOK_FIELDS plus `genre_ids`.
+    Through = Book.genre.through
+    with transaction.atomic():
+        books = Book.objects.bulk_create([
+            Book(**{field: row.get(field) for field in BOOK_FIELDS}) for row in rows
+        ])
+        Through.objects.bulk_create([
+            Through(book_id=book.pk, genre_id=genre_id)
+            for book, row in zip(books, rows)
+            for genre_id in dict.fromkeys(row.get('genre_ids') or ())
+        ])
+        record_changes(Book, [book.pk for book in books], Change.CREATED)
+
+        delta = StatsDelta()
+        for book, row in zip(books, rows):
+            delta.add_book(book_stats_values(book))
+            delta.add_genres(dict.fromkeys(row.get('genre_ids') or ()))
+        delta.apply()
+        _invalidate_after_commit(books, rows)
+    return books
+
+
+def update_books(books, changes):
+    # `changes` maps each book to the BOOK_FIELDS (and `genre_ids`) to set.
+    Through = Book.genre.through
+    delta = StatsDelta()
+    fields = set()
+    for book, data in zip(books, changes):
+        delta.add_book(book_stats_values(book), -1)
+        for field in BOOK_FIELDS:
+            if field in data:
+                setattr(book, field, data[field])
+                fields.add(field)
+        delta.add_book(book_stats_values(book))
+
+    regenred = [(book, data['genre_ids']) for book, data in zip(books, changes) if 'genre_ids' in data]
+    with transaction.atomic():
+        if fields:
+            Book.objects.bulk_update(books, sorted(fields))
+        if regenred:
+            links = Through.objects.filter(book_id__in=[book.pk for book, _ in regenred])
+            delta.add_genres(links.values_list('genre_id', flat=True), -1)
+            links.delete()
+            Through.objects.bulk_create([
+                Through(book_id=book.pk, genre_id=genre_id)
+                for book, genre_ids in regenred
+                for genre_id in dict.fromkeys(genre_ids)
+            ])
+            delta.add_genres(genre_id for _, genre_ids in regenred for genre_id in dict.fromkeys(genre_ids))
+        if fields or regenred:
+            record_changes(Book, [book.pk for book in books], Change.UPDATED)
+        delta.apply()
+        _invalidate_after_commit(books, changes)
+    return books
+
+
+# Fields identifying an imported author, the ones BookSerializer's
+# get_or_create() matches on, so authors sharing a name stay apart.
+AUTHOR_KEY = ('first_name', 'last_name', 'date_of_birth', 'date_of_death')
+
+
+def import_books(records):
+    # `records` are validated BookSerializer payloads. Authors (matched by
+    # AUTHOR_KEY) and genres (by name) are resolved with one query each and
+    # the missing ones are created in bulk.
+    authors = _get_or_create(Author, AUTHOR_KEY, [record['author'] for record in records])
+    genres = _get_or_create(Genre, ('name',), [genre for record in records for genre in record.get('genre') or ()])
+
+    rows = []
+    for record in records:
+        row = {field: record.get(field) for field in BOOK_FIELDS if field != 'author_id'}
+        row['author_id'] = authors[_key(record['author'], AUTHOR_KEY)]
+        row['genre_ids'] = [genres[_key(genre, ('name',))] for genre in record.get('genre') or ()]
+        rows.append(row)
+    return create_books(rows)
+
+
+def _key(data, fields):
+    return tuple(data.get(field) for field in fields)
+
+
+def _get_or_create(model, fields, items):
+    wanted = {}
+    for item in items:
+        wanted.setdefault(_key(item, fields), item)
+    if not wanted:
+        return {}
+
+    # Narrows the candidates per field; IN doesn't match NULLs.
+    lookup = Q()
+    for i, field in enumerate(fields):
+        values = {key[i] for key in wanted}
+        condition = Q(**{f'{field}__in': values - {None}})
+        if None in values:
+            condition |= Q(**{f'{field}__isnull': True})
+        lookup &= condition
+    found = {}
+    for pk, *values in model.objects.filter(lookup).order_by('pk').values_list('pk', *fields):
+        found.setdefault(tuple(values), pk)
+
+    missing = [key for key in wanted if key not in found]
+    if missing:
+        created = model.objects.bulk_create([model(**wanted[key]) for key in missing])
+        found.update((key, obj.pk) for key, obj in zip(missing, created))
+        record_changes(model, [obj.pk for obj in created], Change.CREATED)
+        transaction.on_commit(lambda: invalidate(table_tag(model)))
+    return found
+
+
+def delete_books(pks):
+    # QuerySet.delete() sends post_delete per book, which invalidates them.
+    with transaction.atomic():
+        _, per_model = Book.objects.filter(pk__in=pks).delete()
+    return per_model.get(Book._meta.label, 0)
+
+
+def _invalidate_after_commit(books, rows):
+    tags = {table_tag(Book)}
+    tags.update(pk_tag(Book, book.pk) for book in books)
+    tags.update(pk_tag(Author, book.author_id) for book in books if book.author_id is not None)
+    tags.update(pk_tag(Genre, genre_id) for row in rows for genre_id in row.get('genre_ids') or ())
+    transaction.on_commit(lambda: invalidate(*tags))
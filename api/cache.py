@@ -0,0 +1,130 @@
+import hashlib
+import json
+import time
+from inspect import isawaitable
+from uuid import uuid4
+
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Model, QuerySet
+from graphene.relay import Connection
+
+from .conf import graphene_setting
+
+
+# Read-query response cache with tag based invalidation. Every cached result
+# records the tags of the objects it touched ("api.book:3") and, for root
+# collections, of the whole table ("api.book:*"), together with the current
+# version of each tag. Invalidating a tag replaces its version, so only the
+# entries that recorded it stop matching.
+
+
+def object_tag(obj):
+    return pk_tag(type(obj), obj.pk)
+
+
+def pk_tag(model, pk):
+    return f'{model._meta.label_lower}:{pk}'
+
+
+def table_tag(model):
+    return f'{model._meta.label_lower}:*'
+
+
+def get_backend():
+    return caches[graphene_setting('RESPONSE_CACHE_ALIAS', 'default')]
+
+
+def response_cache_key(document_key, operation_name, variables, scope):
+    variables = json.dumps(variables or {}, sort_keys=True, cls=DjangoJSONEncoder)
+    raw = '\n'.join([document_key, operation_name or '', variables, scope])
+    return 'graphql:response:' + hashlib.sha256(raw.encode()).hexdigest()
+
+
+def get_cached_response(key):
+    backend = get_backend()
+    entry = backend.get(key)
+    if entry is None:
+        return None
+
+    versions = backend.get_many([_tag_key(tag) for tag in entry['tags']])
+    if any(versions.get(_tag_key(tag)) != version for tag, version in entry['tags'].items()):
+        return None
+    return entry['data']
+
+
+def set_cached_response(key, data, tags, started_at):
+    versions = tag_versions(tags)
+
+    # A tag invalidated while the query was running gets a token newer than
+    # the result; storing it would keep the stale data alive.
+    if len(versions) != len(set(tags)) or any(version[0] >= started_at for version in versions.values()):
+        return
+
+    entry = {
+        'data': data,
+        'tags': versions,
+    }
+    get_backend().set(key, entry, graphene_setting('RESPONSE_CACHE_TIMEOUT', 300))
+
+
+def tag_versions(tags):
+    # The current (changed at, token) version of each tag. Costs one lookup
+    # when all exist. A tag without a version hasn't changed since its last
+    # one was dropped from the cache, if it ever had one, so its new version
+    # is older than any running query.
+    backend = get_backend()
+    keys = {_tag_key(tag): tag for tag in tags}
+    versions = backend.get_many(keys)
+    if len(versions) != len(keys):
+        for tag_key in keys:
+            if tag_key not in versions:
+                backend.add(tag_key, (0, uuid4().hex), None)
+        versions = backend.get_many(keys)
+    return {keys[tag_key]: version for tag_key, version in versions.items()}
+
+
+def record_tags(info, *tags):
+    # For results the middleware can't attribute to model instances.
+    recorded = getattr(info.context, 'cache_tags', None)
+    if recorded is not None:
+        recorded.update(tags)
+
+
+def invalidate(*tags):
+    changed_at = time.time()
+    get_backend().set_many({_tag_key(tag): (changed_at, uuid4().hex) for tag in tags}, None)
+
+
+def _tag_key(tag):
+    return f'graphql:tag:{tag}'
+
+
+class CacheTagMiddleware:
+    # Graphene middleware collecting the tags of everything resolved into
+    # `info.context.cache_tags` while a cacheable query executes.
+
+    def resolve(self, next, root, info, **args):
+        result = next(root, info, **args)
+        tags = getattr(info.context, 'cache_tags', None)
+        if tags is None:
+            return result
+        if isawaitable(result):
+            return self.resolve_async(result, info, tags)
+        return self.record(result, info, tags)
+
+    async def resolve_async(self, result, info, tags):
+        return self.record(await result, info, tags)
+
+    def record(self, result, info, tags):
+        if isinstance(result, Model):
+            tags.add(object_tag(result))
+        elif isinstance(result, (list, QuerySet)):
+            tags.update(object_tag(obj) for obj in result if isinstance(obj, Model))
+
+        if info.path.prev is None:
+            if isinstance(result, Connection):
+                tags.add(table_tag(result._meta.node._meta.model))
+            elif isinstance(result, QuerySet):
+                tags.add(table_tag(result.model))
+        return result
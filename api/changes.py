@@ -0,0 +1,125 @@
+import asyncio
+import json
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, HttpResponseBadRequest, StreamingHttpResponse
+
+from .models import Author, Book, Change, Genre
+from .records import BOOK_FIELDS, book_records
+from .serializers import AuthorSerializer, GenreSerializer
+
+
+# Change feed. Every create, update and delete of an author, genre or book
+# appends a Change row in the transaction of the write: from the model
+# signals (api/signals.py), which the mutations and REST handlers go
+# through, and from the set-based writes of api/bulk.py. The row's id is the
+# cursor. SQLite commits one writer at a time, so rows become visible in
+# cursor order and a consumer never misses one by resuming after the last
+# cursor it has seen.
+# Consumers page through /api/changes/ or follow the Server-Sent Events
+# stream at /api/changes/stream/ (ASGI only). Entries carry the object's
+# current representation, as served by its detail endpoint, or null once it
+# is deleted.
+
+
+def record_changes(model, pks, action):
+    Change.objects.bulk_create([
+        Change(model=model._meta.model_name, object_id=pk, action=action) for pk in pks
+    ])
+
+
+def current_objects(changes):
+    # (model name, pk) -> representation of the changed objects that still
+    # exist, with one query per model.
+    pks = defaultdict(set)
+    for change in changes:
+        if change.action != Change.DELETED:
+            pks[change.model].add(change.object_id)
+
+    objects = {}
+    if pks['author']:
+        authors = Author.objects.with_age().with_book_count().filter(pk__in=pks['author'])
+        objects.update((('author', data['id']), data) for data in AuthorSerializer(authors, many=True).data)
+    if pks['genre']:
+        genres = Genre.objects.filter(pk__in=pks['genre'])
+        objects.update((('genre', data['id']), data) for data in GenreSerializer(genres, many=True).data)
+    if pks['book']:
+        books = Book.objects.filter(pk__in=pks['book']).values(*BOOK_FIELDS)
+        objects.update((('book', data['id']), data) for data in book_records(list(books)))
+    return objects
+
+
+def change_entries(changes):
+    objects = current_objects(changes)
+    return [
+        {
+            'cursor': change.pk,
+            'model': change.model,
+            'id': change.object_id,
+            'action': change.action,
+            'changed_at': change.changed_at,
+            'object': objects.get((change.model, change.object_id)),
+        }
+        for change in changes
+    ]
+
+
+def changes_page(after, limit):
+    # Returns (entries after the cursor, whether more follow).
+    changes = list(Change.objects.filter(pk__gt=after).order_by('pk')[:limit + 1])
+    return change_entries(changes[:limit]), len(changes) > limit
+
+
+def latest_cursor():
+    return Change.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+
+
+async def change_stream(request):
+    # Server-Sent Events: one `change` event per entry, with the cursor as
+    # event id, so a reconnecting EventSource resumes through Last-Event-ID.
+    # Without one (or `?after=`) the stream starts at the current end of the
+    # feed. The stream ends after CHANGE_STREAM_TIMEOUT seconds and the
+    # client reconnects.
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse('The change stream is only served over ASGI.', status=501, content_type='text/plain')
+    try:
+        after = request.headers.get('Last-Event-ID') or request.GET.get('after')
+        after = await sync_to_async(latest_cursor)() if after is None else int(after)
+    except ValueError:
+        return HttpResponseBadRequest('Invalid cursor.')
+
+    response = StreamingHttpResponse(stream_events(after), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Keeps proxies such as nginx from buffering the events.
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+async def stream_events(after):
+    poll_interval = getattr(settings, 'CHANGE_STREAM_POLL_INTERVAL', 1)
+    heartbeat = getattr(settings, 'CHANGE_STREAM_HEARTBEAT', 15)
+    page_size = getattr(settings, 'CHANGE_FEED_PAGE_SIZE', 100)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + getattr(settings, 'CHANGE_STREAM_TIMEOUT', 300)
+    last_sent = loop.time()
+
+    yield f'retry: {int(poll_interval * 1000)}\n\n'
+    while loop.time() < deadline:
+        entries, has_more = await sync_to_async(changes_page)(after, page_size)
+        if entries:
+            after = entries[-1]['cursor']
+            last_sent = loop.time()
+            yield ''.join(
+                f'id: {entry["cursor"]}\nevent: change\ndata: {json.dumps(entry, cls=DjangoJSONEncoder)}\n\n'
+                for entry in entries
+            )
+            if has_more:
+                continue
+        elif loop.time() - last_sent >= heartbeat:
+            last_sent = loop.time()
+            yield ': keepalive\n\n'
+        await asyncio.sleep(poll_interval)
@@ -0,0 +1,61 @@
+import hashlib
+import json
+import time
+from functools import wraps
+
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from .cache import tag_versions
+from .routing import reads_from_replica, replica_lag
+
+
+# Conditional GETs for the REST views. The validators are derived from the
+# versions of the response cache tags (api/cache.py) a response depends on,
+# which the model signals replace on every change, so an unchanged poll costs
+# one cache lookup and gets a 304 before the view queries anything.
+
+
+def conditional(get_tags):
+    # `get_tags(request, *args, **kwargs)` returns the tags of the data the
+    # decorated GET handler serves.
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            tags = set(get_tags(request, *args, **kwargs))
+            versions = tag_versions(tags)
+            if len(versions) != len(tags):
+                # The cache couldn't keep a version; serve without validators.
+                return method(self, request, *args, **kwargs)
+            etag = make_etag(request, versions)
+            last_modified = max(created for created, _ in versions.values())
+            if reads_from_replica() and last_modified > time.time() - replica_lag():
+                # The replica may not have the latest change yet.
+                return method(self, request, *args, **kwargs)
+            # None when nothing changed since the cache lost the versions.
+            last_modified = int(last_modified) or None
+
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is None:
+                response = method(self, request, *args, **kwargs)
+            if response.status_code in (200, 304):
+                response['ETag'] = etag
+                if last_modified:
+                    response['Last-Modified'] = http_date(last_modified)
+                # Clients may keep the response but have to revalidate it.
+                patch_cache_control(response, no_cache=True)
+            return response
+        return wrapper
+    return decorator
+
+
+def make_etag(request, versions):
+    # Author ages change with the year, without any write.
+    parts = [
+        request.get_full_path(),
+        request.accepted_media_type,
+        timezone.now().year,
+        sorted((tag, token) for tag, (_, token) in versions.items()),
+    ]
+    return '"%s"' % hashlib.sha256(json.dumps(parts).encode()).hexdigest()[:32]
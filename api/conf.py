@@ -0,0 +1,7 @@
+from django.conf import settings
+
+
+def graphene_setting(name, default=None):
+    # Project specific options live next to graphene-django's own ones in the
+    # GRAPHENE settings dict.
+    return getattr(settings, 'GRAPHENE', {}).get(name, default)
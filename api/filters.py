@@ -0,0 +1,76 @@
+import datetime
+
+from .pagination import AUTHOR_KEYS, BOOK_KEYS, GENRE_KEYS
+
+
+# Filters and orderings accepted by the list endpoints, shared by the GraphQL
+# connections and the REST lists. Each filter maps an argument to an ORM
+# lookup and a parser for its value; every lookup and ordering is backed by
+# an index (see Meta.indexes in api/models.py).
+
+BOOK_FILTERS = {
+    'published_after': ('published_date__gte', datetime.date.fromisoformat),
+    'published_before': ('published_date__lte', datetime.date.fromisoformat),
+    'author_id': ('author_id', int),
+    'genre_id': ('genre', int),
+    'min_pages': ('page_count__gte', int),
+    'max_pages': ('page_count__lte', int),
+}
+
+AUTHOR_FILTERS = {
+    'born_after': ('date_of_birth__gte', datetime.date.fromisoformat),
+    'born_before': ('date_of_birth__lte', datetime.date.fromisoformat),
+    'died_after': ('date_of_death__gte', datetime.date.fromisoformat),
+    'died_before': ('date_of_death__lte', datetime.date.fromisoformat),
+    'min_books': ('stats__book_count__gte', int),
+}
+
+GENRE_FILTERS = {}
+
+# Ordering name -> keyset keys, the first one being the default. Descending
+# orders reverse every key so the same index can be scanned backwards.
+BOOK_ORDERINGS = {
+    'published_date': BOOK_KEYS,
+    '-published_date': ('-published_date', '-id'),
+    'title': ('title', 'id'),
+    'page_count': ('page_count', 'id'),
+    '-page_count': ('-page_count', '-id'),
+}
+
+AUTHOR_ORDERINGS = {
+    'date_of_birth': AUTHOR_KEYS,
+    '-date_of_birth': ('-date_of_birth', '-id'),
+    'date_of_death': ('date_of_death', 'id'),
+    'last_name': ('last_name', 'id'),
+    # Age only changes with the year of birth, so it is sorted through the
+    # date_of_birth index: youngest first, or oldest first for "-age".
+    'age': ('-date_of_birth', '-id'),
+    '-age': ('date_of_birth', 'id'),
+}
+
+GENRE_ORDERINGS = {
+    'id': GENRE_KEYS,
+    'name': ('name', 'id'),
+}
+
+
+def filter_queryset(queryset, filters, values):
+    # Applies the filters given in `values`; None means "not filtered".
+    # Raises ValueError naming the argument whose value can't be parsed.
+    lookups = {}
+    for name, (lookup, parse) in filters.items():
+        value = values.get(name)
+        if value is None or value == '':
+            continue
+        try:
+            lookups[lookup] = parse(value) if isinstance(value, str) else value
+        except ValueError:
+            raise ValueError(name)
+    return queryset.filter(**lookups) if lookups else queryset
+
+
+def ordering_keys(orderings, order_by=None):
+    # Raises KeyError for orderings that aren't whitelisted.
+    if order_by is None:
+        return next(iter(orderings.values()))
+    return orderings[order_by]
@@ -0,0 +1,489 @@
+import contextvars
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from inspect import isawaitable
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.http import HttpResponse, HttpResponseNotAllowed, StreamingHttpResponse
+from django.http.response import HttpResponseBadRequest
+from django.utils.decorators import method_decorator
+from django.views.decorators.csrf import ensure_csrf_cookie
+from graphene_django.constants import MUTATION_ERRORS_FLAG
+from graphene_django.settings import graphene_settings
+from graphene_django.utils.utils import set_rollback
+from graphene_django.views import GraphQLView, HttpError
+from graphql import ExecutionResult, OperationType, execute, get_operation_ast, parse, print_ast, validate_schema
+from graphql.error import GraphQLError
+from graphql.validation import specified_rules, validate
+
+from .incremental import execute_incrementally, uses_incremental_delivery
+from .cache import CacheTagMiddleware, get_cached_response, response_cache_key, set_cached_response
+from .conf import graphene_setting
+from .metrics import ResolverMetricsMiddleware, current_metrics
+from .routing import allow_replica_reads, reads_from_replica, replica_lag
+from .validation import QueryCostRule, analyze_document
+
+
+class DocumentCache:
+    # Thread-safe LRU of parsed and validated documents, keyed by the
+    # sha256 of the query text.
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+
+# `key` hashes the printed document, so formatting differences in the query
+# text don't split response cache entries.
+# `incremental` tells whether the document uses @defer or @stream.
+CachedDocument = namedtuple('CachedDocument', ['document', 'validation_errors', 'costs', 'key', 'incremental'])
+
+PreparedOperation = namedtuple(
+    'PreparedOperation',
+    ['document', 'operation_ast', 'execute_options', 'extensions', 'cache_key', 'started_at', 'incremental'],
+)
+
+MULTIPART_CONTENT_TYPE = 'multipart/mixed; boundary="-"; deferSpec=20220824'
+
+document_cache = DocumentCache(graphene_setting('DOCUMENT_CACHE_SIZE', 1000))
+
+
+def query_hash(query):
+    return hashlib.sha256(query.encode()).hexdigest()
+
+
+def accepts_multipart(request):
+    return "multipart/mixed" in request.headers.get("Accept", "")
+
+
+def multipart_part(content):
+    return f"\r\n---\r\nContent-Type: application/json; charset=utf-8\r\n\r\n{content}"
+
+
+def run_in_context(context, iterator):
+    # Produces the items of `iterator` within `context`, so the later parts
+    # of a response see the request's context variables (replica routing,
+    # metrics) after the view has returned.
+    while True:
+        item = context.run(next, iterator, None)
+        if item is None:
+            return
+        yield item
+
+
+async def aiterate(iterator):
+    # Serves a sync iterator to ASGI without consuming it up front.
+    while True:
+        item = await sync_to_async(next)(iterator, None)
+        if item is None:
+            return
+        yield item
+
+
+class LibraryGraphQLView(GraphQLView):
+    # GraphQLView that reuses parsed/validated documents across requests and
+    # speaks the Automatic Persisted Queries protocol: clients may send only
+    # extensions.persistedQuery.sha256Hash and resend the full text once the
+    # hash is unknown to the server. Operations are also checked against the
+    # depth/cost budget, and their cost is reported in `extensions`.
+    # A JSON array of operations is run as a batch, one after the other in
+    # the same request, so the operations share its loaders and the objects
+    # they already fetched.
+    # Queries using @defer or @stream are answered in parts (multipart/mixed)
+    # when the client accepts them, see api/incremental.py; other clients
+    # get the whole result at once.
+    validation_rules = (*specified_rules, QueryCostRule)
+    # Execution context of an incremental response with parts still to send.
+    incremental_execution = None
+
+    def dispatch(self, request, *args, **kwargs):
+        response = super().dispatch(request, *args, **kwargs)
+        if self.incremental_execution is not None and response.status_code == 200:
+            return self.multipart_response(request, response.content.decode())
+        return response
+
+    def multipart_response(self, request, initial):
+        parts = run_in_context(contextvars.copy_context(), self.multipart_parts(request, initial))
+        response = StreamingHttpResponse(parts, content_type=MULTIPART_CONTENT_TYPE)
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    def multipart_parts(self, request, initial):
+        yield multipart_part(initial)
+        batch_size = graphene_setting("STREAM_BATCH_SIZE", 20)
+        for payload, errors in self.incremental_execution.subsequent_payloads(batch_size):
+            if errors:
+                payload["incremental"][0]["errors"] = [self.format_error(e) for e in errors]
+            yield multipart_part(self.json_encode(request, payload))
+        yield "\r\n-----\r\n"
+
+    def parse_body(self, request):
+        if self.get_content_type(request) == "application/json" and request.body.lstrip()[:1] == b"[":
+            self.batch = True
+        data = super().parse_body(request)
+        if self.batch:
+            limit = graphene_setting("BATCH_MAX_SIZE", 10)
+            if len(data) > limit:
+                raise HttpError(HttpResponseBadRequest(f"Batches are limited to {limit} operations."))
+            if not all(isinstance(entry, dict) for entry in data):
+                raise HttpError(HttpResponseBadRequest("Every operation of a batch must be a JSON object."))
+        return data
+
+    def execute_graphql_request(self, request, data, query, variables, operation_name, show_graphiql=False):
+        prepared = self.prepare_request(request, data, query, variables, operation_name, show_graphiql)
+        if not isinstance(prepared, PreparedOperation):
+            return prepared
+        return self.execute_prepared(request, prepared)
+
+    def prepare_request(self, request, data, query, variables, operation_name, show_graphiql=False):
+        # Everything up to execution. Returns a PreparedOperation, or the
+        # result to respond with (None for GraphiQL) when nothing has to run.
+        try:
+            query, sha256 = self.get_persisted_query(request, data, query)
+        except GraphQLError as e:
+            return ExecutionResult(errors=[e])
+
+        if not query:
+            if show_graphiql:
+                return None
+            raise HttpError(HttpResponseBadRequest("Must provide query string."))
+
+        schema = self.schema.graphql_schema
+
+        schema_validation_errors = validate_schema(schema)
+        if schema_validation_errors:
+            return ExecutionResult(data=None, errors=schema_validation_errors)
+
+        try:
+            document, validation_errors, costs, document_key, incremental = self.get_document(query, sha256)
+        except GraphQLError as e:
+            return ExecutionResult(errors=[e])
+
+        operation_ast = get_operation_ast(document, operation_name)
+        if operation_ast is not None:
+            # Queries can read from a replica even when POSTed.
+            allow_replica_reads(operation_ast.operation == OperationType.QUERY)
+        incremental = (
+            incremental
+            and operation_ast is not None
+            and operation_ast.operation == OperationType.QUERY
+            and not self.batch
+            and accepts_multipart(request)
+        )
+        # Read by the resolvers through api.incremental.incremental().
+        request.incremental = incremental
+
+        if (
+            request.method.lower() == "get"
+            and operation_ast is not None
+            and operation_ast.operation != OperationType.QUERY
+        ):
+            if show_graphiql:
+                return None
+
+            raise HttpError(
+                HttpResponseNotAllowed(
+                    ["POST"],
+                    "Can only perform a {} operation from a POST request.".format(
+                        operation_ast.operation.value
+                    ),
+                )
+            )
+
+        if validation_errors:
+            return ExecutionResult(data=None, errors=validation_errors)
+
+        if operation_ast is None:
+            # The errors execute() would give; nothing below runs without
+            # an operation.
+            if operation_name:
+                message = f"Unknown operation named '{operation_name}'."
+            else:
+                message = "Must provide operation name if query contains multiple operations."
+            return ExecutionResult(data=None, errors=[GraphQLError(message)])
+
+        depth, cost = costs[operation_ast.name.value if operation_ast.name else None]
+        extensions = {"cost": {"depth": depth, "estimated": cost}}
+
+        middleware = self.get_middleware(request)
+        if current_metrics() is not None:
+            middleware = [*(middleware or []), ResolverMetricsMiddleware()]
+        cache_key = None
+        started_at = None
+        if operation_ast.operation == OperationType.QUERY and graphene_setting("RESPONSE_CACHE", False):
+            cache_key = response_cache_key(
+                document_key, operation_name, variables, self.get_cache_scope(request)
+            )
+            cached = get_cached_response(cache_key)
+            if cached is not None:
+                # Sent whole, even when parts were asked for.
+                return ExecutionResult(data=cached, extensions=extensions)
+
+            if incremental:
+                # The result is never complete at once, so it isn't cached.
+                cache_key = None
+            else:
+                request.cache_tags = set()
+                middleware = [*(middleware or []), CacheTagMiddleware()]
+                started_at = time.time()
+                if reads_from_replica():
+                    # Changes from within the lag may be missing from the replica.
+                    started_at -= replica_lag()
+
+        execute_options = {
+            "root_value": self.get_root_value(request),
+            "context_value": self.get_context(request),
+            "variable_values": variables,
+            "operation_name": operation_name,
+            "middleware": middleware,
+        }
+        if self.execution_context_class:
+            execute_options["execution_context_class"] = self.execution_context_class
+
+        return PreparedOperation(
+            document, operation_ast, execute_options, extensions, cache_key, started_at, incremental
+        )
+
+    def execute_prepared(self, request, prepared):
+        schema = self.schema.graphql_schema
+        try:
+            if self.is_atomic_mutation(prepared.operation_ast):
+                with transaction.atomic():
+                    result = execute(schema, prepared.document, **prepared.execute_options)
+                    if getattr(request, MUTATION_ERRORS_FLAG, False) is True:
+                        transaction.set_rollback(True)
+            elif prepared.incremental:
+                result, self.incremental_execution = execute_incrementally(
+                    schema, prepared.document, **prepared.execute_options
+                )
+            else:
+                result = execute(schema, prepared.document, **prepared.execute_options)
+        except Exception as e:
+            return ExecutionResult(errors=[e])
+
+        return self.finish_result(request, prepared, result)
+
+    def finish_result(self, request, prepared, result):
+        if prepared.operation_ast.operation == OperationType.MUTATION:
+            # The next operation of a batch must not see objects loaded
+            # before the mutation.
+            prepared.execute_options["context_value"].loaders = None
+        if prepared.cache_key is not None and not result.errors:
+            set_cached_response(prepared.cache_key, result.data, request.cache_tags, prepared.started_at)
+
+        result.extensions = prepared.extensions
+        metrics = current_metrics()
+        if metrics is not None and graphene_setting("METRICS_EXTENSIONS", False):
+            result.extensions = {**(result.extensions or {}), "timing": metrics.as_dict()}
+        return result
+
+    def is_atomic_mutation(self, operation_ast):
+        return (
+            operation_ast is not None
+            and operation_ast.operation == OperationType.MUTATION
+            and (
+                graphene_settings.ATOMIC_MUTATIONS is True
+                or connection.settings_dict.get("ATOMIC_MUTATIONS", False) is True
+            )
+        )
+
+    def get_cache_scope(self, request):
+        user = getattr(request, "user", None)
+        if user is None or not user.is_authenticated:
+            return "anonymous"
+        return "staff" if user.is_staff else "authenticated"
+
+    def get_response(self, request, data, show_graphiql=False):
+        # Same as GraphQLView.get_response, plus the result's `extensions`.
+        query, variables, operation_name, id = self.get_graphql_params(request, data)
+        # Errors of an earlier mutation in the batch don't roll this one back.
+        setattr(request, MUTATION_ERRORS_FLAG, False)
+
+        execution_result = self.execute_graphql_request(
+            request, data, query, variables, operation_name, show_graphiql
+        )
+        return self.format_response(request, execution_result, id, show_graphiql)
+
+    def format_response(self, request, execution_result, id=None, show_graphiql=False):
+        if getattr(request, MUTATION_ERRORS_FLAG, False) is True:
+            set_rollback()
+
+        status_code = 200
+        if execution_result:
+            response = {}
+
+            if execution_result.errors:
+                set_rollback()
+                response["errors"] = [
+                    self.format_error(e) for e in execution_result.errors
+                ]
+
+            if execution_result.errors and any(
+                not getattr(e, "path", None) for e in execution_result.errors
+            ):
+                status_code = 400
+            else:
+                response["data"] = execution_result.data
+
+            if execution_result.extensions:
+                response["extensions"] = execution_result.extensions
+
+            if self.batch:
+                response["id"] = id
+                response["status"] = status_code
+
+            if self.incremental_execution is not None:
+                if status_code == 200:
+                    response["hasNext"] = True
+                else:
+                    self.incremental_execution = None
+
+            result = self.json_encode(request, response, pretty=show_graphiql)
+        else:
+            result = None
+
+        return result, status_code
+
+    def get_document(self, query, sha256=None):
+        key = sha256 or query_hash(query)
+        entry = document_cache.get(key)
+        if entry is None:
+            document = parse(query)
+            validation_errors = validate(
+                self.schema.graphql_schema,
+                document,
+                self.validation_rules,
+                graphene_settings.MAX_VALIDATION_ERRORS,
+            )
+            costs = analyze_document(self.schema.graphql_schema, document) if not validation_errors else {}
+            entry = CachedDocument(
+                document, validation_errors, costs, query_hash(print_ast(document)),
+                uses_incremental_delivery(document),
+            )
+            document_cache.set(key, entry)
+        return entry
+
+    def get_persisted_query(self, request, data, query):
+        extensions = request.GET.get("extensions") or data.get("extensions")
+        if isinstance(extensions, str):
+            try:
+                extensions = json.loads(extensions)
+            except ValueError:
+                raise HttpError(HttpResponseBadRequest("Extensions are invalid JSON."))
+
+        persisted_query = (extensions or {}).get("persistedQuery")
+        if not persisted_query:
+            return query, None
+
+        sha256 = persisted_query.get("sha256Hash")
+        if persisted_query.get("version") != 1 or not sha256:
+            raise GraphQLError(
+                "Unsupported persisted query.",
+                extensions={"code": "PERSISTED_QUERY_NOT_SUPPORTED"},
+            )
+
+        key = f"graphql:apq:{sha256}"
+        if not query:
+            query = cache.get(key)
+            if query is None:
+                raise GraphQLError(
+                    "PersistedQueryNotFound",
+                    extensions={"code": "PERSISTED_QUERY_NOT_FOUND"},
+                )
+        elif query_hash(query) != sha256:
+            raise GraphQLError(
+                "Provided sha256Hash does not match query.",
+                extensions={"code": "PERSISTED_QUERY_HASH_MISMATCH"},
+            )
+        else:
+            cache.set(key, query, graphene_setting('PERSISTED_QUERY_TIMEOUT', None))
+
+        return query, sha256
+
+
+class AsyncLibraryGraphQLView(LibraryGraphQLView):
+    # Executes queries in the event loop: resolvers return awaitables for
+    # their ORM calls (see api/aio.py), so independent root fields run
+    # concurrently and a request waiting on the database doesn't hold a
+    # thread. Mutations run in the loop too unless ATOMIC_MUTATIONS wraps them
+    # in a transaction; GraphiQL, batched and multipart requests use the
+    # sync view.
+    view_is_async = True
+
+    @method_decorator(ensure_csrf_cookie)
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            if request.method.lower() not in ("get", "post"):
+                raise HttpError(
+                    HttpResponseNotAllowed(
+                        ["GET", "POST"], "GraphQL only supports GET and POST requests."
+                    )
+                )
+
+            data = self.parse_body(request)
+            if accepts_multipart(request):
+                response = await sync_to_async(super().dispatch)(request, *args, **kwargs)
+                if response.streaming:
+                    response.streaming_content = aiterate(iter(response.streaming_content))
+                return response
+            if self.batch or (self.graphiql and self.can_display_graphiql(request, data)):
+                return await sync_to_async(super().dispatch)(request, *args, **kwargs)
+
+            result, status_code = await self.aget_response(request, data)
+            return HttpResponse(status=status_code, content=result, content_type="application/json")
+
+        except HttpError as e:
+            response = e.response
+            response["Content-Type"] = "application/json"
+            response.content = self.json_encode(
+                request, {"errors": [self.format_error(e)]}
+            )
+            return response
+
+    async def aget_response(self, request, data):
+        query, variables, operation_name, id = self.get_graphql_params(request, data)
+
+        # APQ and response cache lookups may hit a network cache backend.
+        prepared = await sync_to_async(self.prepare_request)(
+            request, data, query, variables, operation_name
+        )
+        if isinstance(prepared, PreparedOperation):
+            if self.is_atomic_mutation(prepared.operation_ast):
+                execution_result = await sync_to_async(self.execute_prepared)(request, prepared)
+            else:
+                execution_result = await self.aexecute_prepared(request, prepared)
+        else:
+            execution_result = prepared
+
+        return self.format_response(request, execution_result, id)
+
+    async def aexecute_prepared(self, request, prepared):
+        try:
+            result = execute(self.schema.graphql_schema, prepared.document, **prepared.execute_options)
+            if isawaitable(result):
+                result = await result
+        except Exception as e:
+            return ExecutionResult(errors=[e])
+
+        return await sync_to_async(self.finish_result)(request, prepared, result)
@@ -0,0 +1,250 @@
+from collections import deque, namedtuple
+from itertools import islice
+
+from graphql import (
+    DirectiveLocation, ExecutionContext, ExecutionResult, GraphQLArgument, GraphQLBoolean, GraphQLDirective,
+    GraphQLError, GraphQLInt, GraphQLNonNull, GraphQLString, located_error,
+)
+from graphql.execution.collect_fields import does_fragment_condition_match, get_field_entry_key, should_include_node
+from graphql.execution.execute import invalid_return_type_error
+from graphql.execution.values import get_directive_values
+from graphql.language import FieldNode, FragmentSpreadNode, InlineFragmentNode
+from graphql.pyutils import is_iterable
+
+
+# Incremental delivery of queries with @defer and @stream, for clients that
+# accept multipart/mixed responses (see LibraryGraphQLView). graphql-core
+# 3.2 only parses these directives, so they are declared on the schema here
+# and IncrementalExecutionContext implements them. The initial result leaves
+# out deferred fragments and has only the first `initialCount` items of
+# streamed lists; the rest follows part by part, each deferred fragment
+# executed on the object it was spread on and streamed items completed
+# STREAM_BATCH_SIZE at a time. Parts use the format of the 2022-08-24 spec
+# draft (Apollo's deferSpec=20220824): {"data", "hasNext"} first, then
+# {"incremental": [{"data" | "items", "path", "label"}], "hasNext"}.
+
+DeferDirective = GraphQLDirective(
+    name='defer',
+    locations=[DirectiveLocation.FRAGMENT_SPREAD, DirectiveLocation.INLINE_FRAGMENT],
+    args={
+        'if': GraphQLArgument(GraphQLNonNull(GraphQLBoolean), default_value=True),
+        'label': GraphQLArgument(GraphQLString),
+    },
+    description='Delivers the fragment after the rest of the result.',
+)
+
+StreamDirective = GraphQLDirective(
+    name='stream',
+    locations=[DirectiveLocation.FIELD],
+    args={
+        'if': GraphQLArgument(GraphQLNonNull(GraphQLBoolean), default_value=True),
+        'label': GraphQLArgument(GraphQLString),
+        'initialCount': GraphQLArgument(GraphQLNonNull(GraphQLInt), default_value=0),
+    },
+    description='Delivers the items of a list after the first `initialCount` in batches.',
+)
+
+DIRECTIVE_NAMES = {DeferDirective.name, StreamDirective.name}
+
+DeferredFragment = namedtuple('DeferredFragment', ['label', 'parent_type', 'source', 'path', 'selection_sets'])
+StreamedList = namedtuple('StreamedList', ['label', 'item_type', 'field_nodes', 'info', 'path', 'items', 'start'])
+
+
+def uses_incremental_delivery(document):
+    # Whether any selection of the document carries @defer or @stream.
+    def visit(selection_set):
+        for selection in selection_set.selections:
+            if any(directive.name.value in DIRECTIVE_NAMES for directive in selection.directives or ()):
+                return True
+            if getattr(selection, 'selection_set', None) and visit(selection.selection_set):
+                return True
+        return False
+
+    return any(
+        getattr(definition, 'selection_set', None) and visit(definition.selection_set)
+        for definition in document.definitions
+    )
+
+
+def incremental(info):
+    # The view sets this on the request when the response is sent in parts.
+    return getattr(info.context, 'incremental', False)
+
+
+def _active(directive, node, variable_values):
+    values = get_directive_values(directive, node, variable_values)
+    return values if values and values['if'] else None
+
+
+def is_deferred(info, node):
+    return incremental(info) and _active(DeferDirective, node, info.variable_values) is not None
+
+
+def streamed_field(info, name):
+    # The @stream arguments of the `name` field selected directly under the
+    # resolved field, e.g. a connection's edges, if its list is streamed.
+    for field_node in info.field_nodes:
+        for selection in field_node.selection_set.selections if field_node.selection_set else ():
+            if isinstance(selection, FieldNode) and selection.name.value == name:
+                options = stream_options(info, selection)
+                if options is not None:
+                    return options
+    return None
+
+
+def stream_options(info, field_node):
+    # The @stream arguments of a field node, if its list is streamed.
+    if not incremental(info):
+        return None
+    return _active(StreamDirective, field_node, info.variable_values)
+
+
+class IncrementalExecutionContext(ExecutionContext):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Deferred fragments and streamed lists waiting for their part.
+        self.pending = deque()
+        self._deferring_fields_cache = {}
+
+    def execute_operation(self, operation, root_value):
+        root_type = self.schema.get_root_type(operation.operation)
+        fields, deferred = self.collect(root_type, [operation.selection_set])
+        self.defer(deferred, root_type, root_value, None)
+        return self.execute_fields(root_type, root_value, None, fields)
+
+    def complete_object_value(self, return_type, field_nodes, info, path, result):
+        if return_type.is_type_of and not return_type.is_type_of(result, info):
+            raise invalid_return_type_error(return_type, result, field_nodes)
+        key = (return_type, *map(id, field_nodes))
+        collected = self._deferring_fields_cache.get(key)
+        if collected is None:
+            selection_sets = [node.selection_set for node in field_nodes if node.selection_set]
+            collected = self._deferring_fields_cache[key] = self.collect(return_type, selection_sets)
+        fields, deferred = collected
+        self.defer(deferred, return_type, result, path)
+        return self.execute_fields(return_type, result, path, fields)
+
+    def complete_list_value(self, return_type, field_nodes, info, path, result):
+        options = _active(StreamDirective, field_nodes[0], self.variable_values)
+        if options is None or not is_iterable(result):
+            return super().complete_list_value(return_type, field_nodes, info, path, result)
+        items = iter(result)
+        head = list(islice(items, max(options['initialCount'], 0)))
+        self.pending.append(StreamedList(
+            options.get('label'), return_type.of_type, field_nodes, info, path, items, len(head),
+        ))
+        return super().complete_list_value(return_type, field_nodes, info, path, head)
+
+    def collect(self, runtime_type, selection_sets):
+        # Like graphql-core's collect_fields, except that fragments under an
+        # active @defer are returned separately, as (label, selection set).
+        fields, deferred = {}, []
+        visited = set()
+        for selection_set in selection_sets:
+            self._collect(runtime_type, selection_set, fields, deferred, visited)
+        return fields, deferred
+
+    def _collect(self, runtime_type, selection_set, fields, deferred, visited):
+        for selection in selection_set.selections:
+            if not should_include_node(self.variable_values, selection):
+                continue
+            if isinstance(selection, FieldNode):
+                fields.setdefault(get_field_entry_key(selection), []).append(selection)
+                continue
+            if isinstance(selection, FragmentSpreadNode):
+                fragment = self.fragments.get(selection.name.value)
+                if fragment is None or selection.name.value in visited:
+                    continue
+            elif isinstance(selection, InlineFragmentNode):
+                fragment = selection
+            if not does_fragment_condition_match(self.schema, fragment, runtime_type):
+                continue
+            defer = _active(DeferDirective, selection, self.variable_values)
+            if defer is not None:
+                deferred.append((defer.get('label'), fragment.selection_set))
+                continue
+            if isinstance(selection, FragmentSpreadNode):
+                visited.add(selection.name.value)
+            self._collect(runtime_type, fragment.selection_set, fields, deferred, visited)
+
+    def defer(self, deferred, parent_type, source, path):
+        for label, selection_set in deferred:
+            self.pending.append(DeferredFragment(label, parent_type, source, path, [selection_set]))
+
+    def subsequent_payloads(self, batch_size):
+        # Yields the parts after the initial result, as (payload, errors)
+        # with the errors raised while producing the part.
+        while self.pending:
+            record = self.pending.popleft()
+            seen_errors = len(self.collected_errors.errors)
+            if isinstance(record, DeferredFragment):
+                entry = {'data': self.execute_deferred(record)}
+            else:
+                entry = self.execute_stream_batch(record, batch_size)
+                if entry is None:
+                    if not self.pending:
+                        yield {'hasNext': False}, []
+                    continue
+            entry['path'] = record.path.as_list() if record.path else []
+            if isinstance(record, StreamedList):
+                entry['path'].append(entry.pop('start'))
+            if record.label is not None:
+                entry['label'] = record.label
+            errors = self.collected_errors.errors[seen_errors:]
+            yield {'incremental': [entry], 'hasNext': bool(self.pending)}, errors
+
+    def execute_deferred(self, record):
+        fields, deferred = self.collect(record.parent_type, record.selection_sets)
+        self.defer(deferred, record.parent_type, record.source, record.path)
+        try:
+            return self.execute_fields(record.parent_type, record.source, record.path, fields)
+        except GraphQLError as error:
+            # A non-null field failed; the fragment's data is null.
+            self.collected_errors.add(error, record.path)
+            return None
+
+    def execute_stream_batch(self, record, batch_size):
+        try:
+            items = list(islice(record.items, batch_size))
+        except Exception as raw_error:
+            # The list's iterator failed, e.g. on a query; the stream ends.
+            self.collected_errors.add(located_error(raw_error, record.field_nodes, record.path.as_list()), record.path)
+            return {'items': None, 'start': record.start}
+        if not items:
+            return None
+        completed = []
+        try:
+            for index, item in enumerate(items, start=record.start):
+                item_path = record.path.add_key(index, None)
+                try:
+                    completed.append(self.complete_value(record.item_type, record.field_nodes, record.info, item_path, item))
+                except Exception as raw_error:
+                    error = located_error(raw_error, record.field_nodes, item_path.as_list())
+                    self.handle_field_error(error, record.item_type, item_path)
+                    completed.append(None)
+        except GraphQLError as error:
+            # A non-null item failed, which ends the stream.
+            self.collected_errors.add(error, record.path)
+            return {'items': None, 'start': record.start}
+        if len(items) == batch_size:
+            self.pending.append(record._replace(start=record.start + len(items)))
+        return {'items': completed, 'start': record.start}
+
+
+def execute_incrementally(schema, document, root_value=None, context_value=None, variable_values=None,
+                          operation_name=None, middleware=None, **options):
+    # graphql.execute() for IncrementalExecutionContext, sync only. Returns
+    # the initial result and the context to take the later parts from, or
+    # None when nothing was deferred or streamed.
+    context = IncrementalExecutionContext.build(
+        schema, document, root_value, context_value, variable_values, operation_name, middleware=middleware,
+    )
+    if isinstance(context, list):
+        return ExecutionResult(data=None, errors=context), None
+    try:
+        data = context.execute_operation(context.operation, root_value)
+    except GraphQLError as error:
+        context.collected_errors.add(error, None)
+        data = None
+    result = context.build_response(data, list(context.collected_errors.errors))
+    return result, context if context.pending else None
@@ -0,0 +1,207 @@
+import asyncio
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.db.models import F
+
+from .aio import in_async_context
+from .models import Author, AuthorStats, Genre, Book
+
+
+class DataLoader:
+    # Batching loader: keys queued with `prime` are fetched together with the
+    # next key that misses the cache. Inside the event loop `load` returns an
+    # awaitable instead, and every key requested before the loop gets to run
+    # the batch (i.e. by all sibling resolvers) is fetched in one call.
+
+    def __init__(self, batch_load_fn):
+        self.batch_load_fn = batch_load_fn
+        self._cache = {}
+        self._queue = []
+        self._batch = None
+
+    def prime(self, keys):
+        self._queue.extend(key for key in keys if key not in self._cache)
+
+    def load(self, key):
+        if in_async_context():
+            return self._load_async(key)
+        if key not in self._cache:
+            self._queue.append(key)
+            self.dispatch()
+        return self._cache[key]
+
+    def load_many(self, keys):
+        keys = list(keys)
+        if in_async_context():
+            return self._load_many_async(keys)
+        self.prime(keys)
+        self.dispatch()
+        return [self._cache[key] for key in keys]
+
+    def dispatch(self):
+        keys = self._take_queue()
+        if keys:
+            self._cache.update(zip(keys, self.batch_load_fn(keys)))
+
+    async def _load_async(self, key):
+        while key not in self._cache:
+            self._queue.append(key)
+            if self._batch is None:
+                self._batch = asyncio.ensure_future(self._dispatch_async())
+            await self._batch
+        return self._cache[key]
+
+    async def _load_many_async(self, keys):
+        self.prime(keys)
+        return [await self._load_async(key) for key in keys]
+
+    async def _dispatch_async(self):
+        # Yield once so the resolvers scheduled alongside this one can queue
+        # their keys; keys queued while the batch runs go to the next one.
+        await asyncio.sleep(0)
+        try:
+            keys = self._take_queue()
+            if keys:
+                self._cache.update(zip(keys, await sync_to_async(self.batch_load_fn)(keys)))
+        finally:
+            self._batch = None
+
+    def _take_queue(self):
+        keys = list(dict.fromkeys(key for key in self._queue if key not in self._cache))
+        self._queue = []
+        return keys
+
+
+class Loaders:
+    # Per-request set of loaders. Objects handed out by list resolvers are
+    # tracked as sibling groups, so resolving a relation on one of them
+    # batches the lookup for the whole group into a single IN (...) query.
+
+    def __init__(self):
+        self._groups = {}
+        self._primed = set()
+        # Every tracked instance by (model, pk), so later lookups of the same
+        # object, e.g. by another operation of a batch, can reuse it.
+        self._objects = {}
+
+        self.author = DataLoader(self._batch_by_id(Author))
+        self.genre = DataLoader(self._batch_by_id(Genre))
+        self.book = DataLoader(self._batch_by_id(Book))
+
+        self.books_by_author = DataLoader(self._batch_books_by_author)
+        self.genres_by_book = DataLoader(self._batch_genres_by_book)
+        self.books_by_genre = DataLoader(self._batch_books_by_genre)
+        self.book_count_by_author = DataLoader(self._batch_book_count_by_author)
+
+    def track(self, instances, _seen=None):
+        # `_seen` holds the ids of the instances tracked by this call, as
+        # prefetched relations lead back to their parents.
+        seen = set() if _seen is None else _seen
+        instances = list(instances)
+        for obj in instances:
+            self._groups[(type(obj), obj.pk)] = instances
+            self._objects[(type(obj), obj.pk)] = obj
+        related_groups = []
+        new = [obj for obj in instances if id(obj) not in seen]
+        seen.update(map(id, new))
+        # Objects joined in by select_related (e.g. the authors of a page of
+        # books) are siblings as well, and so are the objects of their
+        # prefetched relations.
+        if new:
+            for name in new[0]._state.fields_cache:
+                related_groups.append([obj._state.fields_cache.get(name) for obj in new])
+            for name in getattr(new[0], '_prefetched_objects_cache', ()):
+                related = {}
+                for obj in new:
+                    prefetched = obj._prefetched_objects_cache.get(name)
+                    if prefetched is not None and prefetched._result_cache is not None:
+                        related.update((related_obj.pk, related_obj) for related_obj in prefetched._result_cache)
+                related_groups.append(related.values())
+        for related in related_groups:
+            related = [obj for obj in related if obj is not None and id(obj) not in seen]
+            if related:
+                self.track(related, seen)
+        return instances
+
+    def load(self, loader, obj, key):
+        group = self._groups.get((type(obj), obj.pk))
+        if group is not None and (id(loader), id(group)) not in self._primed:
+            self._primed.add((id(loader), id(group)))
+            loader.prime(
+                sibling_key for sibling_key in map(key, group) if sibling_key is not None
+            )
+        return loader.load(key(obj))
+
+    def cached(self, model, pk, fields=None):
+        # The tracked instance of `model` with this pk, if it has `fields`
+        # (attnames, all of them for None) loaded.
+        obj = self._objects.get((model, pk))
+        if obj is None:
+            return None
+        deferred = obj.get_deferred_fields()
+        if deferred and (fields is None or not deferred.isdisjoint(fields)):
+            return None
+        return obj
+
+    def _batch_by_id(self, model):
+        def batch(keys):
+            objects = {key: obj for key in keys if (obj := self.cached(model, key)) is not None}
+            missing = [key for key in keys if key not in objects]
+            if missing:
+                fetched = model.objects.in_bulk(missing)
+                self.track(fetched.values())
+                objects.update(fetched)
+            return [objects.get(key) for key in keys]
+        return batch
+
+    def _batch_books_by_author(self, keys):
+        books = self.track(Book.objects.filter(author_id__in=keys))
+        grouped = defaultdict(list)
+        for book in books:
+            grouped[book.author_id].append(book)
+        return [grouped[key] for key in keys]
+
+    def _batch_book_count_by_author(self, keys):
+        counts = dict(AuthorStats.objects.filter(author_id__in=keys).values_list('author_id', 'book_count'))
+        return [counts.get(key, 0) for key in keys]
+
+    def _batch_genres_by_book(self, keys):
+        return self._batch_m2m(
+            Genre.objects.filter(book__in=keys).annotate(_related_id=F('book')), keys
+        )
+
+    def _batch_books_by_genre(self, keys):
+        return self._batch_m2m(
+            Book.objects.filter(genre__in=keys).annotate(_related_id=F('genre')), keys
+        )
+
+    def _batch_m2m(self, queryset, keys):
+        # The join yields one row per (object, related) pair; keep a single
+        # instance per pk so the tracked group has no duplicates.
+        instances = {}
+        grouped = defaultdict(list)
+        for row in queryset:
+            grouped[row._related_id].append(instances.setdefault(row.pk, row))
+        self.track(instances.values())
+        return [grouped[key] for key in keys]
+
+
+def prefetched(obj, accessor):
+    # Many-valued relations already fetched with prefetch_related (see
+    # api/optimizer.py) are served from the instance instead of a loader.
+    queryset = getattr(obj, accessor).all()
+    if queryset._result_cache is not None:
+        return list(queryset)
+    return None
+
+
+def get_loaders(info):
+    context = info.context
+    if context is None:
+        return Loaders()
+
+    loaders = getattr(context, 'loaders', None)
+    if loaders is None:
+        loaders = context.loaders = Loaders()
+    return loaders
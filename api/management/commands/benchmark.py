@@ -0,0 +1,89 @@
+import json
+import platform
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+
+from api.benchmarks import SCENARIOS, compare, library_size, run_benchmarks
+from api.conf import graphene_setting
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the GraphQL and REST endpoints against the current database '
+        '(see seed_library) and optionally compare with a baseline.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument(
+            '--scenario', action='append', dest='scenarios',
+            help='Run only this scenario, or the scenarios starting with it (e.g. "rest."). Repeatable.',
+        )
+        parser.add_argument(
+            '--warm-cache', action='store_true',
+            help="Keep the response cache between requests instead of clearing it before each one.",
+        )
+        parser.add_argument('--output', help='Write the results as JSON to this file.')
+        parser.add_argument('--baseline', help='Fail if the results regressed from this earlier --output file.')
+        parser.add_argument('--latency-tolerance', type=float, default=0.25)
+        parser.add_argument('--memory-tolerance', type=float, default=0.25)
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError('--iterations must be positive.')
+        scenarios = [
+            scenario for scenario in SCENARIOS
+            if not options['scenarios'] or any(scenario.name.startswith(name) for name in options['scenarios'])
+        ]
+        if not scenarios:
+            raise CommandError(f'No such scenario. Choose from: {", ".join(s.name for s in SCENARIOS)}.')
+
+        baseline = None
+        if options['baseline']:
+            try:
+                with open(options['baseline']) as f:
+                    baseline = json.load(f)['scenarios']
+            except (OSError, ValueError, KeyError) as e:
+                raise CommandError(f'Cannot read the baseline: {e}')
+
+        self.stdout.write(f'{"scenario":<24} {"p50":>9} {"p95":>9} {"p99":>9} {"queries":>8} {"peak KiB":>9}')
+        try:
+            results = run_benchmarks(
+                scenarios, options['iterations'], options['warmup'],
+                clear_cache=not options['warm_cache'], report=self.report,
+            )
+        except (LookupError, AssertionError) as e:
+            raise CommandError(str(e))
+
+        output = {
+            'environment': {
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'async_execution': graphene_setting('ASYNC_EXECUTION', False),
+                'warm_cache': options['warm_cache'],
+                'library': library_size(),
+            },
+            'scenarios': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(output, f, indent=2)
+                f.write('\n')
+
+        if baseline is not None:
+            regressions = compare(
+                results, baseline, options['latency_tolerance'], options['memory_tolerance'],
+            )
+            if regressions:
+                for regression in regressions:
+                    self.stderr.write(self.style.ERROR(regression))
+                raise CommandError(f'{len(regressions)} regression(s) against {options["baseline"]}.')
+            self.stdout.write(self.style.SUCCESS(f'No regressions against {options["baseline"]}.'))
+
+    def report(self, name, metrics):
+        self.stdout.write(
+            f'{name:<24} {metrics["p50_ms"]:>7.2f}ms {metrics["p95_ms"]:>7.2f}ms {metrics["p99_ms"]:>7.2f}ms '
+            f'{metrics["queries"]:>8} {metrics["peak_memory_kb"]:>9.1f}'
+        )
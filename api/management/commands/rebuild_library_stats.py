@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from api.models import AuthorStats, GenreStats, YearStats
+from api.stats import rebuild_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute the library statistics summary tables from the books.'
+
+    def handle(self, *args, **options):
+        rebuild_stats()
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt statistics for {AuthorStats.objects.count()} authors, '
+            f'{GenreStats.objects.count()} genres and {YearStats.objects.count()} years.'
+        ))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.search import fts_enabled, rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index of books from the book table.'
+
+    def handle(self, *args, **options):
+        if not fts_enabled():
+            self.stdout.write('This database uses the search fallback, there is no index to rebuild.')
+            return
+
+        with transaction.atomic():
+            count = rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} books.'))
@@ -0,0 +1,145 @@
+import datetime
+import random
+from itertools import accumulate
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api.bulk import create_books
+from api.cache import invalidate, table_tag
+from api.changes import record_changes
+from api.models import Author, Book, Change, Genre
+
+
+# Deterministic test data: the same options always produce the same rows, so
+# benchmark runs against separately seeded databases are comparable.
+# Popularity is skewed like in a real catalogue: a few authors write many of
+# the books, a few genres are on most of them, and books have one to four
+# genres.
+
+FIRST_NAMES = [
+    'Ada', 'Alan', 'Alice', 'Anna', 'Boris', 'Carmen', 'Chen', 'Clara', 'David', 'Elena',
+    'Emma', 'Farid', 'George', 'Hana', 'Ivan', 'James', 'Jorge', 'Julia', 'Kenji', 'Laila',
+    'Leo', 'Maria', 'Mei', 'Nadia', 'Omar', 'Paul', 'Priya', 'Rosa', 'Sara', 'Tomas',
+]
+LAST_NAMES = [
+    'Ahmadi', 'Baker', 'Costa', 'Dubois', 'Eriksen', 'Fischer', 'Garcia', 'Hoffmann', 'Ito', 'Jensen',
+    'Kowalski', 'Larsen', 'Moreau', 'Novak', 'Olsen', 'Petrov', 'Quinn', 'Rossi', 'Silva', 'Tanaka',
+    'Ueda', 'Varga', 'Wagner', 'Xu', 'Yilmaz', 'Zhang',
+]
+GENRE_NAMES = [
+    'Fiction', 'Fantasy', 'Science Fiction', 'Mystery', 'Thriller', 'Romance', 'Horror', 'History',
+    'Biography', 'Poetry', 'Drama', 'Philosophy', 'Science', 'Travel', 'Cooking', 'Art', 'Religion',
+    'Politics', 'Economics', 'Children', 'Young Adult', 'Humor', 'Adventure', 'Classics',
+]
+WORDS = [
+    'river', 'shadow', 'garden', 'empire', 'winter', 'silence', 'machine', 'ocean', 'letter', 'island',
+    'memory', 'storm', 'mountain', 'city', 'stranger', 'fire', 'journey', 'night', 'mirror', 'kingdom',
+    'forest', 'secret', 'voyage', 'light', 'war', 'house', 'dream', 'clock', 'road', 'star',
+    'harvest', 'bridge', 'glass', 'tower', 'desert', 'song', 'wolf', 'crown', 'signal', 'harbor',
+]
+# Number of genres of a book, and how often each occurs.
+GENRES_PER_BOOK = [1, 2, 3, 4]
+GENRES_PER_BOOK_WEIGHTS = [45, 35, 15, 5]
+
+
+class Command(BaseCommand):
+    help = 'Fill an empty database with a deterministic, generated library.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--authors', type=int, default=2000)
+        parser.add_argument('--genres', type=int, default=40)
+        parser.add_argument('--books', type=int, default=50000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        if Book.objects.exists() or Author.objects.exists() or Genre.objects.exists():
+            raise CommandError('The library is not empty; run `manage.py flush` first.')
+        if min(options['authors'], options['genres'], options['chunk_size']) < 1:
+            raise CommandError('--authors, --genres and --chunk-size must be positive.')
+        if options['books'] < 0:
+            raise CommandError('--books must not be negative.')
+
+        rng = random.Random(options['seed'])
+        with transaction.atomic():
+            authors = Author.objects.bulk_create(
+                [random_author(rng) for _ in range(options['authors'])], batch_size=options['chunk_size'],
+            )
+            genres = Genre.objects.bulk_create([Genre(name=genre_name(i)) for i in range(options['genres'])])
+            record_changes(Author, [author.pk for author in authors], Change.CREATED)
+            record_changes(Genre, [genre.pk for genre in genres], Change.CREATED)
+            transaction.on_commit(lambda: invalidate(table_tag(Author), table_tag(Genre)))
+
+        # Zipf-like weights: the n-th author or genre is picked about 1/n as
+        # often as the first one.
+        author_ids = [author.pk for author in authors]
+        author_weights = list(accumulate(1 / (rank + 1) for rank in range(len(author_ids))))
+        rng.shuffle(author_ids)
+        genre_ids = [genre.pk for genre in genres]
+        genre_weights = list(accumulate(1 / (rank + 1) for rank in range(len(genre_ids))))
+
+        created = 0
+        while created < options['books']:
+            size = min(options['chunk_size'], options['books'] - created)
+            create_books([
+                random_book(rng, author_ids, author_weights, genre_ids, genre_weights)
+                for _ in range(size)
+            ])
+            created += size
+            self.stdout.write(f'{created}/{options["books"]} books', ending='\r')
+        if created:
+            # Past the progress line.
+            self.stdout.write('')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {len(authors)} authors, {len(genres)} genres and {created} books.'
+        ))
+
+
+def random_date(rng, first_year, last_year):
+    start = datetime.date(first_year, 1, 1)
+    return start + datetime.timedelta(days=rng.randrange((datetime.date(last_year, 12, 31) - start).days + 1))
+
+
+def genre_name(index):
+    # "Fiction", ..., then "Fiction 2" once the names run out.
+    name = GENRE_NAMES[index % len(GENRE_NAMES)]
+    return name if index < len(GENRE_NAMES) else f'{name} {index // len(GENRE_NAMES) + 1}'
+
+
+def random_author(rng):
+    born = random_date(rng, 1850, 2000)
+    died = None
+    if born.year < 1950 and rng.random() < 0.7:
+        died = born + datetime.timedelta(days=rng.randrange(40 * 365, 90 * 365))
+        died = min(died, datetime.date(2024, 12, 31))
+    return Author(
+        first_name=rng.choice(FIRST_NAMES),
+        last_name=rng.choice(LAST_NAMES),
+        # A few authors' dates are unknown.
+        date_of_birth=born if rng.random() < 0.95 else None,
+        date_of_death=died,
+    )
+
+
+def random_book(rng, author_ids, author_weights, genre_ids, genre_weights):
+    words = rng.choices(WORDS, k=rng.randint(1, 4))
+    title = ' '.join(words).capitalize()
+    sentences = [
+        ' '.join(rng.choices(WORDS, k=rng.randint(6, 14))).capitalize() + '.'
+        for _ in range(rng.randint(1, 5))
+    ]
+    count = rng.choices(GENRES_PER_BOOK, GENRES_PER_BOOK_WEIGHTS)[0]
+    genres = set()
+    while len(genres) < min(count, len(genre_ids)):
+        genres.add(rng.choices(genre_ids, cum_weights=genre_weights)[0])
+    return {
+        'title': title,
+        # Anonymous works have no author.
+        'author_id': rng.choices(author_ids, cum_weights=author_weights)[0] if rng.random() < 0.97 else None,
+        'summary': ' '.join(sentences)[:1024],
+        'published_date': random_date(rng, 1900, 2024) if rng.random() < 0.9 else None,
+        'page_count': rng.randint(40, 1200) if rng.random() < 0.9 else None,
+        'genre_ids': sorted(genres),
+    }
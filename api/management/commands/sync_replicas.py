@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from api.routing import PRIMARY, replica_databases
+
+
+class Command(BaseCommand):
+    help = 'Copy the primary database into the SQLite files standing in for read replicas.'
+
+    def handle(self, *args, **options):
+        replicas = replica_databases()
+        if not replicas:
+            raise CommandError('No REPLICA_DATABASES are configured.')
+
+        primary = connections[PRIMARY]
+        for alias in replicas:
+            replica = connections[alias]
+            if primary.vendor != 'sqlite' or replica.vendor != 'sqlite':
+                raise CommandError(f'"{alias}" is not SQLite; real replicas follow the primary on their own.')
+            primary.ensure_connection()
+            replica.ensure_connection()
+            primary.connection.backup(replica.connection)
+            self.stdout.write(self.style.SUCCESS(f'Copied the primary database to "{alias}".'))
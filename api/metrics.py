@@ -0,0 +1,307 @@
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from inspect import isawaitable
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+from django.utils.decorators import sync_and_async_middleware
+from graphene.types.resolver import dict_or_attr_resolver
+
+
+# Performance metrics in the Prometheus text format, kept per process. With
+# METRICS on, metrics_middleware measures every request (wall time, number
+# and duration of SQL queries), and ResolverMetricsMiddleware does the same
+# per GraphQL resolver path, e.g. "books.author" (list indices and the
+# connections' edges/node are left out). SQL is counted through a database
+# execute wrapper; a query run by a batched loader counts towards the field
+# that started the batch. With METRICS off none of this is installed.
+
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200, 500)
+# Series kept per metric; further label values are counted as "other", so
+# e.g. aliased fields can't grow the registry without bound.
+MAX_SERIES = 1000
+CONNECTION_FIELDS = ('edges', 'node')
+
+
+def metrics_enabled():
+    return getattr(settings, 'METRICS', False)
+
+
+class Histogram:
+    def __init__(self, name, help, labels, buckets):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        # Label values -> per bucket counts (not cumulative), sum, count.
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                if len(self._series) >= MAX_SERIES:
+                    labels = ('other',) * len(self.labels)
+                series = self._series.setdefault(labels, [[0] * len(self.buckets), 0, 0])
+            index = bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = sorted((labels, [counts[:], total, count]) for labels, (counts, total, count) in self._series.items())
+        for labels, (counts, total, count) in series:
+            pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labels, labels)]
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{_labels(pairs, bound)} {cumulative}')
+            lines.append(f'{self.name}_bucket{_labels(pairs, "+Inf")} {count}')
+            lines.append(f'{self.name}_sum{_labels(pairs)} {total}')
+            lines.append(f'{self.name}_count{_labels(pairs)} {count}')
+        return '\n'.join(lines)
+
+
+def _labels(pairs, le=None):
+    if le is not None:
+        pairs = [*pairs, f'le="{le}"']
+    return '{' + ','.join(pairs) + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds', 'Time spent serving a request.', ('view', 'method'), DURATION_BUCKETS,
+)
+REQUEST_QUERIES = Histogram(
+    'http_request_sql_queries', 'SQL queries run by a request.', ('view', 'method'), QUERY_BUCKETS,
+)
+REQUEST_SQL_DURATION = Histogram(
+    'http_request_sql_duration_seconds', 'Time a request spent in SQL queries.', ('view', 'method'), DURATION_BUCKETS,
+)
+RESOLVER_DURATION = Histogram(
+    'graphql_resolver_duration_seconds', "Time spent in a field's resolver per request, summed over its calls.",
+    ('path',), DURATION_BUCKETS,
+)
+RESOLVER_QUERIES = Histogram(
+    'graphql_resolver_sql_queries', "SQL queries run by a field's resolver per request.", ('path',), QUERY_BUCKETS,
+)
+RESOLVER_SQL_DURATION = Histogram(
+    'graphql_resolver_sql_duration_seconds', "Time a field's resolver spent in SQL queries per request.",
+    ('path',), DURATION_BUCKETS,
+)
+HISTOGRAMS = [
+    REQUEST_DURATION, REQUEST_QUERIES, REQUEST_SQL_DURATION,
+    RESOLVER_DURATION, RESOLVER_QUERIES, RESOLVER_SQL_DURATION,
+]
+
+
+class Timing:
+    def __init__(self):
+        self.calls = 0
+        self.duration = 0.0
+        self.queries = 0
+        self.sql_duration = 0.0
+
+    def as_dict(self):
+        return {
+            'calls': self.calls,
+            'durationMs': round(self.duration * 1000, 3),
+            'queries': self.queries,
+            'sqlMs': round(self.sql_duration * 1000, 3),
+        }
+
+
+class RequestMetrics:
+    # Updated from every thread working for the request, e.g. the async
+    # view's sync resolvers and the writer thread (api/writer.py).
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.total = Timing()
+        # Resolver path -> Timing.
+        self.resolvers = {}
+        self._lock = threading.Lock()
+
+    def resolver(self, path):
+        with self._lock:
+            timing = self.resolvers.get(path)
+            if timing is None:
+                timing = self.resolvers[path] = Timing()
+            return timing
+
+    def add_query(self, timing, elapsed):
+        # `timing` is the running resolver's, if any.
+        with self._lock:
+            self.total.queries += 1
+            self.total.sql_duration += elapsed
+            if timing is not None:
+                timing.queries += 1
+                timing.sql_duration += elapsed
+
+    def add_call(self, timing, elapsed):
+        with self._lock:
+            timing.calls += 1
+            timing.duration += elapsed
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def as_dict(self):
+        # Timings of the request so far, for the GraphQL `extensions`.
+        with self._lock:
+            return {
+                'durationMs': round(self.elapsed() * 1000, 3),
+                'queries': self.total.queries,
+                'sqlMs': round(self.total.sql_duration * 1000, 3),
+                'resolvers': {path: timing.as_dict() for path, timing in self.resolvers.items()},
+            }
+
+
+_request = ContextVar('request_metrics', default=None)
+# Timing of the resolver running in this context, if any.
+_resolver = ContextVar('resolver_timing', default=None)
+
+
+def current_metrics():
+    return _request.get()
+
+
+def sql_timer(execute, sql, params, many, context):
+    # Database execute wrapper, installed on every connection (see
+    # install_sql_timer).
+    metrics = _request.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.add_query(_resolver.get(), time.perf_counter() - start)
+
+
+def install_sql_timer(sender, connection, **kwargs):
+    # connection_created receiver.
+    if sql_timer not in connection.execute_wrappers:
+        connection.execute_wrappers.append(sql_timer)
+
+
+def resolver_path(path):
+    keys = []
+    while path is not None:
+        if isinstance(path.key, str) and path.key not in CONNECTION_FIELDS:
+            keys.append(path.key)
+        path = path.prev
+    return '.'.join(reversed(keys))
+
+
+# (Type name, field name) -> whether the field is timed.
+_timed_fields = {}
+
+
+def is_timed(info):
+    # Plain attribute reads and the connections' edges/node aren't worth a
+    # series of their own; their SQL (e.g. a deferred column) still counts
+    # towards the request.
+    key = (info.parent_type.name, info.field_name)
+    timed = _timed_fields.get(key)
+    if timed is None:
+        resolve = info.parent_type.fields[info.field_name].resolve
+        timed = _timed_fields[key] = (
+            info.field_name not in CONNECTION_FIELDS
+            and getattr(resolve, 'func', None) is not dict_or_attr_resolver
+        )
+    return timed
+
+
+class ResolverMetricsMiddleware:
+    # Graphene middleware timing each resolver into the request's metrics.
+
+    def resolve(self, next, root, info, **args):
+        metrics = _request.get()
+        if metrics is None or not is_timed(info):
+            return next(root, info, **args)
+        timing = metrics.resolver(resolver_path(info.path))
+        start = time.perf_counter()
+        token = _resolver.set(timing)
+        try:
+            result = next(root, info, **args)
+        finally:
+            _resolver.reset(token)
+        if isawaitable(result):
+            return self.resolve_async(result, metrics, timing, start)
+        metrics.add_call(timing, time.perf_counter() - start)
+        return result
+
+    async def resolve_async(self, result, metrics, timing, start):
+        token = _resolver.set(timing)
+        try:
+            return await result
+        finally:
+            _resolver.reset(token)
+            metrics.add_call(timing, time.perf_counter() - start)
+
+
+def record_request(request, metrics):
+    match = getattr(request, 'resolver_match', None)
+    labels = (match.view_name if match else 'unmatched', request.method)
+    REQUEST_DURATION.observe(labels, metrics.elapsed())
+    REQUEST_QUERIES.observe(labels, metrics.total.queries)
+    REQUEST_SQL_DURATION.observe(labels, metrics.total.sql_duration)
+    with metrics._lock:
+        resolvers = list(metrics.resolvers.items())
+    for path, timing in resolvers:
+        RESOLVER_DURATION.observe((path,), timing.duration)
+        RESOLVER_QUERIES.observe((path,), timing.queries)
+        RESOLVER_SQL_DURATION.observe((path,), timing.sql_duration)
+
+
+@sync_and_async_middleware
+def metrics_middleware(get_response):
+    if not metrics_enabled():
+        raise MiddlewareNotUsed
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            metrics = RequestMetrics()
+            token = _request.set(metrics)
+            try:
+                response = await get_response(request)
+            finally:
+                _request.reset(token)
+            record_request(request, metrics)
+            return response
+    else:
+        def middleware(request):
+            metrics = RequestMetrics()
+            token = _request.set(metrics)
+            try:
+                response = get_response(request)
+            finally:
+                _request.reset(token)
+            record_request(request, metrics)
+            return response
+    return middleware
+
+
+def render_metrics():
+    return '\n'.join(histogram.render() for histogram in HISTOGRAMS) + '\n'
+
+
+def metrics_view(request):
+    # Scraped by Prometheus; only answers the METRICS_ALLOWED_IPS.
+    if not metrics_enabled():
+        raise Http404
+    if request.META.get('REMOTE_ADDR') not in getattr(settings, 'METRICS_ALLOWED_IPS', ['127.0.0.1', '::1']):
+        return HttpResponseForbidden()
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
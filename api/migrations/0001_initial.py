@@ -0,0 +1,52 @@
+# Generated by Django 5.1.6 on 2026-10-18 13:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Genre',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=64)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Author',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('first_name', models.CharField(max_length=128)),
+                ('last_name', models.CharField(max_length=128)),
+                ('date_of_birth', models.DateField(blank=True, null=True)),
+                ('date_of_death', models.DateField(blank=True, null=True, verbose_name='Died')),
+            ],
+            options={
+                'ordering': ['date_of_birth'],
+                'indexes': [models.Index(fields=['date_of_birth'], name='api_author_date_of_3db0f4_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='Book',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=128)),
+                ('summary', models.TextField(help_text='Enter a brief description of the book', max_length=1024)),
+                ('published_date', models.DateField(blank=True, null=True)),
+                ('page_count', models.PositiveIntegerField(blank=True, null=True)),
+                ('author', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to='api.author')),
+                ('genre', models.ManyToManyField(to='api.genre')),
+            ],
+            options={
+                'ordering': ['published_date'],
+                'indexes': [models.Index(fields=['title'], name='api_book_title_dc9757_idx'), models.Index(fields=['author'], name='api_book_author__b1bddf_idx'), models.Index(fields=['published_date'], name='api_book_publish_211805_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,55 @@
+from django.db import migrations
+
+
+# FTS5 index over Book.title and Book.summary, see api/search.py. It is an
+# external content table: the text stays in api_book only and triggers keep
+# the index in sync with every write to it, including bulk and raw SQL ones.
+# Other backends use the icontains fallback and get no table.
+
+TRIGGERS = [
+    "CREATE TRIGGER api_book_search_insert AFTER INSERT ON api_book BEGIN "
+    "INSERT INTO api_book_search (rowid, title, summary) VALUES (new.id, new.title, new.summary); "
+    "END",
+    "CREATE TRIGGER api_book_search_delete AFTER DELETE ON api_book BEGIN "
+    "INSERT INTO api_book_search (api_book_search, rowid, title, summary) "
+    "VALUES ('delete', old.id, old.title, old.summary); "
+    "END",
+    "CREATE TRIGGER api_book_search_update AFTER UPDATE OF id, title, summary ON api_book BEGIN "
+    "INSERT INTO api_book_search (api_book_search, rowid, title, summary) "
+    "VALUES ('delete', old.id, old.title, old.summary); "
+    "INSERT INTO api_book_search (rowid, title, summary) VALUES (new.id, new.title, new.summary); "
+    "END",
+]
+
+
+def create_search_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE api_book_search USING fts5("
+        "title, summary, content = 'api_book', content_rowid = 'id', "
+        "tokenize = 'porter unicode61 remove_diacritics 2')"
+    )
+    for trigger in TRIGGERS:
+        schema_editor.execute(trigger)
+    # Indexes the books that already exist.
+    schema_editor.execute("INSERT INTO api_book_search (api_book_search) VALUES ('rebuild')")
+
+
+def drop_search_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for name in ('insert', 'delete', 'update'):
+        schema_editor.execute(f'DROP TRIGGER IF EXISTS api_book_search_{name}')
+    schema_editor.execute('DROP TABLE IF EXISTS api_book_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_table, drop_search_table),
+    ]
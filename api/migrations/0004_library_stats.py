@@ -0,0 +1,65 @@
+# Generated by Django 5.1.6 on 2026-10-18 13:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import Coalesce, ExtractYear
+
+
+def populate_stats(apps, schema_editor):
+    # Same as api.stats.rebuild_stats(), on the historical models.
+    Book = apps.get_model('api', 'Book')
+    AuthorStats = apps.get_model('api', 'AuthorStats')
+    GenreStats = apps.get_model('api', 'GenreStats')
+    YearStats = apps.get_model('api', 'YearStats')
+
+    AuthorStats.objects.bulk_create([
+        AuthorStats(author_id=row['author_id'], book_count=row['books'],
+                    page_count_total=row['pages'], paged_book_count=row['paged'])
+        for row in Book.objects.filter(author__isnull=False).order_by().values('author_id').annotate(
+            books=Count('pk'), pages=Coalesce(Sum('page_count'), 0), paged=Count('page_count'),
+        )
+    ])
+    GenreStats.objects.bulk_create([
+        GenreStats(genre_id=row['genre_id'], book_count=row['books'])
+        for row in Book.genre.through.objects.order_by().values('genre_id').annotate(books=Count('book_id'))
+    ])
+    YearStats.objects.bulk_create([
+        YearStats(year=row['year'], book_count=row['books'])
+        for row in Book.objects.filter(published_date__isnull=False).order_by()
+        .annotate(year=ExtractYear('published_date')).values('year').annotate(books=Count('pk'))
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_list_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorStats',
+            fields=[
+                ('author', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to='api.author')),
+                ('book_count', models.IntegerField(default=0)),
+                ('page_count_total', models.BigIntegerField(default=0)),
+                ('paged_book_count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='GenreStats',
+            fields=[
+                ('genre', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to='api.genre')),
+                ('book_count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='YearStats',
+            fields=[
+                ('year', models.IntegerField(primary_key=True, serialize=False)),
+                ('book_count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(populate_stats, migrations.RunPython.noop),
+    ]
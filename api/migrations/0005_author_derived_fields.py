@@ -0,0 +1,23 @@
+# Generated by Django 5.1.6 on 2026-10-18 13:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_library_stats'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='authorstats',
+            name='author',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='api.author'),
+        ),
+        migrations.AddIndex(
+            model_name='authorstats',
+            index=models.Index(fields=['book_count'], name='api_authors_book_co_571c79_idx'),
+        ),
+    ]
@@ -1,37 +1,87 @@
-from django.db import models
+from django.db import models, router, transaction
+from django.db.models.functions import Coalesce, ExtractYear, Now
 from django.utils import timezone
+from django.utils.functional import cached_property
 
 
-class Author(models.Model):
+class ChangeLoggedModel(models.Model):
+    # Saved in one transaction with the change feed row written by its
+    # post_save receiver (see api/changes.py). Deletes and many-to-many
+    # changes send their signals inside a transaction already.
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using, savepoint=False):
+            super().save(*args, **kwargs)
+
+
+class AuthorQuerySet(models.QuerySet):
+    # Derived fields computed in SQL, so lists can filter and sort on them
+    # without touching every instance. Selection name -> (method adding the
+    # annotation, columns the per-instance fallback reads), for
+    # api/optimizer.py.
+    derived_fields = {
+        'age': ('with_age', ['date_of_birth']),
+        'book_count': ('with_book_count', []),
+    }
+
+    def with_age(self):
+        return self.annotate(age=ExtractYear(Now()) - ExtractYear('date_of_birth'))
+
+    def with_book_count(self):
+        # Read from the AuthorStats summary row instead of counting books.
+        return self.annotate(book_count=Coalesce('stats__book_count', 0))
+
+
+class Author(ChangeLoggedModel):
     first_name = models.CharField(max_length=128)
     last_name = models.CharField(max_length=128)
     date_of_birth = models.DateField(null=True, blank=True)
     date_of_death = models.DateField('Died', null=True, blank=True)
 
+    objects = AuthorQuerySet.as_manager()
+
     def __str__(self):
         return f'{self.first_name} {self.last_name}'
 
     class Meta:
         ordering = ['date_of_birth']
         indexes = [
-            models.Index(fields=['date_of_birth'])
+            models.Index(fields=['date_of_birth']),
+            models.Index(fields=['date_of_death']),
+            models.Index(fields=['last_name']),
         ]
     
-    @property
+    # Computed per instance unless the queryset annotated them (see
+    # AuthorQuerySet), in which case the annotation takes precedence.
+    @cached_property
     def age(self):
         if self.date_of_birth:
             return timezone.now().year - self.date_of_birth.year
         return None
 
+    @cached_property
+    def book_count(self):
+        # The same summary row with_book_count() reads.
+        return AuthorStats.objects.filter(author=self).values_list('book_count', flat=True).first() or 0
 
-class Genre(models.Model):
+
+class Genre(ChangeLoggedModel):
     name = models.CharField(max_length=64)
 
     def __str__(self):
         return self.name
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['name']),
+        ]
+
 
-class Book(models.Model):
+class Book(ChangeLoggedModel):
     title = models.CharField(max_length=128)
     author = models.ForeignKey(Author, on_delete=models.SET_NULL, null=True)
     summary = models.TextField(max_length=1024, help_text='Enter a brief description of the book')
@@ -48,4 +98,54 @@ class Book(models.Model):
             models.Index(fields=['title']),
             models.Index(fields=['author']),
             models.Index(fields=['published_date']),
+            models.Index(fields=['page_count']),
+            # Books of an author in publication order.
+            models.Index(fields=['author', 'published_date']),
         ]
+
+
+# Summary tables for libraryStats, kept up to date incrementally (see
+# api/stats.py) instead of aggregating the books on every read.
+
+class AuthorStats(models.Model):
+    author = models.OneToOneField(Author, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    book_count = models.IntegerField(default=0)
+    # Sum and number of the page counts that are set, for the average.
+    page_count_total = models.BigIntegerField(default=0)
+    paged_book_count = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # Authors with at least N books.
+            models.Index(fields=['book_count']),
+        ]
+
+    @property
+    def average_page_count(self):
+        if self.paged_book_count:
+            return self.page_count_total / self.paged_book_count
+        return None
+
+
+class GenreStats(models.Model):
+    genre = models.OneToOneField(Genre, on_delete=models.CASCADE, primary_key=True, related_name='+')
+    book_count = models.IntegerField(default=0)
+
+
+class YearStats(models.Model):
+    # Publication year; books without a published_date aren't counted.
+    year = models.IntegerField(primary_key=True)
+    book_count = models.IntegerField(default=0)
+
+
+class Change(models.Model):
+    # Append-only change feed of authors, genres and books; the id is the
+    # feed's cursor. See api/changes.py.
+    CREATED = 'created'
+    UPDATED = 'updated'
+    DELETED = 'deleted'
+
+    model = models.CharField(max_length=16, choices=[('author', 'author'), ('genre', 'genre'), ('book', 'book')])
+    object_id = models.BigIntegerField()
+    action = models.CharField(max_length=16, choices=[(CREATED, CREATED), (UPDATED, UPDATED), (DELETED, DELETED)])
+    changed_at = models.DateTimeField(default=timezone.now)
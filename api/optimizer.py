@@ -0,0 +1,122 @@
+from functools import lru_cache
+
+from django.db.models import Prefetch
+from graphene.utils.str_converters import to_snake_case
+from graphql.language import FieldNode, FragmentSpreadNode, InlineFragmentNode
+
+from .incremental import is_deferred
+
+
+def optimize(queryset, info, path=(), required=()):
+    # Shape the queryset after the client's selection set: select_related for
+    # forward relations, Prefetch querysets for many-valued ones and only()
+    # for the columns that were actually asked for. `path` descends to the
+    # node selection of wrapper types such as connections (edges -> node).
+    # Fields selected only in deferred fragments (see api/incremental.py)
+    # map to None instead of a subtree: their columns are loaded, but their
+    # relations are left to the loaders once the fragment runs.
+    tree = {}
+    for field_node in info.field_nodes:
+        if field_node.selection_set:
+            _collect(info, field_node.selection_set, tree)
+    for name in path:
+        tree = tree.get(name) or {}
+    return _apply(queryset, tree, required)
+
+
+def loaded_fields(queryset):
+    # Attnames of the model's own columns the queryset loads, None for all.
+    names, defer = queryset.query.deferred_loading
+    columns = {field.name: field.attname for field in queryset.model._meta.concrete_fields}
+    if defer:
+        return {attname for name, attname in columns.items() if name not in names} if names else None
+    return {columns[name] for name in names if name in columns} | {queryset.model._meta.pk.attname}
+
+
+def _collect(info, selection_set, tree, deferred=False):
+    for selection in selection_set.selections:
+        if isinstance(selection, FieldNode):
+            name = to_snake_case(selection.name.value)
+            if deferred:
+                tree.setdefault(name, None)
+                continue
+            subtree = tree.get(name)
+            if subtree is None:
+                subtree = tree[name] = {}
+            if selection.selection_set:
+                _collect(info, selection.selection_set, subtree)
+        elif isinstance(selection, FragmentSpreadNode):
+            fragment = info.fragments[selection.name.value]
+            _collect(info, fragment.selection_set, tree, deferred or is_deferred(info, selection))
+        elif isinstance(selection, InlineFragmentNode):
+            _collect(info, selection.selection_set, tree, deferred or is_deferred(info, selection))
+    return tree
+
+
+def _apply(queryset, tree, required=()):
+    only, select, prefetch = _plan(queryset.model, tree)
+    queryset = queryset.only(*only, *required)
+    # Derived fields the queryset knows how to compute in SQL (see
+    # AuthorQuerySet.derived_fields) are annotated when selected.
+    derived_fields = _derived_fields(queryset.model)
+    for name, subtree in tree.items():
+        if name in derived_fields and subtree is not None:
+            queryset = getattr(queryset, derived_fields[name][0])()
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    return queryset
+
+
+def _plan(model, tree, prefix=''):
+    only = [prefix + model._meta.pk.name]
+    select, prefetch = [], []
+    fields = _fields(model)
+    derived_fields = _derived_fields(model)
+
+    for name, subtree in tree.items():
+        field = fields.get(name)
+        if field is None:
+            # Related objects can't be annotated, so keep what their
+            # derived fields are computed from.
+            if name in derived_fields:
+                only += [prefix + source for source in derived_fields[name][1]]
+            continue
+
+        if not field.is_relation:
+            only.append(prefix + field.name)
+        elif field.many_to_one or field.one_to_one:
+            lookup = prefix + name
+            only.append(lookup)
+            if subtree is None:
+                continue
+            select.append(lookup)
+            sub_only, sub_select, sub_prefetch = _plan(field.related_model, subtree, lookup + '__')
+            only += sub_only
+            select += sub_select
+            prefetch += sub_prefetch
+        elif subtree is not None:
+            # Reverse FK prefetches match rows back to their parent through
+            # the FK column, so it has to survive only().
+            required = [field.field.name] if field.one_to_many else []
+            inner = _apply(field.related_model._default_manager.all(), subtree, required)
+            prefetch.append(Prefetch(prefix + name, queryset=inner))
+
+    return only, select, prefetch
+
+
+@lru_cache(maxsize=None)
+def _fields(model):
+    fields = {}
+    for field in model._meta.get_fields():
+        if field.auto_created and not field.concrete:
+            fields[field.get_accessor_name()] = field
+        else:
+            fields[field.name] = field
+    return fields
+
+
+@lru_cache(maxsize=None)
+def _derived_fields(model):
+    return getattr(model._default_manager.get_queryset(), 'derived_fields', {})
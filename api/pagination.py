@@ -0,0 +1,280 @@
+import base64
+import json
+import operator
+from functools import reduce
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q
+from graphene.relay import PageInfo
+from graphene_django.settings import graphene_settings
+from graphql import GraphQLError
+from rest_framework import exceptions
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+# Keyset (seek) pagination. Rows are ordered on `keys`, ascending with NULLs
+# first or, for "-name" keys, descending with NULLs last, with a unique last
+# key (the pk) as tie-breaker, and a page continues from the position stored
+# in the cursor instead of an OFFSET.
+
+BOOK_KEYS = ('published_date', 'id')
+AUTHOR_KEYS = ('date_of_birth', 'id')
+GENRE_KEYS = ('id',)
+
+
+def key_name(key):
+    return key.lstrip('-')
+
+
+def is_descending(key):
+    return key.startswith('-')
+
+
+def ordered(queryset, keys, reverse=False):
+    return queryset.order_by(*[
+        F(key_name(key)).desc(nulls_last=True) if is_descending(key) != reverse
+        else F(key_name(key)).asc(nulls_first=True)
+        for key in keys
+    ])
+
+
+def encode_cursor(obj, keys):
+    # `obj` is a model instance or a row of a values() queryset.
+    if isinstance(obj, dict):
+        values = [obj[key_name(key)] for key in keys]
+    else:
+        values = [getattr(obj, key_name(key)) for key in keys]
+    return base64.urlsafe_b64encode(json.dumps(values, cls=DjangoJSONEncoder).encode()).decode()
+
+
+def decode_cursor(cursor, keys, model):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError(cursor)
+        return [
+            None if value is None else model._meta.get_field(key_name(key)).to_python(value)
+            for key, value in zip(keys, values)
+        ]
+    except (TypeError, ValueError, ValidationError):
+        raise ValueError(f'Invalid cursor: {cursor}')
+
+
+def seek(keys, values, forward=True):
+    conditions = []
+    equal = Q()
+    for key, value in zip(keys, values):
+        name = key_name(key)
+        beyond = _beyond(name, value, forward != is_descending(key))
+        if beyond is not None:
+            conditions.append(equal & beyond)
+        equal &= Q(**{f'{name}__isnull': True}) if value is None else Q(**{name: value})
+
+    if not conditions:
+        return Q(pk__in=[])
+    return reduce(operator.or_, conditions)
+
+
+def _beyond(key, value, forward):
+    if forward:
+        if value is None:
+            return Q(**{f'{key}__isnull': False})
+        return Q(**{f'{key}__gt': value})
+
+    if value is None:
+        return None
+    return Q(**{f'{key}__lt': value}) | Q(**{f'{key}__isnull': True})
+
+
+def keyset_page(queryset, keys, first=None, last=None, after=None, before=None):
+    # Returns (rows, has_previous_page, has_next_page); `after`/`before` are
+    # decoded cursor positions.
+    page, finish = _keyset_query(queryset, keys, first, last, after, before)
+    return finish(list(page))
+
+
+async def akeyset_page(queryset, keys, first=None, last=None, after=None, before=None):
+    page, finish = _keyset_query(queryset, keys, first, last, after, before)
+    return finish([row async for row in page])
+
+
+def _keyset_query(queryset, keys, first, last, after, before):
+    # The page's queryset plus the function turning its rows into the
+    # keyset_page() result.
+    if after is not None:
+        queryset = queryset.filter(seek(keys, after))
+    if before is not None:
+        queryset = queryset.filter(seek(keys, before, forward=False))
+
+    if first is not None:
+        def finish(rows):
+            has_next_page = len(rows) > first
+            has_previous_page = after is not None
+            rows = rows[:first]
+            if last is not None:
+                has_previous_page = has_previous_page or len(rows) > last
+                # `first` may have returned fewer than `last` rows.
+                rows = rows[max(len(rows) - last, 0):]
+            return rows, has_previous_page, has_next_page
+
+        return ordered(queryset, keys)[:first + 1], finish
+
+    def finish(rows):
+        return rows[:last][::-1], len(rows) > last, before is not None
+
+    return ordered(queryset, keys, reverse=True)[:last + 1], finish
+
+
+def paginate_connection(queryset, keys, connection_type, first=None, last=None, after=None, before=None):
+    args = _connection_args(queryset, keys, first, last, after, before)
+    return _connection(queryset, keys, connection_type, *keyset_page(queryset, keys, *args))
+
+
+async def apaginate_connection(queryset, keys, connection_type, first=None, last=None, after=None, before=None):
+    args = _connection_args(queryset, keys, first, last, after, before)
+    return _connection(queryset, keys, connection_type, *await akeyset_page(queryset, keys, *args))
+
+
+def stream_connection(queryset, keys, connection_type, chunk_size, track,
+                      first=None, last=None, after=None, before=None):
+    # paginate_connection() for a streamed `edges` list: the page is found
+    # on its keys alone, which is all pageInfo needs, and its rows are then
+    # fetched chunk_size at a time while the edges are consumed. Each chunk
+    # goes to `track`, so the loaders batch relation lookups across it.
+    args = _connection_args(queryset, keys, first, last, after, before)
+    names = [key_name(key) for key in keys]
+    rows, has_previous_page, has_next_page = keyset_page(
+        queryset.prefetch_related(None).values('pk', *names), keys, *args
+    )
+    cursors = [encode_cursor(row, keys) for row in rows]
+    connection = build_connection(connection_type, queryset, rows, cursors, has_previous_page, has_next_page)
+    connection.edges = _stream_edges(
+        queryset, keys, connection_type, [row['pk'] for row in rows], chunk_size, track
+    )
+    return connection
+
+
+def _stream_edges(queryset, keys, connection_type, pks, chunk_size, track):
+    for start in range(0, len(pks), chunk_size):
+        chunk = track(ordered(queryset.filter(pk__in=pks[start:start + chunk_size]), keys))
+        for node in chunk:
+            yield connection_type.Edge(node=node, cursor=encode_cursor(node, keys))
+
+
+def connection_limits(first=None, last=None):
+    max_limit = graphene_settings.RELAY_CONNECTION_MAX_LIMIT
+    for name, value in (('first', first), ('last', last)):
+        if value is not None and not 0 <= value <= max_limit:
+            raise GraphQLError(f'`{name}` must be between 0 and {max_limit}.')
+    if first is None and last is None:
+        first = max_limit
+    return first, last
+
+
+def build_connection(connection_type, queryset, rows, cursors, has_previous_page, has_next_page):
+    edges = [connection_type.Edge(node=row, cursor=cursor) for row, cursor in zip(rows, cursors)]
+    connection = connection_type(
+        edges=edges,
+        page_info=PageInfo(
+            start_cursor=edges[0].cursor if edges else None,
+            end_cursor=edges[-1].cursor if edges else None,
+            has_previous_page=has_previous_page,
+            has_next_page=has_next_page,
+        ),
+    )
+    # Kept for totalCount, which only runs a COUNT(*) when it is selected.
+    connection.queryset = queryset
+    return connection
+
+
+def _connection_args(queryset, keys, first, last, after, before):
+    first, last = connection_limits(first, last)
+    try:
+        after = decode_cursor(after, keys, queryset.model) if after else None
+        before = decode_cursor(before, keys, queryset.model) if before else None
+    except ValueError as e:
+        raise GraphQLError(str(e))
+    return first, last, after, before
+
+
+def _connection(queryset, keys, connection_type, rows, has_previous_page, has_next_page):
+    cursors = [encode_cursor(row, keys) for row in rows]
+    return build_connection(connection_type, queryset, rows, cursors, has_previous_page, has_next_page)
+
+
+class KeysetPagination(BasePagination):
+    # REST counterpart of the connections above: pages are ordered by the
+    # queryset's ordering plus id and linked with `after`/`before` cursors.
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    after_query_param = 'after'
+    before_query_param = 'before'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.keys = self.get_keys(queryset)
+
+        page_size = self.get_page_size(request)
+        after = self.get_cursor(request, self.after_query_param, queryset.model)
+        before = self.get_cursor(request, self.before_query_param, queryset.model)
+
+        if before is not None and after is None:
+            rows, self.has_previous, self.has_next = keyset_page(
+                queryset, self.keys, last=page_size, before=before
+            )
+        else:
+            rows, self.has_previous, self.has_next = keyset_page(
+                queryset, self.keys, first=page_size, after=after, before=before
+            )
+
+        self.start_cursor = encode_cursor(rows[0], self.keys) if rows else None
+        self.end_cursor = encode_cursor(rows[-1], self.keys) if rows else None
+        return rows
+
+    def get_cursor(self, request, param, model):
+        cursor = request.query_params.get(param)
+        if not cursor:
+            return None
+        try:
+            return decode_cursor(cursor, self.keys, model)
+        except ValueError:
+            raise exceptions.ValidationError({param: 'Invalid cursor.'})
+
+    def get_keys(self, queryset):
+        # The queryset's own order_by() or else the model's Meta.ordering,
+        # followed by the pk unless that is already the last key.
+        ordering = list(queryset.query.order_by or queryset.model._meta.ordering)
+        if not ordering or key_name(ordering[-1]) != 'id':
+            ordering.append('-id' if ordering and is_descending(ordering[-1]) else 'id')
+        return tuple(ordering)
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def get_next_link(self):
+        if not self.has_next or self.end_cursor is None:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), self.before_query_param)
+        return replace_query_param(url, self.after_query_param, self.end_cursor)
+
+    def get_previous_link(self):
+        if not self.has_previous or self.start_cursor is None:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), self.after_query_param)
+        return replace_query_param(url, self.before_query_param, self.start_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
@@ -0,0 +1,50 @@
+from collections import defaultdict
+from itertools import islice
+
+from .models import Author, Book
+
+
+# BookSerializer-shaped dicts built from values() rows, resolving authors and
+# genres for a whole batch of books at once instead of per instance.
+
+AUTHOR_FIELDS = ['id', 'first_name', 'last_name', 'date_of_birth', 'date_of_death']
+BOOK_FIELDS = ['id', 'title', 'author_id', 'summary', 'published_date', 'page_count']
+
+
+def book_records(rows):
+    author_ids = {row['author_id'] for row in rows if row['author_id'] is not None}
+    authors = {
+        author['id']: author
+        for author in Author.objects.filter(pk__in=author_ids).values(*AUTHOR_FIELDS)
+    }
+
+    genres = defaultdict(list)
+    links = (
+        Book.genre.through.objects
+        .filter(book_id__in=[row['id'] for row in rows])
+        .order_by('book_id', 'genre_id')
+        .values_list('book_id', 'genre_id', 'genre__name')
+    )
+    for book_id, genre_id, name in links:
+        genres[book_id].append({'id': genre_id, 'name': name})
+
+    return [
+        {
+            'id': row['id'],
+            'title': row['title'],
+            'author': authors.get(row['author_id']),
+            'summary': row['summary'],
+            'genre': genres[row['id']],
+            'published_date': row['published_date'],
+            'page_count': row['page_count'],
+        }
+        for row in rows
+    ]
+
+
+def iter_book_chunks(queryset, chunk_size):
+    # Streams the queryset with a server-side cursor where the backend has
+    # one, so only `chunk_size` books are held in memory at a time.
+    rows = queryset.values(*BOOK_FIELDS).iterator(chunk_size=chunk_size)
+    while chunk := list(islice(rows, chunk_size)):
+        yield book_records(chunk)
@@ -0,0 +1,128 @@
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.utils.decorators import sync_and_async_middleware
+
+
+# Read/write splitting. Requests that only read query one of the
+# REPLICA_DATABASES, picked per request; writes, and every query after the
+# first write of a request, go to the primary. A client that wrote keeps
+# reading from the primary for REPLICA_LAG seconds (through a cookie), so it
+# never misses its own writes on a replica that hasn't caught up yet.
+# Outside of requests (commands, shell) everything uses the primary.
+
+PRIMARY = 'default'
+STICKY_COOKIE = 'primary_reads'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_state = ContextVar('routing_state', default=None)
+
+
+class RoutingState:
+    def __init__(self, replica, sticky, primary):
+        self.replica = replica
+        self.sticky = sticky
+        # Whether reads go to the primary.
+        self.primary = primary
+        self.wrote = False
+
+
+def replica_databases():
+    return getattr(settings, 'REPLICA_DATABASES', [])
+
+
+def replica_lag():
+    # Longest replication delay to expect, in seconds.
+    return getattr(settings, 'REPLICA_LAG', 5)
+
+
+def reads_from_replica():
+    state = _state.get()
+    return state is not None and not state.primary
+
+
+def allow_replica_reads(allowed=True):
+    # For views that know better than the HTTP method whether they write,
+    # e.g. GraphQL queries sent with POST.
+    state = _state.get()
+    if state is not None and not state.sticky and not state.wrote:
+        state.primary = not allowed
+
+
+def mark_written():
+    # For views whose writes run after they return, e.g. while streaming the
+    # response, so the client still gets the sticky cookie.
+    state = _state.get()
+    if state is not None:
+        state.primary = state.wrote = True
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        state = _state.get()
+        if state is None or state.primary:
+            return PRIMARY
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.primary = state.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema from the primary.
+        return db not in replica_databases()
+
+
+def _begin(request):
+    replicas = replica_databases()
+    if not replicas:
+        return None
+    sticky = STICKY_COOKIE in request.COOKIES
+    return _state.set(RoutingState(
+        random.choice(replicas), sticky, sticky or request.method not in SAFE_METHODS,
+    ))
+
+
+def _end(token):
+    if token is None:
+        return None
+    state = _state.get()
+    _state.reset(token)
+    return state
+
+
+def _stick_after_write(state, response):
+    if state is not None and state.wrote:
+        response.set_cookie(STICKY_COOKIE, '1', max_age=replica_lag(), httponly=True, samesite='Lax')
+    return response
+
+
+@sync_and_async_middleware
+def replica_routing_middleware(get_response):
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            token = _begin(request)
+            try:
+                response = await get_response(request)
+            finally:
+                state = _end(token)
+            return _stick_after_write(state, response)
+    else:
+        def middleware(request):
+            token = _begin(request)
+            try:
+                response = get_response(request)
+            finally:
+                state = _end(token)
+            return _stick_after_write(state, response)
+    return middleware
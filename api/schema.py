@@ -1,7 +1,25 @@
 import graphene
+from graphene.utils.str_converters import to_camel_case
 from graphene_django import DjangoObjectType
+from graphql import GraphQLError, specified_directives
 from .models import *
-
+from .aio import in_async_context, sync_only
+from .loaders import get_loaders, prefetched
+from .optimizer import loaded_fields, optimize
+from .pagination import (
+    apaginate_connection, build_connection, connection_limits, key_name, paginate_connection, stream_connection,
+)
+from .search import decode_search_cursor, load_hits, matching_books, search_page
+from .filters import (
+    AUTHOR_FILTERS, AUTHOR_ORDERINGS, BOOK_FILTERS, BOOK_ORDERINGS, GENRE_FILTERS, GENRE_ORDERINGS,
+    filter_queryset, ordering_keys,
+)
+from .bulk import book_errors, create_books, delete_books, existing_ids, to_pk, update_books
+from .conf import graphene_setting
+from .cache import record_tags
+from .incremental import DeferDirective, StreamDirective, streamed_field
+from .stats import STATS_TAG
+from .writer import serialized_write
 
 
 class AuthorType(DjangoObjectType):
@@ -9,18 +27,206 @@ class AuthorType(DjangoObjectType):
         model = Author
         fields = "__all__"
 
+    age = graphene.Int()
+    book_count = graphene.Int()
+
+    def resolve_book_count(self, info):
+        # Annotated on lists (see AuthorQuerySet); authors reached through a
+        # book batch the lookup instead. Both read the summary table.
+        record_tags(info, STATS_TAG)
+        if 'book_count' in self.__dict__:
+            return self.book_count
+        loaders = get_loaders(info)
+        return loaders.load(loaders.book_count_by_author, self, lambda author: author.pk)
+
+    def resolve_book_set(self, info):
+        books = prefetched(self, 'book_set')
+        if books is not None:
+            return books
+        loaders = get_loaders(info)
+        return loaders.load(loaders.books_by_author, self, lambda author: author.pk)
+
 
 class GenreType(DjangoObjectType):
     class Meta:
         model = Genre
         fields = "__all__"
 
+    def resolve_book_set(self, info):
+        books = prefetched(self, 'book_set')
+        if books is not None:
+            return books
+        loaders = get_loaders(info)
+        return loaders.load(loaders.books_by_genre, self, lambda genre: genre.pk)
+
 
 class BookType(DjangoObjectType):
     class Meta:
         model = Book
         fields = "__all__"
 
+    def resolve_author(self, info):
+        if self.author_id is None or Book.author.is_cached(self):
+            return self.author
+        loaders = get_loaders(info)
+        return loaders.load(loaders.author, self, lambda book: book.author_id)
+
+    def resolve_genre(self, info):
+        genres = prefetched(self, 'genre')
+        if genres is not None:
+            return genres
+        loaders = get_loaders(info)
+        return loaders.load(loaders.genres_by_book, self, lambda book: book.pk)
+
+
+class CountableConnection(graphene.relay.Connection):
+    class Meta:
+        abstract = True
+
+    total_count = graphene.Int()
+
+    def resolve_total_count(self, info):
+        if in_async_context():
+            return self.queryset.acount()
+        return self.queryset.count()
+
+
+class AuthorConnection(CountableConnection):
+    class Meta:
+        node = AuthorType
+
+
+class GenreConnection(CountableConnection):
+    class Meta:
+        node = GenreType
+
+
+class BookConnection(CountableConnection):
+    class Meta:
+        node = BookType
+
+
+class AuthorStatsType(DjangoObjectType):
+    class Meta:
+        model = AuthorStats
+        fields = ('author', 'book_count')
+
+    average_page_count = graphene.Float()
+
+
+class GenreStatsType(DjangoObjectType):
+    class Meta:
+        model = GenreStats
+        fields = ('genre', 'book_count')
+
+
+class YearStatsType(DjangoObjectType):
+    class Meta:
+        model = YearStats
+        fields = ('year', 'book_count')
+
+
+class LibraryStatsType(graphene.ObjectType):
+    # Read from the summary tables (api/stats.py): one row per group.
+    authors = graphene.List(graphene.NonNull(AuthorStatsType))
+    genres = graphene.List(graphene.NonNull(GenreStatsType))
+    years = graphene.List(graphene.NonNull(YearStatsType))
+
+    @sync_only
+    def resolve_authors(self, info):
+        queryset = AuthorStats.objects.filter(book_count__gt=0).order_by('-book_count', 'author_id')
+        return list(optimize(queryset, info, required=('page_count_total', 'paged_book_count')))
+
+    @sync_only
+    def resolve_genres(self, info):
+        queryset = GenreStats.objects.filter(book_count__gt=0).order_by('-book_count', 'genre_id')
+        return list(optimize(queryset, info))
+
+    @sync_only
+    def resolve_years(self, info):
+        return list(optimize(YearStats.objects.filter(book_count__gt=0).order_by('year'), info))
+
+
+def ordering_enum(name, orderings):
+    # PUBLISHED_DATE for "published_date", PUBLISHED_DATE_DESC for "-published_date".
+    return graphene.Enum(name, [
+        (key.lstrip('-').upper() + ('_DESC' if key.startswith('-') else ''), key) for key in orderings
+    ])
+
+
+AuthorOrder = ordering_enum('AuthorOrder', AUTHOR_ORDERINGS)
+GenreOrder = ordering_enum('GenreOrder', GENRE_ORDERINGS)
+BookOrder = ordering_enum('BookOrder', BOOK_ORDERINGS)
+
+
+def resolve_list(info, queryset, filters, orderings, connection_type, order_by=None, **kwargs):
+    try:
+        queryset = filter_queryset(queryset, filters, kwargs)
+    except ValueError as e:
+        raise GraphQLError(f'Invalid value for `{to_camel_case(str(e))}`.')
+    keys = ordering_keys(orderings, getattr(order_by, 'value', order_by))
+    pagination = {name: kwargs.get(name) for name in ('first', 'last', 'after', 'before')}
+    return resolve_connection(info, queryset, keys, connection_type, **pagination)
+
+
+def resolve_connection(info, queryset, keys, connection_type, **kwargs):
+    queryset = optimize(queryset, info, path=('edges', 'node'), required=[key_name(key) for key in keys])
+    if in_async_context():
+        return aresolve_connection(info, queryset, keys, connection_type, **kwargs)
+    if streamed_field(info, 'edges') is not None:
+        return stream_connection(
+            queryset, keys, connection_type, graphene_setting('STREAM_BATCH_SIZE', 20), get_loaders(info).track,
+            **kwargs,
+        )
+    connection = paginate_connection(queryset, keys, connection_type, **kwargs)
+    get_loaders(info).track(edge.node for edge in connection.edges)
+    return connection
+
+
+async def aresolve_connection(info, queryset, keys, connection_type, **kwargs):
+    connection = await apaginate_connection(queryset, keys, connection_type, **kwargs)
+    get_loaders(info).track(edge.node for edge in connection.edges)
+    return connection
+
+
+@sync_only
+def resolve_search(info, query, first=None, after=None):
+    # Book connection of the best matches for `query`, best first.
+    first, _ = connection_limits(first)
+    try:
+        after = decode_search_cursor(after) if after else None
+    except ValueError as e:
+        raise GraphQLError(str(e))
+
+    hits, has_next_page = search_page(query, first, after)
+    queryset = optimize(Book.objects.all(), info, path=('edges', 'node'))
+    books, cursors = load_hits(queryset, hits)
+    get_loaders(info).track(books)
+    return build_connection(
+        BookConnection, matching_books(query), books, cursors, after is not None, has_next_page,
+    )
+
+
+def resolve_object(info, queryset, id):
+    queryset = optimize(queryset, info)
+    if not queryset.query.where:
+        # Already fetched by this request, e.g. by an earlier operation of
+        # a batch, with the columns this selection needs.
+        obj = get_loaders(info).cached(queryset.model, to_pk(id), loaded_fields(queryset))
+        if obj is not None:
+            return obj
+    if in_async_context():
+        return aresolve_object(info, queryset, id)
+    obj = queryset.get(pk=id)
+    get_loaders(info).track([obj])
+    return obj
+
+
+async def aresolve_object(info, queryset, id):
+    obj = await queryset.aget(pk=id)
+    get_loaders(info).track([obj])
+    return obj
+
 
 
 # Author CRUD
@@ -35,7 +241,11 @@ class CreateAuthorMutation(graphene.Mutation):
     author = graphene.Field(AuthorType)
     message = graphene.String(required=False)
     
+    @serialized_write
     def mutate(self, info, first_name, last_name, date_of_birth=None, date_of_death=None):
+        if in_async_context():
+            return CreateAuthorMutation.amutate(self, info, first_name, last_name, date_of_birth, date_of_death)
+
         author = Author.objects.create(
             first_name=first_name,
             last_name=last_name,
@@ -45,6 +255,17 @@ class CreateAuthorMutation(graphene.Mutation):
 
         return CreateAuthorMutation(author=author, message='Author successfully created.')
 
+    @staticmethod
+    async def amutate(self, info, first_name, last_name, date_of_birth=None, date_of_death=None):
+        author = await Author.objects.acreate(
+            first_name=first_name,
+            last_name=last_name,
+            date_of_birth=date_of_birth,
+            date_of_death=date_of_death
+        )
+
+        return CreateAuthorMutation(author=author, message='Author successfully created.')
+
 
 class DeleteAuthorMutation(graphene.Mutation):
     class Arguments:
@@ -52,7 +273,11 @@ class DeleteAuthorMutation(graphene.Mutation):
     
     message = graphene.String()
     
+    @serialized_write
     def mutate(self, info, id):
+        if in_async_context():
+            return DeleteAuthorMutation.amutate(self, info, id)
+
         try:
             author = Author.objects.get(pk=id)
             author.delete()
@@ -60,6 +285,15 @@ class DeleteAuthorMutation(graphene.Mutation):
         except Author.DoesNotExist:
             return DeleteGenreMutation(message=f"Error: Author with ID {id} does not exist.")
 
+    @staticmethod
+    async def amutate(self, info, id):
+        try:
+            author = await Author.objects.aget(pk=id)
+            await author.adelete()
+            return DeleteGenreMutation(message=f"Successfully deleted author with ID: {id}.")
+        except Author.DoesNotExist:
+            return DeleteGenreMutation(message=f"Error: Author with ID {id} does not exist.")
+
 
 class UpdateAuthorMutation(graphene.Mutation):
     class Arguments:
@@ -72,24 +306,41 @@ class UpdateAuthorMutation(graphene.Mutation):
     author = graphene.Field(AuthorType)
     message = graphene.String(required=False)
 
+    @serialized_write
     def mutate(self, info, id, first_name=None, last_name=None, date_of_birth=None, date_of_death=None):
+        if in_async_context():
+            return UpdateAuthorMutation.amutate(self, info, id, first_name, last_name, date_of_birth, date_of_death)
+
         try:
             author = Author.objects.get(pk=id)
-
-            if first_name:
-                author.first_name = first_name
-            if last_name:
-                author.last_name = last_name
-            if date_of_birth:
-                author.date_of_birth = date_of_birth
-            if date_of_death:
-                author.date_of_death = date_of_death
-
+            UpdateAuthorMutation.apply(author, first_name, last_name, date_of_birth, date_of_death)
             author.save()
         
             return UpdateAuthorMutation(author=author, message=f"Successfully updated author with ID: {id}.")
         except Author.DoesNotExist:
             return UpdateAuthorMutation(message=f"Error: Author with ID {id} does not exist.")
+
+    @staticmethod
+    async def amutate(self, info, id, first_name=None, last_name=None, date_of_birth=None, date_of_death=None):
+        try:
+            author = await Author.objects.aget(pk=id)
+            UpdateAuthorMutation.apply(author, first_name, last_name, date_of_birth, date_of_death)
+            await author.asave()
+
+            return UpdateAuthorMutation(author=author, message=f"Successfully updated author with ID: {id}.")
+        except Author.DoesNotExist:
+            return UpdateAuthorMutation(message=f"Error: Author with ID {id} does not exist.")
+
+    @staticmethod
+    def apply(author, first_name, last_name, date_of_birth, date_of_death):
+        if first_name:
+            author.first_name = first_name
+        if last_name:
+            author.last_name = last_name
+        if date_of_birth:
+            author.date_of_birth = date_of_birth
+        if date_of_death:
+            author.date_of_death = date_of_death
         
         
 
@@ -103,11 +354,21 @@ class CreateGenreMutation(graphene.Mutation):
     genre = graphene.Field(GenreType)
     message = graphene.String(required=False)
     
+    @serialized_write
     def mutate(self, info, name):
+        if in_async_context():
+            return CreateGenreMutation.amutate(self, info, name)
+
         genre = Genre.objects.create(name=name)
         
         return CreateGenreMutation(genre=genre, message='Genre successfully created.')
 
+    @staticmethod
+    async def amutate(self, info, name):
+        genre = await Genre.objects.acreate(name=name)
+
+        return CreateGenreMutation(genre=genre, message='Genre successfully created.')
+
 
 class DeleteGenreMutation(graphene.Mutation):
     class Arguments:
@@ -115,7 +376,11 @@ class DeleteGenreMutation(graphene.Mutation):
 
     message = graphene.String()
     
+    @serialized_write
     def mutate(self, info, id):
+        if in_async_context():
+            return DeleteGenreMutation.amutate(self, info, id)
+
         try:
             genre = Genre.objects.get(pk=id)
             genre.delete()
@@ -123,6 +388,15 @@ class DeleteGenreMutation(graphene.Mutation):
         except Genre.DoesNotExist:
             return DeleteGenreMutation(message=f"Error: Genre with ID {id} does not exist.")
 
+    @staticmethod
+    async def amutate(self, info, id):
+        try:
+            genre = await Genre.objects.aget(pk=id)
+            await genre.adelete()
+            return DeleteGenreMutation(message=f"Successfully deleted genre with ID: {id}.")
+        except Genre.DoesNotExist:
+            return DeleteGenreMutation(message=f"Error: Genre with ID {id} does not exist.")
+
 
 class UpdateGenreMutatuin(graphene.Mutation):
     class Arguments:
@@ -132,7 +406,11 @@ class UpdateGenreMutatuin(graphene.Mutation):
     genre = graphene.Field(GenreType)
     message = graphene.String(required=False)
     
+    @serialized_write
     def mutate(self, info, id, name):
+        if in_async_context():
+            return UpdateGenreMutatuin.amutate(self, info, id, name)
+
         try:
             genre = Genre.objects.get(pk=id)
             genre.name = name
@@ -140,6 +418,16 @@ class UpdateGenreMutatuin(graphene.Mutation):
             return UpdateGenreMutatuin(genre=genre, message=f"Successfully updated genre with ID: {id}.")
         except Genre.DoesNotExist:
             return UpdateGenreMutatuin(message=f"Error: Genre with ID {id} does not exist.")
+
+    @staticmethod
+    async def amutate(self, info, id, name):
+        try:
+            genre = await Genre.objects.aget(pk=id)
+            genre.name = name
+            await genre.asave()
+            return UpdateGenreMutatuin(genre=genre, message=f"Successfully updated genre with ID: {id}.")
+        except Genre.DoesNotExist:
+            return UpdateGenreMutatuin(message=f"Error: Genre with ID {id} does not exist.")
        
 
 
@@ -157,6 +445,8 @@ class CreateBookMutation(graphene.Mutation):
     book = graphene.Field(BookType)
     message = graphene.String(required=False)
     
+    @serialized_write
+    @sync_only
     def mutate(self, info, title, summary, genres_id, published_date=None, page_count=None, author_id=None):
         try:
             book = Book.objects.create(
@@ -192,7 +482,11 @@ class DeleteBookMutation(graphene.Mutation):
 
     message = graphene.String()
     
+    @serialized_write
     def mutate(self, info, id):
+        if in_async_context():
+            return DeleteBookMutation.amutate(self, info, id)
+
         try:
             book = Book.objects.get(pk=id)
             book.delete()
@@ -200,6 +494,15 @@ class DeleteBookMutation(graphene.Mutation):
         except Book.DoesNotExist:
             return DeleteBookMutation(message=f"Error: Book with ID {id} does not exist.")
 
+    @staticmethod
+    async def amutate(self, info, id):
+        try:
+            book = await Book.objects.aget(pk=id)
+            await book.adelete()
+            return DeleteBookMutation(message=f"Successfully deleted book with ID: {id}.")
+        except Book.DoesNotExist:
+            return DeleteBookMutation(message=f"Error: Book with ID {id} does not exist.")
+
 
 class UpdateBookMutatuin(graphene.Mutation):
     class Arguments:
@@ -214,6 +517,8 @@ class UpdateBookMutatuin(graphene.Mutation):
     book = graphene.Field(BookType)
     message = graphene.String(required=False)
     
+    @serialized_write
+    @sync_only
     def mutate(self, info, id, title=None, author_id=None, summary=None, genres_id=None, published_date=None, page_count=None):
         
         try:
@@ -249,35 +554,218 @@ class UpdateBookMutatuin(graphene.Mutation):
         
 
 
+# Bulk Book CRUD
+
+class BookInput(graphene.InputObjectType):
+    title = graphene.String(required=True)
+    author_id = graphene.ID(required=False)
+    summary = graphene.String(required=True)
+    genres_id = graphene.List(of_type=graphene.ID)
+    published_date = graphene.Date(required=False)
+    page_count = graphene.Int(required=False)
+
+
+class BookUpdateInput(graphene.InputObjectType):
+    id = graphene.ID(required=True)
+    title = graphene.String()
+    author_id = graphene.ID(required=False)
+    summary = graphene.String()
+    genres_id = graphene.List(of_type=graphene.ID)
+    published_date = graphene.Date(required=False)
+    page_count = graphene.Int(required=False)
+
+
+class BulkItemError(graphene.ObjectType):
+    index = graphene.Int()
+    message = graphene.String()
+
+
+def book_input_data(item):
+    # The ids stay as sent until they are validated, see book_pks().
+    data = {key: value for key, value in item.items() if key not in ('id', 'genres_id')}
+    if item.get('genres_id') is not None:
+        data['genre_ids'] = item['genres_id']
+    return data
+
+
+def book_pks(data):
+    if data.get('author_id') is not None:
+        data['author_id'] = to_pk(data['author_id'])
+    if 'genre_ids' in data:
+        data['genre_ids'] = [to_pk(id) for id in data['genre_ids']]
+    return data
+
+
+def validate_book_inputs(items):
+    # Validates the whole batch with one query per related model and returns
+    # (index, data) for the valid items plus the errors of the others.
+    if len(items) > graphene_setting('BULK_MUTATION_MAX_SIZE', 1000):
+        raise GraphQLError(
+            f"At most {graphene_setting('BULK_MUTATION_MAX_SIZE', 1000)} books can be written at once."
+        )
+
+    payloads = [book_input_data(item) for item in items]
+    authors = existing_ids(Author, [to_pk(data.get('author_id')) for data in payloads])
+    genres = existing_ids(Genre, [to_pk(id) for data in payloads for id in data.get('genre_ids') or ()])
+
+    valid, errors = [], []
+    for index, data in enumerate(payloads):
+        messages = book_errors(data, authors, genres)
+        if messages:
+            errors += [BulkItemError(index=index, message=message) for message in messages]
+        else:
+            valid.append((index, book_pks(data)))
+    return valid, errors
+
+
+class CreateBooksMutation(graphene.Mutation):
+    class Arguments:
+        books = graphene.List(graphene.NonNull(BookInput), required=True)
+        partial = graphene.Boolean(default_value=False)
+
+    books = graphene.List(BookType)
+    errors = graphene.List(BulkItemError)
+    message = graphene.String(required=False)
+
+    @serialized_write
+    @sync_only
+    def mutate(self, info, books, partial=False):
+        valid, errors = validate_book_inputs(books)
+        if errors and not partial:
+            return CreateBooksMutation(books=[], errors=errors, message='Error: No books were created.')
+
+        created = create_books([data for _, data in valid])
+        get_loaders(info).track(created)
+        return CreateBooksMutation(
+            books=created, errors=errors, message=f'Successfully created {len(created)} books.'
+        )
+
+
+class UpdateBooksMutation(graphene.Mutation):
+    class Arguments:
+        books = graphene.List(graphene.NonNull(BookUpdateInput), required=True)
+        partial = graphene.Boolean(default_value=False)
+
+    books = graphene.List(BookType)
+    errors = graphene.List(BulkItemError)
+    message = graphene.String(required=False)
+
+    @serialized_write
+    @sync_only
+    def mutate(self, info, books, partial=False):
+        valid, errors = validate_book_inputs(books)
+        instances = Book.objects.in_bulk([to_pk(item.id) for item in books if to_pk(item.id) is not None])
+
+        found = []
+        for index, data in valid:
+            book = instances.get(to_pk(books[index].id))
+            if book is None:
+                errors.append(BulkItemError(index=index, message=f"Book with ID {books[index].id} does not exist."))
+            else:
+                found.append((book, data))
+        errors.sort(key=lambda error: error.index)
+
+        if errors and not partial:
+            return UpdateBooksMutation(books=[], errors=errors, message='Error: No books were updated.')
+
+        updated = update_books([book for book, _ in found], [data for _, data in found])
+        get_loaders(info).track(updated)
+        return UpdateBooksMutation(
+            books=updated, errors=errors, message=f'Successfully updated {len(updated)} books.'
+        )
+
+
+class DeleteBooksMutation(graphene.Mutation):
+    class Arguments:
+        ids = graphene.List(graphene.NonNull(graphene.ID), required=True)
+        partial = graphene.Boolean(default_value=False)
+
+    deleted_count = graphene.Int()
+    errors = graphene.List(BulkItemError)
+    message = graphene.String()
+
+    @serialized_write
+    @sync_only
+    def mutate(self, info, ids, partial=False):
+        existing = existing_ids(Book, [to_pk(id) for id in ids])
+        errors = [
+            BulkItemError(index=index, message=f"Book with ID {id} does not exist.")
+            for index, id in enumerate(ids)
+            if to_pk(id) not in existing
+        ]
+        if errors and not partial:
+            return DeleteBooksMutation(deleted_count=0, errors=errors, message='Error: No books were deleted.')
+
+        deleted = delete_books(existing)
+        return DeleteBooksMutation(
+            deleted_count=deleted, errors=errors, message=f'Successfully deleted {deleted} books.'
+        )
+
+
+
 class Query(graphene.ObjectType):
-    authors = graphene.List(AuthorType)
+    authors = graphene.relay.ConnectionField(
+        AuthorConnection,
+        born_after=graphene.Date(),
+        born_before=graphene.Date(),
+        died_after=graphene.Date(),
+        died_before=graphene.Date(),
+        min_books=graphene.Int(),
+        order_by=AuthorOrder(),
+    )
     author = graphene.Field(AuthorType, id=graphene.ID())
     
-    def resolve_authors(self, info):
-        return Author.objects.all()
+    def resolve_authors(self, info, **kwargs):
+        if kwargs.get('min_books') is not None:
+            record_tags(info, STATS_TAG)
+        return resolve_list(info, Author.objects.all(), AUTHOR_FILTERS, AUTHOR_ORDERINGS, AuthorConnection, **kwargs)
     
     def resolve_author(self, info, id):
-        return Author.objects.get(pk=id)
+        return resolve_object(info, Author.objects.all(), id)
     
     
-    genres = graphene.List(GenreType)
+    genres = graphene.relay.ConnectionField(GenreConnection, order_by=GenreOrder())
     genre = graphene.Field(GenreType, id=graphene.ID())
     
-    def resolve_genres(self, info):
-        return Genre.objects.all()
+    def resolve_genres(self, info, **kwargs):
+        return resolve_list(info, Genre.objects.all(), GENRE_FILTERS, GENRE_ORDERINGS, GenreConnection, **kwargs)
     
     def resolve_genre(self, info, id):
-        return Genre.objects.get(pk=id)
+        return resolve_object(info, Genre.objects.all(), id)
     
     
-    books = graphene.List(BookType)
+    books = graphene.relay.ConnectionField(
+        BookConnection,
+        published_after=graphene.Date(),
+        published_before=graphene.Date(),
+        author_id=graphene.ID(),
+        genre_id=graphene.ID(),
+        min_pages=graphene.Int(),
+        max_pages=graphene.Int(),
+        order_by=BookOrder(),
+    )
     book = graphene.Field(BookType, id=graphene.ID())
     
-    def resolve_books(self, info):
-        return Book.objects.all()
+    def resolve_books(self, info, **kwargs):
+        return resolve_list(info, Book.objects.all(), BOOK_FILTERS, BOOK_ORDERINGS, BookConnection, **kwargs)
     
     def resolve_book(self, info, id):
-        return Book.objects.get(pk=id)
+        return resolve_object(info, Book.objects.all(), id)
+
+
+    library_stats = graphene.Field(LibraryStatsType)
+
+    def resolve_library_stats(self, info):
+        record_tags(info, STATS_TAG)
+        return LibraryStatsType()
+
+
+    search_books = graphene.Field(
+        BookConnection, query=graphene.String(required=True), first=graphene.Int(), after=graphene.String()
+    )
+
+    def resolve_search_books(self, info, query, first=None, after=None):
+        return resolve_search(info, query, first, after)
     
     
     
@@ -293,5 +781,11 @@ class Mutation(graphene.ObjectType):
     create_book = CreateBookMutation.Field()
     delete_book = DeleteBookMutation.Field()
     update_book = UpdateBookMutatuin.Field()
+
+    create_books = CreateBooksMutation.Field()
+    update_books = UpdateBooksMutation.Field()
+    delete_books = DeleteBooksMutation.Field()
     
-schema = graphene.Schema(query=Query, mutation=Mutation)
\ No newline at end of file
+schema = graphene.Schema(
+    query=Query, mutation=Mutation, directives=[*specified_directives, DeferDirective, StreamDirective],
+)
\ No newline at end of file
@@ -0,0 +1,168 @@
+import base64
+import json
+import re
+
+from django.db import connection, connections, router
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.expressions import RawSQL
+from rest_framework.exceptions import ValidationError
+
+from .models import Book
+from .pagination import KeysetPagination, seek
+
+
+# Full-text search over Book.title and Book.summary. On SQLite they are
+# indexed by an FTS5 table (rowid = book id) with api_book as its external
+# content, which triggers on api_book keep in sync (migration 0002), and hits
+# are ranked with bm25. Other backends fall back to icontains filters ranking
+# title hits first.
+
+SEARCH_TABLE = 'api_book_search'
+# bm25 column weights: a term in the title counts ten times one in the summary.
+TITLE_WEIGHT = 10.0
+SUMMARY_WEIGHT = 1.0
+
+TERM_RE = re.compile(r'\w+')
+
+
+def fts_enabled():
+    return connection.vendor == 'sqlite'
+
+
+def search_terms(query):
+    return TERM_RE.findall(query or '')
+
+
+def match_expression(terms):
+    # Each term is quoted so user input can't use the FTS5 query syntax; the
+    # terms are ANDed.
+    return ' '.join('"%s"' % term for term in terms)
+
+
+def search_page(query, first, after=None):
+    # The `first` best matches after the `after` position, as a list of
+    # (rank, book id) pairs with lower ranks first, plus whether more follow.
+    terms = search_terms(query)
+    if not terms or first <= 0:
+        return [], False
+
+    if fts_enabled():
+        hits = _fts_page(terms, first + 1, after)
+    else:
+        hits = _fallback_page(terms, first + 1, after)
+    return hits[:first], len(hits) > first
+
+
+def matching_books(query):
+    # All matching books, unranked, e.g. for counting them.
+    terms = search_terms(query)
+    if not terms:
+        return Book.objects.none()
+    if fts_enabled():
+        return Book.objects.filter(pk__in=RawSQL(
+            f'SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s', [match_expression(terms)]
+        ))
+    return Book.objects.filter(_fallback_filter(terms))
+
+
+def _fts_page(terms, limit, after):
+    sql = (
+        f'SELECT rank, rowid FROM ('
+        f'SELECT rowid, bm25({SEARCH_TABLE}, %s, %s) AS rank FROM {SEARCH_TABLE} '
+        f'WHERE {SEARCH_TABLE} MATCH %s)'
+    )
+    params = [TITLE_WEIGHT, SUMMARY_WEIGHT, match_expression(terms)]
+    if after is not None:
+        sql += ' WHERE (rank, rowid) > (%s, %s)'
+        params += list(after)
+    sql += ' ORDER BY rank, rowid LIMIT %s'
+    params.append(limit)
+
+    with connections[router.db_for_read(Book)].cursor() as cursor:
+        cursor.execute(sql, params)
+        return [tuple(row) for row in cursor.fetchall()]
+
+
+def _fallback_filter(terms):
+    condition = Q()
+    for term in terms:
+        condition &= Q(title__icontains=term) | Q(summary__icontains=term)
+    return condition
+
+
+def _fallback_page(terms, limit, after):
+    title_hit = Q()
+    for term in terms:
+        title_hit &= Q(title__icontains=term)
+
+    queryset = Book.objects.filter(_fallback_filter(terms)).annotate(
+        search_rank=Case(When(title_hit, then=Value(0)), default=Value(1), output_field=IntegerField())
+    )
+    if after is not None:
+        queryset = queryset.filter(seek(('search_rank', 'id'), after))
+    return list(queryset.order_by('search_rank', 'id').values_list('search_rank', 'id')[:limit])
+
+
+def encode_search_cursor(hit):
+    # bm25 ranks are stored as hex floats, so the next page starts at exactly
+    # the rank the last hit had.
+    rank, pk = hit
+    if isinstance(rank, float):
+        rank = rank.hex()
+    return base64.urlsafe_b64encode(json.dumps([rank, pk]).encode()).decode()
+
+
+def decode_search_cursor(cursor):
+    try:
+        rank, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if isinstance(rank, str):
+            rank = float.fromhex(rank)
+        if isinstance(rank, bool) or not isinstance(rank, (int, float)) or not isinstance(pk, int):
+            raise ValueError(cursor)
+    except (TypeError, ValueError):
+        raise ValueError(f'Invalid cursor: {cursor}')
+    return rank, pk
+
+
+def load_hits(queryset, hits):
+    # The books of `hits` in rank order, as instances or, for a values()
+    # queryset, dicts, and their cursors.
+    books = {
+        book['id'] if isinstance(book, dict) else book.pk: book
+        for book in queryset.filter(pk__in=[pk for _, pk in hits])
+    }
+    found = [hit for hit in hits if hit[1] in books]
+    return [books[pk] for _, pk in found], [encode_search_cursor(hit) for hit in found]
+
+
+class BookSearchPagination(KeysetPagination):
+    # Pages of `?q=` search results, best match first. Search pages only
+    # link forward.
+    search_query_param = 'q'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        query = request.query_params.get(self.search_query_param, '')
+        after = request.query_params.get(self.after_query_param)
+        try:
+            after = decode_search_cursor(after) if after else None
+        except ValueError:
+            raise ValidationError({self.after_query_param: 'Invalid cursor.'})
+
+        hits, self.has_next = search_page(query, self.get_page_size(request), after)
+        rows, cursors = load_hits(queryset, hits)
+        self.has_previous = False
+        self.start_cursor = None
+        self.end_cursor = cursors[-1] if cursors else None
+        return rows
+
+
+def rebuild_index():
+    # Returns the number of books indexed.
+    if not fts_enabled():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('rebuild')")
+        cursor.execute(f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('optimize')")
+        cursor.execute(f'SELECT COUNT(*) FROM {Book._meta.db_table}')
+        return cursor.fetchone()[0]
@@ -51,9 +51,13 @@ class UserLoginSerializer(serializers.Serializer):
 
 
 class AuthorSerializer(serializers.ModelSerializer):
+    # Annotated by Author.objects.with_age()/with_book_count() on lists.
+    age = serializers.IntegerField(read_only=True)
+    book_count = serializers.IntegerField(read_only=True)
+
     class Meta:
         model = Author
-        fields = ['id', 'first_name', 'last_name', 'date_of_birth', 'date_of_death']
+        fields = ['id', 'first_name', 'last_name', 'date_of_birth', 'date_of_death', 'age', 'book_count']
     
     def validate_first_name(self, value):
         if not value:
@@ -89,8 +93,16 @@ class GenreSerializer(serializers.ModelSerializer):
 
 
 
+class BookAuthorSerializer(AuthorSerializer):
+    # Nested authors leave out the derived fields, which would cost a
+    # book count lookup per listed book.
+    class Meta(AuthorSerializer.Meta):
+        fields = ['id', 'first_name', 'last_name', 'date_of_birth', 'date_of_death']
+
+
+
 class BookSerializer(serializers.ModelSerializer):
-    author = AuthorSerializer()
+    author = BookAuthorSerializer()
     genre = GenreSerializer(many=True)
     
     class Meta:
@@ -114,6 +126,12 @@ class BookSerializer(serializers.ModelSerializer):
             raise ValidationError("Page count must be a positive integer.")
         return value
 
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # Genres in id order, like the records of api/records.py.
+        data['genre'] = sorted(data['genre'], key=lambda genre: genre['id'])
+        return data
+
     def create(self, validated_data):
         author_data = validated_data.pop('author', None)
         genre_data = validated_data.pop('genre', None)
@@ -152,3 +170,28 @@ class BookSerializer(serializers.ModelSerializer):
 
         instance.save()
         return instance
+
+
+
+class AuthorStatsSerializer(serializers.ModelSerializer):
+    first_name = serializers.CharField(source='author.first_name')
+    last_name = serializers.CharField(source='author.last_name')
+    average_page_count = serializers.FloatField()
+
+    class Meta:
+        model = AuthorStats
+        fields = ['author', 'first_name', 'last_name', 'book_count', 'average_page_count']
+
+
+class GenreStatsSerializer(serializers.ModelSerializer):
+    name = serializers.CharField(source='genre.name')
+
+    class Meta:
+        model = GenreStats
+        fields = ['genre', 'name', 'book_count']
+
+
+class YearStatsSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = YearStats
+        fields = ['year', 'book_count']
@@ -0,0 +1,143 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .cache import invalidate, object_tag, pk_tag, table_tag
+from .changes import record_changes
+from .models import Author, Change, Genre, Book
+from .stats import BOOK_STATS_FIELDS, StatsDelta, book_stats_values, stored_book_stats_values
+
+
+@receiver(post_save, sender=Author)
+@receiver(post_save, sender=Genre)
+@receiver(post_save, sender=Book)
+@receiver(post_delete, sender=Author)
+@receiver(post_delete, sender=Genre)
+@receiver(post_delete, sender=Book)
+def invalidate_instance(sender, instance, **kwargs):
+    tags = [object_tag(instance), table_tag(sender)]
+    # The author's book_set changes as well; a previous author is covered by
+    # the book's own tag, which every result listing it has recorded.
+    if isinstance(instance, Book) and instance.author_id is not None:
+        tags.append(pk_tag(Author, instance.author_id))
+    # After commit, so nothing reading in between caches the old rows under
+    # the new versions.
+    transaction.on_commit(lambda: invalidate(*tags))
+
+
+@receiver(m2m_changed, sender=Book.genre.through)
+def invalidate_book_genres(sender, instance, action, model, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+
+    # The links are part of the book list, e.g. its REST ETag.
+    tags = [object_tag(instance), table_tag(Book)]
+    if action == 'pre_clear':
+        related = getattr(instance, 'genre' if isinstance(instance, Book) else 'book_set')
+        pk_set = related.values_list('pk', flat=True)
+    tags += [pk_tag(model, pk) for pk in pk_set or ()]
+    transaction.on_commit(lambda: invalidate(*tags))
+
+
+# Summary tables (api/stats.py). The stored values of a book are read before
+# it is saved so its old contribution can be subtracted; a deleted book
+# counts with the values it was loaded with.
+
+def _touches_stats(update_fields):
+    return update_fields is None or not set(update_fields).isdisjoint(BOOK_STATS_FIELDS)
+
+
+@receiver(pre_save, sender=Book)
+def remember_book_stats(sender, instance, update_fields=None, **kwargs):
+    if instance._state.adding or not _touches_stats(update_fields):
+        instance._stats_previous = None
+    else:
+        instance._stats_previous = stored_book_stats_values(instance.pk)
+
+
+@receiver(post_save, sender=Book)
+def update_book_stats(sender, instance, update_fields=None, **kwargs):
+    if not _touches_stats(update_fields):
+        return
+    delta = StatsDelta()
+    previous = instance.__dict__.pop('_stats_previous', None)
+    if previous is not None:
+        delta.add_book(previous, -1)
+    delta.add_book(book_stats_values(instance))
+    delta.apply()
+
+
+@receiver(pre_delete, sender=Book)
+def remember_deleted_book_stats(sender, instance, **kwargs):
+    instance._stats_genres = list(
+        Book.genre.through.objects.filter(book_id=instance.pk).values_list('genre_id', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Book)
+def update_deleted_book_stats(sender, instance, **kwargs):
+    delta = StatsDelta()
+    delta.add_book(book_stats_values(instance), -1)
+    delta.add_genres(instance.__dict__.pop('_stats_genres', ()), -1)
+    delta.apply()
+
+
+@receiver(m2m_changed, sender=Book.genre.through)
+def update_genre_stats(sender, instance, action, reverse, pk_set, **kwargs):
+    # With reverse=True the instance is a genre and pk_set holds book ids.
+    own, other = ('genre_id', 'book_id') if reverse else ('book_id', 'genre_id')
+
+    if action in ('pre_remove', 'pre_clear'):
+        # pk_set of a remove may name genres the book doesn't have.
+        links = sender.objects.filter(**{own: instance.pk})
+        if action == 'pre_remove':
+            links = links.filter(**{f'{other}__in': pk_set})
+        instance._stats_removed_genres = list(links.values_list('genre_id', flat=True))
+        return
+
+    delta = StatsDelta()
+    if action == 'post_add':
+        delta.add_genres([instance.pk] * len(pk_set) if reverse else pk_set)
+    elif action in ('post_remove', 'post_clear'):
+        delta.add_genres(instance.__dict__.pop('_stats_removed_genres', ()), -1)
+    delta.apply()
+
+
+# Change feed (api/changes.py), written in the transaction of the change.
+
+@receiver(post_save, sender=Author)
+@receiver(post_save, sender=Genre)
+@receiver(post_save, sender=Book)
+def log_saved(sender, instance, created, **kwargs):
+    record_changes(sender, [instance.pk], Change.CREATED if created else Change.UPDATED)
+
+
+@receiver(post_delete, sender=Author)
+@receiver(post_delete, sender=Genre)
+@receiver(post_delete, sender=Book)
+def log_deleted(sender, instance, **kwargs):
+    record_changes(sender, [instance.pk], Change.DELETED)
+
+
+@receiver(pre_delete, sender=Author)
+@receiver(pre_delete, sender=Genre)
+def log_unlinked_books(sender, instance, **kwargs):
+    # Deleting an author sets its books' author to NULL and deleting a genre
+    # removes it from its books, without saving the books.
+    record_changes(Book, instance.book_set.values_list('pk', flat=True), Change.UPDATED)
+
+
+@receiver(m2m_changed, sender=Book.genre.through)
+def log_book_genres(sender, instance, action, reverse, pk_set, **kwargs):
+    # With reverse=True the instance is a genre and pk_set holds book ids.
+    if action == 'pre_clear' and reverse:
+        instance._changes_cleared_books = list(instance.book_set.values_list('pk', flat=True))
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        books = [instance.pk] if pk_set or action == 'post_clear' else []
+    elif action == 'post_clear':
+        books = instance.__dict__.pop('_changes_cleared_books', ())
+    else:
+        books = pk_set
+    record_changes(Book, books, Change.UPDATED)
@@ -0,0 +1,17 @@
+'use strict';
+{
+    // Applies an autocomplete list filter (see api/admin.py) as soon as a
+    // value is picked or cleared.
+    window.addEventListener('load', function() {
+        django.jQuery('.autocomplete-filter select').on('change', function() {
+            const params = new URLSearchParams(window.location.search);
+            params.delete('p');
+            if (this.value) {
+                params.set(this.name, this.value);
+            } else {
+                params.delete(this.name);
+            }
+            window.location.search = params.toString();
+        });
+    });
+}
@@ -0,0 +1,103 @@
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Coalesce, ExtractYear
+
+from .cache import invalidate
+from .models import AuthorStats, Book, GenreStats, YearStats
+
+
+# Incremental maintenance of the summary tables. Every change to a book is
+# turned into +1/-1 deltas for the rows it counts towards (its author, its
+# publication year and its genres), which are applied as
+# UPDATE ... SET n = n + delta, so no write aggregates over the books.
+
+# Response cache tag of every result that read the summary tables.
+STATS_TAG = 'api.stats'
+
+BOOK_STATS_FIELDS = ('author_id', 'page_count', 'published_date')
+
+
+class StatsDelta:
+    def __init__(self):
+        self._rows = defaultdict(lambda: defaultdict(int))
+
+    def add_book(self, values, sign=1):
+        # `values` holds BOOK_STATS_FIELDS, e.g. from book_stats_values().
+        if values['author_id'] is not None:
+            page_count = values['page_count']
+            self.add(
+                AuthorStats, values['author_id'],
+                book_count=sign,
+                page_count_total=sign * (page_count or 0),
+                paged_book_count=sign * (page_count is not None),
+            )
+        if values['published_date'] is not None:
+            self.add(YearStats, values['published_date'].year, book_count=sign)
+
+    def add_genres(self, genre_ids, sign=1):
+        for genre_id in genre_ids:
+            self.add(GenreStats, genre_id, book_count=sign)
+
+    def add(self, model, pk, **deltas):
+        row = self._rows[model, pk]
+        for name, delta in deltas.items():
+            row[name] += delta
+
+    def apply(self):
+        changed = False
+        for (model, pk), deltas in self._rows.items():
+            deltas = {name: delta for name, delta in deltas.items() if delta}
+            if deltas:
+                _add(model, pk, deltas)
+                changed = True
+        self._rows.clear()
+        if changed:
+            transaction.on_commit(lambda: invalidate(STATS_TAG))
+
+
+def _add(model, pk, deltas):
+    update = {name: F(name) + delta for name, delta in deltas.items()}
+    if model.objects.filter(pk=pk).update(**update):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(pk=pk, **deltas)
+    except IntegrityError:
+        # Created concurrently since the UPDATE above.
+        model.objects.filter(pk=pk).update(**update)
+
+
+def book_stats_values(book):
+    return {field: getattr(book, field) for field in BOOK_STATS_FIELDS}
+
+
+def stored_book_stats_values(pk):
+    return Book.objects.filter(pk=pk).values(*BOOK_STATS_FIELDS).first()
+
+
+def rebuild_stats():
+    # Recomputes every summary table with GROUP BY queries.
+    with transaction.atomic():
+        AuthorStats.objects.all().delete()
+        GenreStats.objects.all().delete()
+        YearStats.objects.all().delete()
+
+        AuthorStats.objects.bulk_create([
+            AuthorStats(author_id=row['author_id'], book_count=row['books'],
+                        page_count_total=row['pages'], paged_book_count=row['paged'])
+            for row in Book.objects.filter(author__isnull=False).order_by().values('author_id').annotate(
+                books=Count('pk'), pages=Coalesce(Sum('page_count'), 0), paged=Count('page_count'),
+            )
+        ])
+        GenreStats.objects.bulk_create([
+            GenreStats(genre_id=row['genre_id'], book_count=row['books'])
+            for row in Book.genre.through.objects.order_by().values('genre_id').annotate(books=Count('book_id'))
+        ])
+        YearStats.objects.bulk_create([
+            YearStats(year=row['year'], book_count=row['books'])
+            for row in Book.objects.filter(published_date__isnull=False).order_by()
+            .annotate(year=ExtractYear('published_date')).values('year').annotate(books=Count('pk'))
+        ])
+        transaction.on_commit(lambda: invalidate(STATS_TAG))
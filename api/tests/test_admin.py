@@ -0,0 +1,78 @@
+from datetime import date
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from api.admin import EstimatedCountPaginator
+from api.models import Author, Book, Genre
+
+
+class ChangelistTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'admin'))
+        self.genres = [Genre.objects.create(name='Fiction'), Genre.objects.create(name='Poetry')]
+        self.authors = []
+
+    def add_books(self, count):
+        for _ in range(count):
+            index = len(self.authors)
+            author = Author.objects.create(first_name=f'First {index}', last_name=f'Last {index}')
+            self.authors.append(author)
+            book = Book.objects.create(
+                title=f'Book {index}', summary='-', author=author, published_date=date(2000 + index, 1, 1),
+            )
+            book.genre.set([self.genres[index % 2]])
+
+    def changelist(self, path, query=''):
+        response = self.client.get(f'/admin/api/{path}/{query}')
+        self.assertEqual(response.status_code, 200)
+        return response.context['cl']
+
+    def test_estimated_count_above_the_limit(self):
+        self.add_books(5)
+        # Deleted rows still count towards the estimate.
+        Book.objects.filter(pk=self.authors[0].book_set.get().pk).delete()
+
+        with mock.patch.object(EstimatedCountPaginator, 'exact_count_limit', 3):
+            with CaptureQueriesContext(connection) as queries:
+                cl = self.changelist('book')
+            self.assertEqual(cl.paginator.count, 5)
+            self.assertFalse(any('COUNT(*)' in query['sql'] for query in queries))
+
+            # Filtered lists are counted.
+            cl = self.changelist('book', f'?author={self.authors[1].pk}')
+            self.assertEqual(cl.paginator.count, 1)
+
+    def test_exact_count_below_the_limit(self):
+        self.add_books(5)
+        Book.objects.filter(pk=self.authors[0].book_set.get().pk).delete()
+        self.assertEqual(self.changelist('book').paginator.count, 4)
+
+    def test_autocomplete_filters(self):
+        self.add_books(4)
+        cl = self.changelist('book', f'?author={self.authors[2].pk}')
+        self.assertEqual([book.title for book in cl.result_list], ['Book 2'])
+        self.assertContains(self.client.get(f'/admin/api/book/?author={self.authors[2].pk}'), 'autocomplete_filter.js')
+
+        cl = self.changelist('book', f'?genre={self.genres[1].pk}')
+        self.assertEqual([book.title for book in cl.result_list], ['Book 1', 'Book 3'])
+
+        cl = self.changelist('book', f'?author={self.authors[0].pk}&genre={self.genres[1].pk}')
+        self.assertEqual(list(cl.result_list), [])
+
+    def test_invalid_filter_value(self):
+        response = self.client.get('/admin/api/book/?author=abc')
+        self.assertRedirects(response, '/admin/api/book/?e=1', fetch_redirect_response=False)
+
+    def test_query_count_does_not_grow_with_the_table(self):
+        counts = []
+        for total in (3, 30):
+            self.add_books(total - len(self.authors))
+            for path in ('book', 'author'):
+                with CaptureQueriesContext(connection) as queries:
+                    self.changelist(path)
+                counts.append((path, len(queries)))
+        self.assertEqual(counts[:2], counts[2:])
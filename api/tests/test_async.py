@@ -0,0 +1,67 @@
+import json
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.test import AsyncClient, override_settings
+from django.urls import path
+
+from api import schema as library_schema
+from api.graphql_views import AsyncLibraryGraphQLView
+from api.models import Author, Book
+
+from .utils import LibraryTestCase, create_library
+
+
+urlpatterns = [
+    path('api/graphql', AsyncLibraryGraphQLView.as_view(schema=library_schema.schema)),
+]
+
+QUERY = '''{
+  books(first: 10) { totalCount edges { node { title author { lastName bookCount } genre { name } } } }
+  author(id: 1) { firstName bookSet { title } }
+  libraryStats { genres { genre { name } bookCount } }
+}'''
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncViewTests(LibraryTestCase):
+    def setUp(self):
+        super().setUp()
+        create_library(authors=2, books_per_author=2, genres=2)
+
+    async def post(self, query, variables=None):
+        response = await AsyncClient().post(
+            '/api/graphql', json.dumps({'query': query, 'variables': variables}), content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        result = json.loads(response.content)
+        self.assertNotIn('errors', result)
+        return result['data']
+
+    async def test_query_matches_the_sync_view(self):
+        aresolve_connection = library_schema.aresolve_connection
+        with mock.patch.object(library_schema, 'aresolve_connection', wraps=aresolve_connection) as aresolve:
+            data = await self.post(QUERY)
+        # Resolved with the async ORM in the event loop.
+        aresolve.assert_called_once()
+
+        await sync_to_async(cache.clear)()
+        with override_settings(ROOT_URLCONF='graphlibql.urls'):
+            expected = await sync_to_async(self.query_data)(QUERY)
+        self.assertEqual(data, expected)
+        self.assertEqual(data['books']['totalCount'], 4)
+        self.assertEqual(data['libraryStats']['genres'][0]['bookCount'], 4)
+
+    async def test_mutations(self):
+        data = await self.post('mutation { createAuthor(firstName: "New", lastName: "Author") { author { id } } }')
+        author_id = data['createAuthor']['author']['id']
+        self.assertTrue(await Author.objects.filter(pk=author_id, first_name='New').aexists())
+
+        # sync_only: runs in Django's sync thread.
+        data = await self.post(
+            'mutation ($books: [BookInput!]!) { createBooks(books: $books) { books { title author { firstName } } } }',
+            {'books': [{'title': 'Async', 'summary': '-', 'authorId': author_id}]},
+        )
+        self.assertEqual(data['createBooks']['books'], [{'title': 'Async', 'author': {'firstName': 'New'}}])
+        self.assertEqual(await Book.objects.filter(author_id=author_id).acount(), 1)
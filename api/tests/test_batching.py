@@ -0,0 +1,108 @@
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test import AsyncClient, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import path
+
+from api import schema as library_schema
+from api.graphql_views import AsyncLibraryGraphQLView
+from api.models import Author
+
+from .utils import LibraryTestCase, create_library
+
+
+urlpatterns = [
+    path('api/graphql', AsyncLibraryGraphQLView.as_view(schema=library_schema.schema)),
+]
+
+BOOKS = '{ books(first: 10) { edges { node { title author { id firstName } } } } }'
+AUTHOR = 'query ($id: ID) { author(id: $id) { firstName } }'
+RENAME = 'mutation ($id: ID!) { updateAuthor(id: $id, firstName: "Renamed") { author { firstName } } }'
+TWO_OPERATIONS = 'query A { books(first: 1) { totalCount } } query B { authors(first: 1) { totalCount } }'
+MISSING_OPERATION = 'Must provide operation name if query contains multiple operations.'
+
+
+class BatchTestCase(LibraryTestCase):
+    def setUp(self):
+        super().setUp()
+        create_library()
+        self.author = Author.objects.get(first_name='First 0')
+
+    def batch(self, operations):
+        return self.client.post(self.GRAPHQL_URL, json.dumps(operations), content_type='application/json')
+
+
+class BatchTests(BatchTestCase):
+    def test_results_in_order(self):
+        response = self.batch([
+            {'id': 'a', 'query': BOOKS},
+            {'id': 'b', 'query': AUTHOR, 'variables': {'id': self.author.pk}},
+        ])
+        self.assertEqual(response.status_code, 200)
+        first, second = response.json()
+        self.assertEqual((first['id'], first['status']), ('a', 200))
+        self.assertEqual(len(first['data']['books']['edges']), 6)
+        self.assertEqual((second['id'], second['data']), ('b', {'author': {'firstName': 'First 0'}}))
+
+    def test_size_limit(self):
+        limit = settings.GRAPHENE['BATCH_MAX_SIZE']
+        self.assertEqual(self.batch([{'query': '{ __typename }'}] * limit).status_code, 200)
+
+        response = self.batch([{'query': '{ __typename }'}] * (limit + 1))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['errors'][0]['message'], f'Batches are limited to {limit} operations.')
+
+        with override_settings(GRAPHENE={**settings.GRAPHENE, 'BATCH_MAX_SIZE': 1}):
+            self.assertEqual(self.batch([{'query': '{ __typename }'}] * 2).status_code, 400)
+
+        self.assertEqual(self.batch([{'query': '{ __typename }'}, 'query']).status_code, 400)
+
+    def test_operations_share_loaders(self):
+        with CaptureQueriesContext(connection) as alone:
+            self.query_data(BOOKS)
+        cache.clear()
+
+        # The author was loaded by the first operation already.
+        with self.assertNumQueries(len(alone)):
+            response = self.batch([{'query': BOOKS}, {'query': AUTHOR, 'variables': {'id': self.author.pk}}])
+        self.assertEqual(response.json()[1]['data'], {'author': {'firstName': 'First 0'}})
+
+    def test_mutation_resets_loaders(self):
+        response = self.batch([
+            {'query': BOOKS},
+            {'query': RENAME, 'variables': {'id': self.author.pk}},
+            {'query': AUTHOR, 'variables': {'id': self.author.pk}},
+        ])
+        results = response.json()
+        self.assertEqual(results[1]['data']['updateAuthor']['author']['firstName'], 'Renamed')
+        self.assertEqual(results[2]['data'], {'author': {'firstName': 'Renamed'}})
+
+    def test_missing_operation_name(self):
+        response = self.query(TWO_OPERATIONS)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['errors'][0]['message'], MISSING_OPERATION)
+
+        response = self.query(TWO_OPERATIONS, operation_name='C')
+        self.assertEqual(response.json()['errors'][0]['message'], "Unknown operation named 'C'.")
+
+        response = self.batch([{'query': TWO_OPERATIONS}, {'query': TWO_OPERATIONS, 'operationName': 'B'}])
+        self.assertEqual(response.status_code, 400)
+        first, second = response.json()
+        self.assertEqual((first['status'], first['errors'][0]['message']), (400, MISSING_OPERATION))
+        self.assertEqual(second['data'], {'authors': {'totalCount': 3}})
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncBatchTests(BatchTestCase):
+    async def test_missing_operation_name(self):
+        client = AsyncClient()
+        response = await client.post(self.GRAPHQL_URL, {'query': TWO_OPERATIONS}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['errors'][0]['message'], MISSING_OPERATION)
+
+        # Batches are handed to the sync view.
+        response = await client.post(self.GRAPHQL_URL, [{'query': TWO_OPERATIONS}], content_type='application/json')
+        self.assertEqual(response.json()[0]['errors'][0]['message'], MISSING_OPERATION)
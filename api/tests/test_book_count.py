@@ -0,0 +1,48 @@
+from django.test import TestCase
+
+from api.tests.utils import LibraryTestCase
+
+from api.bulk import create_books
+from api.models import Author, Book
+
+
+class BookCountTests(TestCase):
+    def counts(self, author):
+        annotated = Author.objects.with_book_count().get(pk=author.pk).book_count
+        single = Author.objects.get(pk=author.pk).book_count
+        return annotated, single
+
+    def test_instance_and_list_agree_after_writes(self):
+        author = Author.objects.create(first_name='First', last_name='Last')
+        other = Author.objects.create(first_name='Other', last_name='Author')
+        self.assertEqual(self.counts(author), (0, 0))
+
+        book = Book.objects.create(title='One', summary='-', author=author)
+        create_books([{'title': 'Two', 'summary': '-', 'author_id': author.pk, 'genre_ids': []}])
+        self.assertEqual(self.counts(author), (2, 2))
+
+        book.author = other
+        book.save()
+        self.assertEqual(self.counts(author), (1, 1))
+        self.assertEqual(self.counts(other), (1, 1))
+
+        book.delete()
+        self.assertEqual(self.counts(other), (0, 0))
+
+
+
+class BookCountApiTests(LibraryTestCase):
+    def test_lists_and_single_authors_agree(self):
+        author = Author.objects.create(first_name='First', last_name='Last')
+        Book.objects.create(title='One', summary='-', author=author)
+        Book.objects.create(title='Two', summary='-', author=author)
+
+        data = self.query_data(
+            '{ authors(first: 1) { edges { node { bookCount } } } author(id: %d) { bookCount } }' % author.pk
+        )
+        self.assertEqual(data['authors']['edges'][0]['node']['bookCount'], 2)
+        self.assertEqual(data['author']['bookCount'], 2)
+
+        rest = [self.client.get(url).json() for url in ('/api/authors/', f'/api/authors/{author.pk}/')]
+        self.assertEqual(rest[0]['results'][0]['book_count'], 2)
+        self.assertEqual(rest[1]['book_count'], 2)
@@ -0,0 +1,120 @@
+from api.models import Book, Genre
+
+from .utils import LibraryTestCase, create_library
+
+
+CREATE = '''
+    mutation ($books: [BookInput!]!, $partial: Boolean) {
+      createBooks(books: $books, partial: $partial) {
+        books { title author { lastName } genre { name } }
+        errors { index message }
+        message
+      }
+    }
+'''
+
+UPDATE = '''
+    mutation ($books: [BookUpdateInput!]!, $partial: Boolean) {
+      updateBooks(books: $books, partial: $partial) { books { id title pageCount } errors { index message } }
+    }
+'''
+
+DELETE = '''
+    mutation ($ids: [ID!]!, $partial: Boolean) {
+      deleteBooks(ids: $ids, partial: $partial) { deletedCount errors { index message } }
+    }
+'''
+
+
+class BulkMutationTests(LibraryTestCase):
+    def setUp(self):
+        super().setUp()
+        self.books = create_library(authors=2, books_per_author=2, genres=2)
+        self.author_id = self.books[0].author_id
+        self.genre_ids = list(Genre.objects.values_list('pk', flat=True))
+
+    def book(self, index, **fields):
+        return {
+            'title': f'New {index}', 'summary': 'A summary.', 'authorId': self.author_id,
+            'genresId': self.genre_ids, 'pageCount': 10, **fields,
+        }
+
+    def test_create_runs_a_fixed_number_of_queries(self):
+        # Validation, the inserts, stats, change feed and the returned
+        # relations take the same queries for any batch size.
+        for size in (2, 20):
+            with self.assertNumQueries(12):
+                result = self.query_data(CREATE, variables={'books': [self.book(i) for i in range(size)]})
+            created = result['createBooks']['books']
+            self.assertEqual(len(created), size)
+            self.assertEqual(created[0]['author']['lastName'], 'Last 0')
+            self.assertEqual(len(created[0]['genre']), 2)
+        self.assertEqual(Book.objects.count(), 26)
+
+    def test_invalid_items_reject_the_whole_batch(self):
+        books = [self.book(0), self.book(1, title='', pageCount=0), self.book(2, authorId=999, genresId=[998])]
+        result = self.query_data(CREATE, variables={'books': books})['createBooks']
+        self.assertEqual(result['books'], [])
+        self.assertEqual(result['errors'], [
+            {'index': 1, 'message': 'Title cannot be empty.'},
+            {'index': 1, 'message': 'Page count must be a positive integer.'},
+            {'index': 2, 'message': 'Author with ID 999 does not exist.'},
+            {'index': 2, 'message': 'Genre with ID 998 does not exist.'},
+        ])
+        self.assertEqual(result['message'], 'Error: No books were created.')
+        self.assertEqual(Book.objects.count(), 4)
+
+    def test_partial_writes_the_valid_items(self):
+        books = [self.book(0), self.book(1, summary=''), self.book(2)]
+        result = self.query_data(CREATE, variables={'books': books, 'partial': True})['createBooks']
+        self.assertEqual([book['title'] for book in result['books']], ['New 0', 'New 2'])
+        self.assertEqual(result['errors'], [{'index': 1, 'message': 'Summary cannot be empty.'}])
+        self.assertEqual(Book.objects.filter(title__startswith='New').count(), 2)
+
+    def test_update(self):
+        first, second = self.books[:2]
+        items = [{'id': first.pk, 'title': 'Changed'}, {'id': 999, 'title': 'Missing'}]
+        result = self.query_data(UPDATE, variables={'books': items})['updateBooks']
+        self.assertEqual(result['errors'], [{'index': 1, 'message': 'Book with ID 999 does not exist.'}])
+        first.refresh_from_db()
+        self.assertEqual(first.title, 'Book 0.0')
+
+        items = [{'id': first.pk, 'title': 'Changed'}, {'id': second.pk, 'pageCount': 7}]
+        result = self.query_data(UPDATE, variables={'books': items})['updateBooks']
+        self.assertEqual(result['books'], [
+            {'id': str(first.pk), 'title': 'Changed', 'pageCount': 100},
+            {'id': str(second.pk), 'title': 'Book 0.1', 'pageCount': 7},
+        ])
+        first.refresh_from_db()
+        self.assertEqual(first.title, 'Changed')
+
+    def test_unparsable_ids_are_item_errors(self):
+        book = self.books[0]
+        items = [{'id': book.pk, 'authorId': 'abc'}, {'id': book.pk, 'genresId': [self.genre_ids[0], 'x1']}]
+        result = self.query_data(UPDATE, variables={'books': items, 'partial': True})['updateBooks']
+        self.assertEqual(result['books'], [])
+        self.assertEqual(result['errors'], [
+            {'index': 0, 'message': 'Author with ID abc does not exist.'},
+            {'index': 1, 'message': 'Genre with ID x1 does not exist.'},
+        ])
+        book.refresh_from_db()
+        self.assertIsNotNone(book.author_id)
+
+        result = self.query_data(CREATE, variables={'books': [self.book(0, authorId='abc')]})['createBooks']
+        self.assertEqual(result['errors'], [{'index': 0, 'message': 'Author with ID abc does not exist.'}])
+
+    def test_delete(self):
+        ids = [self.books[0].pk, 999]
+        result = self.query_data(DELETE, variables={'ids': ids})['deleteBooks']
+        self.assertEqual(result, {
+            'deletedCount': 0, 'errors': [{'index': 1, 'message': 'Book with ID 999 does not exist.'}],
+        })
+        result = self.query_data(DELETE, variables={'ids': ids, 'partial': True})['deleteBooks']
+        self.assertEqual(result['deletedCount'], 1)
+        self.assertFalse(Book.objects.filter(pk=self.books[0].pk).exists())
+
+    def test_single_book_messages(self):
+        result = self.query_data('mutation { deleteBook(id: 999) { message } }')
+        self.assertEqual(result['deleteBook']['message'], 'Error: Book with ID 999 does not exist.')
+        result = self.query_data('mutation { updateBook(id: 999, title: "-") { message } }')
+        self.assertEqual(result['updateBook']['message'], 'Error: Book with ID 999 does not exist.')
@@ -0,0 +1,104 @@
+import json
+
+from django.test import AsyncClient, TestCase, override_settings
+
+from api.models import Author, Book, Change, Genre
+
+from .utils import create_library
+
+
+def parse_events(body):
+    # (id, event, data) of the events of an SSE body.
+    events = []
+    for block in body.split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.splitlines() if not line.startswith(':'))
+        if 'event' in fields:
+            events.append((int(fields['id']), fields['event'], json.loads(fields['data'])))
+    return events
+
+
+class ChangeFeedTests(TestCase):
+    def setUp(self):
+        author = Author.objects.create(first_name='First', last_name='Last')
+        genre = Genre.objects.create(name='Genre')
+        book = Book.objects.create(title='Book', summary='-', author=author)
+        book.genre.add(genre)
+        book.title = 'Renamed'
+        book.save()
+        genre.delete()
+
+    def test_pages_follow_the_cursor(self):
+        entries, cursor = [], 0
+        while True:
+            page = self.client.get(f'/api/changes/?after={cursor}&limit=2').json()
+            entries += page['results']
+            self.assertLessEqual(len(page['results']), 2)
+            cursor = page['cursor']
+            if not page['has_more']:
+                break
+        self.assertEqual(
+            [(entry['model'], entry['action']) for entry in entries],
+            # Adding the genre, renaming, and the link removed with the genre.
+            [('author', 'created'), ('genre', 'created'), ('book', 'created'), ('book', 'updated'),
+             ('book', 'updated'), ('book', 'updated'), ('genre', 'deleted')],
+        )
+        self.assertEqual([entry['cursor'] for entry in entries], list(Change.objects.values_list('pk', flat=True)))
+        # Entries carry the current representation, or null once deleted.
+        self.assertEqual(entries[2]['object']['title'], 'Renamed')
+        self.assertEqual(entries[2]['object']['genre'], [])
+        self.assertIsNone(entries[1]['object'])
+        self.assertEqual(entries[0]['object']['book_count'], 1)
+
+        # Nothing after the end; the cursor stays.
+        page = self.client.get(f'/api/changes/?after={cursor}').json()
+        self.assertEqual((page['cursor'], page['has_more'], page['results']), (cursor, False, []))
+
+    def test_invalid_parameters(self):
+        for query in ('after=abc', 'after=-1', 'limit=0', 'limit=x'):
+            response = self.client.get(f'/api/changes/?{query}')
+            self.assertEqual(response.status_code, 400, query)
+            self.assertEqual(list(response.json()), [query.split('=')[0]])
+
+    def test_stream_needs_asgi(self):
+        self.assertEqual(self.client.get('/api/changes/stream/').status_code, 501)
+
+
+@override_settings(CHANGE_STREAM_POLL_INTERVAL=0.01, CHANGE_STREAM_TIMEOUT=0.2, CHANGE_STREAM_HEARTBEAT=0.05)
+class ChangeStreamTests(TestCase):
+    def setUp(self):
+        create_library(authors=1, books_per_author=1, genres=1)
+        self.cursor = Change.objects.order_by('-pk').values_list('pk', flat=True).first()
+        Author.objects.create(first_name='New', last_name='Author')
+        Book.objects.filter(title='Book 0.0').get().delete()
+
+    async def stream(self, **kwargs):
+        response = await AsyncClient().get('/api/changes/stream/', **kwargs)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        # Ends after CHANGE_STREAM_TIMEOUT.
+        return ''.join([chunk.decode() async for chunk in response.streaming_content])
+
+    async def test_events_after_the_cursor(self):
+        body = await self.stream(data={'after': self.cursor})
+        self.assertTrue(body.startswith('retry: 10\n\n'))
+        self.assertIn(': keepalive\n\n', body)
+        events = parse_events(body)
+        self.assertEqual([event for _, event, _ in events], ['change', 'change'])
+        self.assertEqual([data['cursor'] for _, _, data in events], [event_id for event_id, _, _ in events])
+        self.assertGreater(events[0][0], self.cursor)
+        self.assertEqual(
+            [(data['model'], data['action']) for _, _, data in events],
+            [('author', 'created'), ('book', 'deleted')],
+        )
+        self.assertEqual(events[0][2]['object']['first_name'], 'New')
+
+    async def test_resumes_from_last_event_id(self):
+        body = await self.stream(data={'after': 0}, headers={'Last-Event-ID': str(self.cursor + 1)})
+        self.assertEqual([data['action'] for _, _, data in parse_events(body)], ['deleted'])
+
+    async def test_starts_at_the_end_without_a_cursor(self):
+        self.assertEqual(parse_events(await self.stream()), [])
+
+    async def test_invalid_cursor(self):
+        response = await AsyncClient().get('/api/changes/stream/', {'after': 'abc'})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,38 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from api.benchmarks import SCENARIOS, run_benchmarks
+from api.models import Author, Book
+
+from .utils import create_library
+
+
+class SeedLibraryTests(TestCase):
+    def test_progress_line_is_ended(self):
+        out = StringIO()
+        call_command('seed_library', authors=3, genres=2, books=5, chunk_size=2, stdout=out)
+        self.assertEqual(Book.objects.count(), 5)
+        # The summary starts on a line of its own.
+        self.assertIn('5/5 books\r\n', out.getvalue())
+        self.assertTrue(out.getvalue().splitlines()[-1].startswith('Created 3 authors'))
+
+    def test_invalid_counts(self):
+        with self.assertRaisesMessage(CommandError, '--books'):
+            call_command('seed_library', books=-1, stdout=StringIO())
+        with self.assertRaisesMessage(CommandError, '--chunk-size'):
+            call_command('seed_library', chunk_size=0, stdout=StringIO())
+        self.assertFalse(Author.objects.exists())
+
+
+class BenchmarkTests(TestCase):
+    def test_configured_cache_is_left_alone(self):
+        create_library()
+        cache.set('unrelated', 1)
+        scenarios = [scenario for scenario in SCENARIOS if scenario.name in ('graphql.books', 'rest.books')]
+        results = run_benchmarks(scenarios, iterations=2, warmup=1)
+        self.assertEqual(set(results), {'graphql.books', 'rest.books'})
+        self.assertEqual(cache.get('unrelated'), 1)
+        self.assertEqual(Book.objects.count(), 6)
@@ -0,0 +1,67 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from api.models import Author, Book
+
+from .utils import create_library
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        create_library(authors=2)
+
+    def test_validators(self):
+        response = self.client.get('/api/books/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['ETag'].startswith('"'))
+        self.assertIn('no-cache', response['Cache-Control'])
+        # Nothing has changed since the versions were created.
+        self.assertNotIn('Last-Modified', response)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Book.objects.get(title='Book 0.0').save()
+        response = self.client.get('/api/books/')
+        self.assertIn('Last-Modified', response)
+
+    def test_unchanged_poll_gets_304_without_queries(self):
+        etag = self.client.get('/api/books/')['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/books/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response.content, b'')
+
+    def test_if_modified_since(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Author.objects.create(first_name='New', last_name='Author')
+        last_modified = self.client.get('/api/authors/')['Last-Modified']
+        response = self.client.get('/api/authors/', HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_write_changes_the_validator(self):
+        book = Book.objects.get(title='Book 0.0')
+        url = f'/api/books/{book.pk}/'
+        list_etag = self.client.get('/api/books/')['ETag']
+        etag = self.client.get(url)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            book.title = 'Renamed'
+            book.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['title'], 'Renamed')
+        self.assertEqual(self.client.get('/api/books/', HTTP_IF_NONE_MATCH=list_etag).status_code, 200)
+
+    def test_unrelated_write_keeps_the_validator(self):
+        book = Book.objects.get(title='Book 0.0')
+        url = f'/api/books/{book.pk}/'
+        etag = self.client.get(url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Book.objects.filter(title='Book 1.0').get().delete()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_etag_depends_on_the_url(self):
+        first = self.client.get('/api/books/')['ETag']
+        self.assertNotEqual(self.client.get('/api/books/?ordering=title')['ETag'], first)
@@ -0,0 +1,99 @@
+import json
+from datetime import date
+
+from api.models import Book
+
+from .utils import LibraryTestCase
+
+
+PAGE_QUERY = '''
+    query ($first: Int, $last: Int, $after: String, $before: String, $orderBy: BookOrder) {
+      books(first: $first, last: $last, after: $after, before: $before, orderBy: $orderBy) {
+        edges { cursor node { id } }
+        pageInfo { hasNextPage hasPreviousPage startCursor endCursor }
+      }
+    }
+'''
+
+
+class ConnectionTests(LibraryTestCase):
+    def setUp(self):
+        super().setUp()
+        # Ties on published_date and a book without one, which sorts first.
+        dates = [date(2001, 1, 1), None, date(2000, 1, 1), date(2001, 1, 1), date(2001, 1, 1), date(2002, 1, 1), None]
+        for index, published_date in enumerate(dates):
+            Book.objects.create(title=f'Book {index}', summary='-', published_date=published_date, page_count=index)
+        self.expected = [
+            book.pk for book in sorted(
+                Book.objects.all(), key=lambda book: (book.published_date is not None, book.published_date, book.pk)
+            )
+        ]
+
+    def page(self, **variables):
+        books = self.query_data(PAGE_QUERY, variables=variables)['books']
+        return [int(edge['node']['id']) for edge in books['edges']], books['pageInfo']
+
+    def test_pages_forward_through_ties(self):
+        ids, after = [], None
+        while True:
+            page, info = self.page(first=2, after=after)
+            ids += page
+            self.assertEqual(info['hasPreviousPage'], after is not None)
+            if not info['hasNextPage']:
+                break
+            after = info['endCursor']
+        self.assertEqual(ids, self.expected)
+
+    def test_pages_backward_through_ties(self):
+        ids, before = [], None
+        while True:
+            page, info = self.page(last=2, before=before)
+            ids = page + ids
+            self.assertEqual(info['hasNextPage'], before is not None)
+            if not info['hasPreviousPage']:
+                break
+            before = info['startCursor']
+        self.assertEqual(ids, self.expected)
+
+    def test_first_and_last_within_after_and_before(self):
+        _, info = self.page(first=1)
+        start = info['endCursor']
+        _, info = self.page(last=1)
+        end = info['startCursor']
+
+        ids, info = self.page(first=3, after=start, before=end)
+        self.assertEqual(ids, self.expected[1:4])
+        self.assertTrue(info['hasNextPage'])
+        ids, info = self.page(first=10, last=2, after=start, before=end)
+        self.assertEqual(ids, self.expected[4:6])
+        self.assertTrue(info['hasPreviousPage'])
+
+    def test_last_beyond_first(self):
+        ids, info = self.page(first=3, last=5)
+        self.assertEqual(ids, self.expected[:3])
+        self.assertFalse(info['hasPreviousPage'])
+        self.assertTrue(info['hasNextPage'])
+
+        ids, _ = self.page(first=3, last=0)
+        self.assertEqual(ids, [])
+
+    def test_descending_order(self):
+        _, info = self.page(first=3, orderBy='PUBLISHED_DATE_DESC')
+        ids, _ = self.page(first=10, after=info['endCursor'], orderBy='PUBLISHED_DATE_DESC')
+        # Latest first, then the books without a date, the ties by id.
+        dated = Book.objects.filter(published_date__isnull=False)
+        expected = [
+            *(book.pk for book in sorted(dated, key=lambda book: (book.published_date, book.pk), reverse=True)),
+            *Book.objects.filter(published_date__isnull=True).order_by('-pk').values_list('pk', flat=True),
+        ]
+        self.assertEqual(ids, expected[3:])
+
+    def test_invalid_cursor(self):
+        for cursor in ('not a cursor', 'WzEsIDIsIDNd', 'WyJub3QgYSBkYXRlIiwgMV0='):
+            response = self.query(PAGE_QUERY, variables={'first': 2, 'after': cursor})
+            errors = json.loads(response.content)['errors']
+            self.assertEqual(errors[0]['message'], f'Invalid cursor: {cursor}')
+
+    def test_limits(self):
+        response = self.query(PAGE_QUERY, variables={'first': 101})
+        self.assertEqual(json.loads(response.content)['errors'][0]['message'], '`first` must be between 0 and 100.')
@@ -0,0 +1,181 @@
+from datetime import date
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase
+from django.core.cache import cache
+
+from api.filters import (
+    AUTHOR_FILTERS, AUTHOR_ORDERINGS, BOOK_FILTERS, BOOK_ORDERINGS, GENRE_FILTERS, GENRE_ORDERINGS,
+    filter_queryset, ordering_keys,
+)
+from api.models import Author, Book, Genre
+
+from .utils import LibraryTestCase
+
+
+def create_shelf():
+    # Three authors, two of them dead, with books of distinct page counts
+    # and publication dates.
+    fiction, poetry = Genre.objects.create(name='Fiction'), Genre.objects.create(name='Poetry')
+    authors = [
+        Author.objects.create(
+            first_name='Ann', last_name='Cole', date_of_birth=date(1900, 1, 1), date_of_death=date(1960, 1, 1),
+        ),
+        Author.objects.create(
+            first_name='Bob', last_name='Adams', date_of_birth=date(1930, 1, 1), date_of_death=date(1990, 1, 1),
+        ),
+        Author.objects.create(first_name='Cid', last_name='Bell', date_of_birth=date(1960, 1, 1)),
+    ]
+    books = {}
+    for index, (author, pages) in enumerate([(0, 120), (0, 300), (1, 80), (2, 450), (2, 200)]):
+        book = Book.objects.create(
+            title=f'Book {index}', summary='-', author=authors[author],
+            published_date=date(1950 + 10 * index, 1, 1), page_count=pages,
+        )
+        book.genre.set([fiction] if index % 2 else [poetry])
+        books[index] = book
+    return authors, books, (fiction, poetry)
+
+
+class BookFilterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.authors, self.books, self.genres = create_shelf()
+
+    def titles(self, query):
+        response = self.client.get(f'/api/books/?page_size=50&{query}')
+        self.assertEqual(response.status_code, 200)
+        return [book['title'] for book in response.json()['results']]
+
+    def test_filters(self):
+        self.assertEqual(self.titles('published_after=1970-01-01'), ['Book 2', 'Book 3', 'Book 4'])
+        self.assertEqual(self.titles('published_before=1960-01-01'), ['Book 0', 'Book 1'])
+        self.assertEqual(self.titles(f'author_id={self.authors[2].pk}'), ['Book 3', 'Book 4'])
+        self.assertEqual(self.titles(f'genre_id={self.genres[0].pk}'), ['Book 1', 'Book 3'])
+        self.assertEqual(self.titles('min_pages=200'), ['Book 1', 'Book 3', 'Book 4'])
+        self.assertEqual(self.titles('max_pages=120'), ['Book 0', 'Book 2'])
+        self.assertEqual(self.titles('min_pages=100&max_pages=300&published_after=1955-01-01'), ['Book 1', 'Book 4'])
+
+    def test_orderings(self):
+        self.assertEqual(self.titles('ordering=-published_date'), ['Book 4', 'Book 3', 'Book 2', 'Book 1', 'Book 0'])
+        self.assertEqual(self.titles('ordering=page_count'), ['Book 2', 'Book 0', 'Book 4', 'Book 1', 'Book 3'])
+        self.assertEqual(self.titles('ordering=-page_count'), ['Book 3', 'Book 1', 'Book 4', 'Book 0', 'Book 2'])
+        self.assertEqual(self.titles(f'author_id={self.authors[0].pk}&ordering=-published_date'), ['Book 1', 'Book 0'])
+
+    def test_invalid_values(self):
+        for query, field in [('min_pages=many', 'min_pages'), ('published_after=soon', 'published_after'),
+                             ('ordering=summary', 'ordering')]:
+            response = self.client.get(f'/api/books/?{query}')
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(list(response.json()), [field])
+
+    def test_search_rejects_filters(self):
+        response = self.client.get(f'/api/books/?q=book&author_id={self.authors[0].pk}&ordering=title')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(sorted(response.json()), ['author_id', 'ordering'])
+        self.assertEqual(self.client.get('/api/books/?q=book').status_code, 200)
+
+
+class AuthorFilterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        create_shelf()
+
+    def names(self, query):
+        response = self.client.get(f'/api/authors/?page_size=50&{query}')
+        self.assertEqual(response.status_code, 200)
+        return [author['last_name'] for author in response.json()['results']]
+
+    def test_filters(self):
+        self.assertEqual(self.names('born_after=1920-01-01'), ['Adams', 'Bell'])
+        self.assertEqual(self.names('born_before=1930-01-01'), ['Cole', 'Adams'])
+        self.assertEqual(self.names('died_after=1970-01-01'), ['Adams'])
+        self.assertEqual(self.names('died_before=1970-01-01'), ['Cole'])
+        self.assertEqual(self.names('min_books=2'), ['Cole', 'Bell'])
+
+    def test_orderings(self):
+        self.assertEqual(self.names('ordering=-date_of_birth'), ['Bell', 'Adams', 'Cole'])
+        self.assertEqual(self.names('ordering=last_name'), ['Adams', 'Bell', 'Cole'])
+        self.assertEqual(self.names('ordering=age'), ['Bell', 'Adams', 'Cole'])
+        self.assertEqual(self.names('ordering=-age'), ['Cole', 'Adams', 'Bell'])
+        # Authors without a date of death sort first.
+        self.assertEqual(self.names('ordering=date_of_death'), ['Bell', 'Cole', 'Adams'])
+
+    def test_genre_ordering(self):
+        response = self.client.get('/api/genres/?ordering=name')
+        self.assertEqual([genre['name'] for genre in response.json()['results']], ['Fiction', 'Poetry'])
+
+
+class ConnectionFilterTests(LibraryTestCase):
+    def setUp(self):
+        super().setUp()
+        self.authors, _, _ = create_shelf()
+
+    def test_book_filters(self):
+        data = self.query_data('''
+            query ($authorId: ID) {
+              books(authorId: $authorId, minPages: 150, orderBy: PAGE_COUNT_DESC) { edges { node { title } } }
+            }
+        ''', variables={'authorId': self.authors[2].pk})
+        self.assertEqual([edge['node']['title'] for edge in data['books']['edges']], ['Book 3', 'Book 4'])
+
+    def test_author_filters(self):
+        data = self.query_data('''
+            query { authors(diedAfter: "1900-01-01", orderBy: LAST_NAME) { edges { node { lastName } } } }
+        ''')
+        self.assertEqual([edge['node']['lastName'] for edge in data['authors']['edges']], ['Adams', 'Cole'])
+
+    def test_invalid_value(self):
+        response = self.query('query { books(authorId: "abc") { edges { node { id } } } }')
+        self.assertResponseHasErrors(response)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN is SQLite syntax')
+class IndexPlanTests(TestCase):
+    # Each filter with the ordering the list would use, and the index that
+    # has to show up in its plan (see migration 0003).
+
+    def plan(self, queryset, filters, orderings, values, order_by=None):
+        queryset = filter_queryset(queryset, filters, values).order_by(*ordering_keys(orderings, order_by))
+        return queryset.explain()
+
+    def assertUsesIndex(self, plan, index, constraint=None):
+        # With a constraint, the index has to narrow the rows, not only
+        # order them.
+        self.assertIn(f'USING INDEX {index} {constraint}' if constraint else f'USING INDEX {index}', plan)
+
+    def test_book_filters(self):
+        books = Book.objects.all()
+        self.assertUsesIndex(
+            self.plan(books, BOOK_FILTERS, BOOK_ORDERINGS, {'author_id': '1'}),
+            'api_book_author__25d0bc_idx', '(author_id=?)',
+        )
+        self.assertUsesIndex(
+            self.plan(books, BOOK_FILTERS, BOOK_ORDERINGS, {'author_id': '1'}, '-published_date'),
+            'api_book_author__25d0bc_idx', '(author_id=?)',
+        )
+        for name, constraint in [('min_pages', '(page_count>?)'), ('max_pages', '(page_count<?)')]:
+            self.assertUsesIndex(
+                self.plan(books, BOOK_FILTERS, BOOK_ORDERINGS, {name: '100'}, 'page_count'),
+                'api_book_page_co_d21648_idx', constraint,
+            )
+
+    def test_author_filters(self):
+        authors = Author.objects.with_age().with_book_count()
+        for name, constraint in [('died_after', '(date_of_death>?)'), ('died_before', '(date_of_death<?)')]:
+            self.assertUsesIndex(
+                self.plan(authors, AUTHOR_FILTERS, AUTHOR_ORDERINGS, {name: '1900-01-01'}, 'date_of_death'),
+                'api_author_date_of_c3200b_idx', constraint,
+            )
+
+    def test_orderings(self):
+        self.assertUsesIndex(
+            self.plan(Author.objects.all(), AUTHOR_FILTERS, AUTHOR_ORDERINGS, {}, 'last_name'),
+            'api_author_last_na_869904_idx',
+        )
+        self.assertIn(
+            'USING COVERING INDEX api_genre_name_01c28c_idx',
+            self.plan(Genre.objects.all(), GENRE_FILTERS, GENRE_ORDERINGS, {}, 'name'),
+        )
+        self.assertNotIn('TEMP B-TREE', self.plan(Book.objects.all(), BOOK_FILTERS, BOOK_ORDERINGS, {}, 'page_count'))
@@ -0,0 +1,183 @@
+import csv
+import io
+import json
+import threading
+from datetime import date
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, TransactionTestCase, override_settings
+from rest_framework.test import APIClient
+
+from api import bulk
+from api.models import Author, Book, Genre
+from api.routing import STICKY_COOKIE
+from api.serializers import BookSerializer
+from api.views import BookExportAPIView, BookImportAPIView
+from api.writer import WriteQueue
+
+from .utils import create_library
+
+
+def content(response):
+    return b''.join(response.streaming_content).decode()
+
+
+class ImportExportTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(username='admin', is_staff=True))
+
+    def post(self, body, content_type):
+        response = self.client.post('/api/books/import/', body, content_type=content_type)
+        self.assertEqual(response.status_code, 200)
+        return [json.loads(line) for line in content(response).splitlines()]
+
+    def export(self, export_format):
+        response = self.client.get(f'/api/books/export.{export_format}')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return content(response)
+
+    def database(self):
+        return json.loads(json.dumps(BookSerializer(Book.objects.order_by('pk'), many=True).data))
+
+    def test_ndjson_export_equals_database(self):
+        create_library(authors=3, books_per_author=2, genres=2)
+        Book.objects.create(title='Anonymous', summary='-')
+        with mock.patch.object(BookExportAPIView, 'chunk_size', 2):
+            records = [json.loads(line) for line in self.export('ndjson').splitlines()]
+        self.assertEqual(records, self.database())
+
+    def test_ndjson_round_trip(self):
+        create_library(authors=3, books_per_author=2, genres=2)
+        exported = self.export('ndjson')
+        expected = self.database()
+        Book.objects.all().delete()
+
+        progress = self.post(exported, 'application/x-ndjson')
+        self.assertEqual(progress[-1], {'rows': 6, 'created': 6, 'failed': 0, 'done': True})
+        # Existing authors and genres are matched instead of duplicated.
+        self.assertEqual((Author.objects.count(), Genre.objects.count()), (3, 2))
+        imported = self.database()
+        for record in expected + imported:
+            record.pop('id')
+        self.assertEqual(imported, expected)
+
+    def test_authors_sharing_a_name_stay_apart(self):
+        born = [date(1950, 1, 1), date(1960, 1, 1), None]
+        for index, date_of_birth in enumerate(born):
+            author = Author.objects.create(first_name='Jane', last_name='Doe', date_of_birth=date_of_birth)
+            Book.objects.create(title=f'Book {index}', summary='-', author=author)
+        expected = dict(Book.objects.values_list('title', 'author_id'))
+
+        for export_format, content_type in (('ndjson', 'application/x-ndjson'), ('csv', 'text/csv')):
+            exported = self.export(export_format)
+            Book.objects.all().delete()
+            self.assertEqual(self.post(exported, content_type)[-1]['created'], 3)
+            self.assertEqual(Author.objects.count(), 3)
+            self.assertEqual(dict(Book.objects.values_list('title', 'author_id')), expected)
+
+    def test_csv_round_trip(self):
+        create_library(authors=2, books_per_author=2, genres=3)
+        exported = self.export('csv')
+        rows = list(csv.DictReader(io.StringIO(exported)))
+        self.assertEqual([int(row['id']) for row in rows], list(Book.objects.values_list('pk', flat=True).order_by('pk')))
+        self.assertEqual(rows[0]['genres'], 'Genre 0|Genre 1|Genre 2')
+        Book.objects.all().delete()
+
+        progress = self.post(exported, 'text/csv')
+        self.assertEqual(progress[-1], {'rows': 4, 'created': 4, 'failed': 0, 'done': True})
+        reimported = list(csv.DictReader(io.StringIO(self.export('csv'))))
+        for row in rows + reimported:
+            row.pop('id')
+        self.assertEqual(reimported, rows)
+
+    def test_malformed_ndjson_lines_are_reported(self):
+        record = {'title': 'Good', 'summary': 'A book.', 'author': {'first_name': 'A', 'last_name': 'B'}, 'genre': []}
+        lines = [
+            json.dumps(record),
+            '{"title": "Broken"',
+            '',
+            json.dumps([1, 2]),
+            json.dumps({**record, 'genre': 'not a list'}),
+            json.dumps({**record, 'genre': [{'name': ''}]}),
+        ]
+        progress = self.post('\n'.join(lines), 'application/x-ndjson')
+        self.assertEqual(progress[-1], {'rows': 5, 'created': 1, 'failed': 4, 'done': True})
+        errors = {error['line']: error['errors'] for error in progress[0]['errors']}
+        self.assertEqual(sorted(errors), [2, 4, 5, 6])
+        self.assertEqual(errors[2], {'non_field_errors': ['Invalid record.']})
+        self.assertIn('genre', errors[5])
+        self.assertIn('genre', errors[6])
+        self.assertEqual(list(Book.objects.values_list('title', flat=True)), ['Good'])
+
+    def test_invalid_csv_rows_are_reported(self):
+        body = (
+            'title,summary,page_count,author_first_name,author_last_name,genres\n'
+            'Good,A book.,10,A,B,Poetry|Drama\n'
+            ',No title,10,A,B,Poetry\n'
+            'Bad pages,A book.,-1,A,B,Poetry\n'
+        )
+        progress = self.post(body, 'text/csv')
+        self.assertEqual(progress[-1], {'rows': 3, 'created': 1, 'failed': 2, 'done': True})
+        errors = {error['line']: error['errors'] for error in progress[0]['errors']}
+        self.assertEqual(set(errors), {3, 4})
+        self.assertIn('title', errors[3])
+        self.assertIn('page_count', errors[4])
+        self.assertEqual(sorted(Genre.objects.values_list('name', flat=True)), ['Drama', 'Poetry'])
+
+    def test_progress_is_reported_per_chunk(self):
+        record = {'title': 'Book', 'summary': 'A book.', 'author': {'first_name': 'A', 'last_name': 'B'}, 'genre': []}
+        with mock.patch.object(BookImportAPIView, 'chunk_size', 2):
+            progress = self.post('\n'.join([json.dumps(record)] * 5), 'application/x-ndjson')
+        self.assertEqual([line['rows'] for line in progress], [2, 4, 5, 5])
+        self.assertEqual(Author.objects.count(), 1)
+
+    def test_unsupported_formats(self):
+        self.assertEqual(self.client.post('/api/books/import/', 'x', content_type='text/plain').status_code, 415)
+        self.assertEqual(self.client.get('/api/books/export.xml').status_code, 404)
+
+    def test_import_requires_staff(self):
+        self.client.force_authenticate(None)
+        response = self.client.post('/api/books/import/', '{}', content_type='application/x-ndjson')
+        self.assertIn(response.status_code, (401, 403))
+
+
+RECORD = {'title': 'Queued', 'summary': '-', 'author': {'first_name': 'A', 'last_name': 'B'}, 'genre': []}
+
+
+class ImportWriteTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(username='admin', is_staff=True))
+
+    def post(self):
+        body = '\n'.join(json.dumps({**RECORD, 'title': f'Queued {index}'}) for index in range(3))
+        # The chunks are read as the response streams.
+        with mock.patch.object(BookImportAPIView, 'chunk_size', 2):
+            response = self.client.post('/api/books/import/', body, content_type='application/x-ndjson')
+            self.assertEqual(json.loads(content(response).splitlines()[-1])['created'], 3)
+        return response
+
+    @override_settings(WRITE_QUEUE=True)
+    def test_chunks_go_through_the_write_queue(self):
+        queue = WriteQueue()
+        self.addCleanup(queue.shutdown)
+        threads = []
+
+        def import_books(records):
+            threads.append(threading.current_thread().name)
+            return original(records)
+
+        original = bulk.import_books
+        with mock.patch('api.writer.write_queue', queue), mock.patch('api.views.import_books', import_books):
+            self.post()
+        self.assertEqual(threads, ['write-queue', 'write-queue'])
+
+    @override_settings(REPLICA_DATABASES=['replica1'])
+    def test_sets_the_sticky_cookie(self):
+        self.assertIn(STICKY_COOKIE, self.post().cookies)
@@ -0,0 +1,172 @@
+import json
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.test import SimpleTestCase, override_settings
+from graphql import (
+    GraphQLField, GraphQLList, GraphQLNonNull, GraphQLObjectType, GraphQLSchema, GraphQLString, parse,
+    specified_directives,
+)
+
+from api.incremental import DeferDirective, StreamDirective, execute_incrementally
+
+from .utils import LibraryTestCase, create_library
+
+
+MULTIPART = 'multipart/mixed;deferSpec=20220824, application/json'
+
+DEFERRED = '''{
+  books(first: 2) { edges { node {
+    title
+    ... @defer(label: "author") { author { lastName ... @defer(label: "born") { dateOfBirth } } }
+  } } }
+}'''
+STREAMED = 'query ($count: Int!) { books(first: 6) { edges @stream(initialCount: $count) { node { title } } } }'
+
+
+def parse_parts(body):
+    # The JSON payloads of a multipart/mixed body.
+    assert body.endswith('\r\n-----\r\n'), body
+    parts = body[:-len('\r\n-----\r\n')].split('\r\n---\r\n')[1:]
+    return [json.loads(part.split('\r\n\r\n', 1)[1]) for part in parts]
+
+
+def merge(data, parts):
+    # Applies the incremental entries to the initial data.
+    for part in parts:
+        for entry in part.get('incremental', ()):
+            *parent_path, last = entry['path']
+            target = data
+            for key in parent_path if 'items' in entry else entry['path']:
+                target = target[key]
+            if 'items' in entry:
+                target[last:last] = entry['items']
+            else:
+                target.update(entry['data'])
+    return data
+
+
+class IncrementalDeliveryTests(LibraryTestCase):
+    def setUp(self):
+        super().setUp()
+        create_library()
+
+    def multipart(self, query, variables=None):
+        response = self.client.post(
+            self.GRAPHQL_URL, {'query': query, 'variables': variables or {}},
+            content_type='application/json', HTTP_ACCEPT=MULTIPART,
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'multipart/mixed; boundary="-"; deferSpec=20220824')
+        return parse_parts(b''.join(response.streaming_content).decode())
+
+    def test_defer_and_nested_defer(self):
+        initial, *parts = self.multipart(DEFERRED)
+        self.assertTrue(initial['hasNext'])
+        edges = initial['data']['books']['edges']
+        self.assertEqual([set(edge['node']) for edge in edges], [{'title'}, {'title'}])
+
+        entries = [part['incremental'][0] for part in parts]
+        self.assertEqual(
+            [(entry['label'], entry['path']) for entry in entries],
+            [
+                ('author', ['books', 'edges', 0, 'node']),
+                ('author', ['books', 'edges', 1, 'node']),
+                ('born', ['books', 'edges', 0, 'node', 'author']),
+                ('born', ['books', 'edges', 1, 'node', 'author']),
+            ],
+        )
+        self.assertEqual([part['hasNext'] for part in parts], [True, True, True, False])
+        self.assertEqual(merge(initial['data'], parts), self.query_data(DEFERRED))
+
+    def test_client_without_multipart_gets_one_result(self):
+        response = self.query(DEFERRED)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertNotIn('hasNext', response.json())
+        node = response.json()['data']['books']['edges'][0]['node']
+        self.assertEqual(node['author'], {'lastName': 'Last 0', 'dateOfBirth': '1950-01-01'})
+
+    def test_defer_if_false(self):
+        query = '{ books(first: 1) { edges { node { title ... @defer(if: false) { pageCount } } } } }'
+        response = self.client.post(
+            self.GRAPHQL_URL, {'query': query}, content_type='application/json', HTTP_ACCEPT=MULTIPART,
+        )
+        # Nothing left to send later.
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(response.json()['data']['books']['edges'][0]['node'], {'title': 'Book 0.0', 'pageCount': 100})
+
+    def test_stream_initial_count_zero(self):
+        with override_settings(GRAPHENE={**settings.GRAPHENE, 'STREAM_BATCH_SIZE': 4}):
+            initial, *parts = self.multipart(STREAMED, {'count': 0})
+        self.assertEqual(initial['data']['books']['edges'], [])
+        self.assertEqual(
+            [(entry['path'], len(entry['items'])) for part in parts for entry in part['incremental']],
+            [(['books', 'edges', 0], 4), (['books', 'edges', 4], 2)],
+        )
+        self.assertFalse(parts[-1]['hasNext'])
+        self.assertEqual(merge(initial['data'], parts), self.query_data(STREAMED, variables={'count': 0}))
+
+    def test_stream_across_full_batches(self):
+        with override_settings(GRAPHENE={**settings.GRAPHENE, 'STREAM_BATCH_SIZE': 3}):
+            initial, *parts = self.multipart(STREAMED, {'count': 0})
+        self.assertEqual(
+            [[entry['path'][-1] for entry in part.get('incremental', ())] for part in parts], [[0], [3], []],
+        )
+        # The end of the list is only known after the last full batch.
+        self.assertEqual(parts[-1], {'hasNext': False})
+        self.assertEqual(len(merge(initial['data'], parts)['books']['edges']), 6)
+
+    def test_stream_initial_count_covering_the_list(self):
+        initial, *parts = self.multipart(STREAMED, {'count': 10})
+        self.assertEqual(len(initial['data']['books']['edges']), 6)
+        self.assertEqual(parts, [{'hasNext': False}])
+
+
+def broken(source, info):
+    raise ValueError('broken')
+
+
+ITEM = GraphQLObjectType('Item', {
+    'name': GraphQLField(GraphQLNonNull(GraphQLString)),
+    'required': GraphQLField(GraphQLNonNull(GraphQLString), resolve=broken),
+    'optional': GraphQLField(GraphQLString, resolve=broken),
+})
+SCHEMA = GraphQLSchema(
+    query=GraphQLObjectType('Query', {
+        'item': GraphQLField(ITEM, resolve=lambda source, info: {'name': 'item'}),
+        'items': GraphQLField(
+            GraphQLList(GraphQLNonNull(ITEM)), resolve=lambda source, info: [{'name': 'a'}, None, {'name': 'c'}],
+        ),
+    }),
+    directives=[*specified_directives, DeferDirective, StreamDirective],
+)
+
+
+class IncrementalExecutionContextTests(SimpleTestCase):
+    def execute(self, query):
+        result, context = execute_incrementally(SCHEMA, parse(query), context_value=SimpleNamespace(incremental=True))
+        return result, list(context.subsequent_payloads(10)) if context else []
+
+    def test_non_null_error_in_deferred_fragment(self):
+        result, parts = self.execute('{ item { name ... @defer(label: "d") { optional required } } }')
+        self.assertEqual((result.data, result.errors), ({'item': {'name': 'item'}}, None))
+
+        (payload, errors), = parts
+        # The fragment's data is null; the initial result stands.
+        self.assertEqual(payload, {'incremental': [{'data': None, 'path': ['item'], 'label': 'd'}], 'hasNext': False})
+        self.assertEqual([(error.message, error.path) for error in errors], [
+            ('broken', ['item', 'optional']), ('broken', ['item', 'required']),
+        ])
+
+    def test_nullable_error_in_deferred_fragment(self):
+        result, parts = self.execute('{ item { ... @defer { optional } } }')
+        (payload, errors), = parts
+        self.assertEqual(payload['incremental'][0]['data'], {'optional': None})
+        self.assertEqual([error.path for error in errors], [['item', 'optional']])
+
+    def test_null_item_ends_the_stream(self):
+        result, parts = self.execute('{ items @stream(initialCount: 1) { name } }')
+        self.assertEqual(result.data, {'items': [{'name': 'a'}]})
+        (payload, errors), = parts
+        self.assertEqual(payload['incremental'], [{'items': None, 'path': ['items', 1]}])
+        self.assertEqual(len(errors), 1)
@@ -0,0 +1,49 @@
+from api.loaders import Loaders
+from api.models import Book
+
+from .utils import LibraryTestCase, create_library
+
+
+NESTED_QUERY = '''
+    query {
+      authors(first: 20) {
+        edges { node { firstName bookSet { title author { lastName } genre { name bookSet { title } } } } }
+      }
+    }
+'''
+
+
+class LoaderTests(LibraryTestCase):
+    def test_sibling_lookups_are_batched(self):
+        create_library(authors=4)
+        loaders = Loaders()
+        books = loaders.track(Book.objects.all())
+        with self.assertNumQueries(1):
+            authors = [loaders.load(loaders.author, book, lambda book: book.author_id) for book in books]
+        self.assertEqual([author.pk for author in authors], [book.author_id for book in books])
+        with self.assertNumQueries(1):
+            for book in books:
+                loaders.load(loaders.genres_by_book, book, lambda book: book.pk)
+
+    def test_loaded_objects_are_cached(self):
+        create_library(authors=1)
+        loaders = Loaders()
+        book = loaders.track(Book.objects.all())[0]
+        loaders.load(loaders.author, book, lambda book: book.author_id)
+        with self.assertNumQueries(0):
+            self.assertEqual(loaders.load(loaders.author, book, lambda book: book.author_id).pk, book.author_id)
+
+    def test_nested_query_count_does_not_grow_with_rows(self):
+        # One query per level: authors, their books (with the author joined
+        # in), the books' genres and the genres' books.
+        create_library(authors=2)
+        with self.assertNumQueries(4):
+            self.query_data(NESTED_QUERY)
+
+        create_library(authors=6, books_per_author=3, genres=3)
+        self.setUp()
+        with self.assertNumQueries(4):
+            data = self.query_data(NESTED_QUERY)
+        edges = data['authors']['edges']
+        self.assertEqual(len(edges), 8)
+        self.assertEqual(sum(len(edge['node']['bookSet']) for edge in edges), 22)
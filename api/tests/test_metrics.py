@@ -0,0 +1,101 @@
+import re
+import threading
+
+from django.conf import settings
+from django.db import connection
+from django.test import override_settings
+
+from api.metrics import RequestMetrics, install_sql_timer, sql_timer
+
+from .utils import LibraryTestCase, create_library
+
+
+SAMPLE_RE = re.compile(r'^([a-z_]+)\{(.*)\} (\S+)$')
+LABEL_RE = re.compile(r'([a-z]+)="((?:[^"\\]|\\.)*)"')
+
+
+def parse_metrics(text):
+    # {metric name: {'type': ..., 'samples': [(sample name, labels, value)]}}
+    metrics, current = {}, None
+    for line in text.splitlines():
+        if line.startswith('# HELP '):
+            current = metrics.setdefault(line.split()[2], {'samples': []})
+        elif line.startswith('# TYPE '):
+            current['type'] = line.split()[3]
+        else:
+            name, labels, value = SAMPLE_RE.match(line).groups()
+            current['samples'].append((name, dict(LABEL_RE.findall(labels)), float(value)))
+    return metrics
+
+
+@override_settings(METRICS=True, GRAPHENE={**settings.GRAPHENE, 'METRICS_EXTENSIONS': True})
+class MetricsTests(LibraryTestCase):
+    def setUp(self):
+        super().setUp()
+        create_library()
+        install_sql_timer(None, connection)
+        self.addCleanup(connection.execute_wrappers.remove, sql_timer)
+
+    def test_exposition_format(self):
+        self.query_data('{ books(first: 5) { edges { node { title author { lastName } } } } }')
+        self.client.get('/api/books/')
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/plain; version=0.0.4; charset=utf-8')
+        text = response.content.decode()
+        self.assertTrue(text.endswith('\n'))
+
+        metrics = parse_metrics(text)
+        self.assertIn('graphql_resolver_sql_queries', metrics)
+        for name, metric in metrics.items():
+            self.assertEqual(metric['type'], 'histogram')
+            series = {}
+            for sample, labels, value in metric['samples']:
+                self.assertIn(sample, (f'{name}_bucket', f'{name}_sum', f'{name}_count'))
+                key = tuple(sorted((label, value) for label, value in labels.items() if label != 'le'))
+                series.setdefault(key, []).append((sample, labels, value))
+            for samples in series.values():
+                buckets = [value for sample, _, value in samples if sample.endswith('_bucket')]
+                # Cumulative, ending with +Inf, which equals the count.
+                self.assertEqual(buckets, sorted(buckets))
+                self.assertEqual(samples[len(buckets) - 1][1]['le'], '+Inf')
+                self.assertEqual(buckets[-1], samples[-1][2])
+                self.assertEqual(samples[-1][0], f'{name}_count')
+
+        requests = {
+            labels['view']: value for sample, labels, value in metrics['http_request_sql_queries']['samples']
+            if sample.endswith('_count')
+        }
+        self.assertGreaterEqual(requests['api:books'], 1)
+        self.assertGreaterEqual(requests['api:graphql'], 1)
+        paths = {labels['path'] for _, labels, _ in metrics['graphql_resolver_sql_queries']['samples']}
+        self.assertIn('books', paths)
+
+    def test_access(self):
+        self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='10.0.0.1').status_code, 403)
+        with override_settings(METRICS=False):
+            self.assertEqual(self.client.get('/metrics').status_code, 404)
+
+    def test_timing_extension(self):
+        response = self.query('{ books(first: 5) { edges { node { author { lastName } } } } }')
+        timing = response.json()['extensions']['timing']
+        self.assertGreaterEqual(timing['queries'], 1)
+        self.assertEqual(timing['resolvers']['books']['calls'], 1)
+
+    def test_concurrent_updates(self):
+        metrics = RequestMetrics()
+
+        def work():
+            for _ in range(2000):
+                timing = metrics.resolver('books')
+                metrics.add_query(timing, 0.5)
+                metrics.add_call(timing, 0.25)
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        timing = metrics.resolvers['books']
+        self.assertEqual((metrics.total.queries, timing.queries, timing.calls), (16000, 16000, 16000))
+        self.assertEqual((timing.sql_duration, timing.duration), (8000, 4000))
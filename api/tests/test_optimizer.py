@@ -0,0 +1,47 @@
+from .utils import LibraryTestCase, create_library
+
+
+class OptimizerTests(LibraryTestCase):
+    def setUp(self):
+        super().setUp()
+        create_library(authors=3, books_per_author=3, genres=2)
+
+    def test_forward_relations_are_joined(self):
+        with self.assertNumQueries(1) as queries:
+            data = self.query_data('{ books(first: 5) { edges { node { title author { firstName } } } } }')
+        self.assertEqual(len(data['books']['edges']), 5)
+        sql = queries.captured_queries[0]['sql']
+        self.assertIn('JOIN "api_author"', sql)
+        # only() leaves out the columns nobody asked for.
+        self.assertNotIn('"api_book"."summary"', sql)
+        self.assertNotIn('"api_author"."last_name"', sql)
+
+    def test_many_valued_relations_are_prefetched(self):
+        with self.assertNumQueries(3):
+            data = self.query_data(
+                '{ books(first: 9) { edges { node { title genre { name bookSet { title } } } } } }'
+            )
+        self.assertEqual(len(data['books']['edges'][0]['node']['genre']), 2)
+
+    def test_fragments_are_followed(self):
+        query = '''
+            query { books(first: 9) { edges { node { ...BookFields ... on BookType { genre { name } } } } } }
+            fragment BookFields on BookType { title author { ...AuthorFields } }
+            fragment AuthorFields on AuthorType { lastName }
+        '''
+        with self.assertNumQueries(2) as queries:
+            data = self.query_data(query)
+        self.assertIn('JOIN "api_author"', queries.captured_queries[0]['sql'])
+        node = data['books']['edges'][0]['node']
+        self.assertEqual(set(node), {'title', 'author', 'genre'})
+        self.assertEqual(node['author']['lastName'], 'Last 0')
+
+    def test_aliases_share_the_plan(self):
+        query = '''{ books(first: 9) { edges { node {
+            heading: title writer: author { name: firstName } more: author { lastName } tags: genre { name }
+        } } } }'''
+        with self.assertNumQueries(2):
+            data = self.query_data(query)
+        node = data['books']['edges'][0]['node']
+        self.assertEqual(node['writer'], {'name': 'First 0'})
+        self.assertEqual(node['more'], {'lastName': 'Last 0'})
@@ -0,0 +1,61 @@
+import json
+
+from api.graphql_views import DocumentCache, document_cache, query_hash
+
+from .utils import LibraryTestCase, create_library
+
+
+QUERY = '{ genres(first: 5) { edges { node { name } } } }'
+
+
+class PersistedQueryTests(LibraryTestCase):
+    def setUp(self):
+        super().setUp()
+        create_library(authors=1, genres=2)
+
+    def post(self, body):
+        response = self.client.post(self.GRAPHQL_URL, json.dumps(body), content_type='application/json')
+        return json.loads(response.content)
+
+    def extensions(self, sha256):
+        return {'persistedQuery': {'version': 1, 'sha256Hash': sha256}}
+
+    def test_round_trip(self):
+        sha256 = query_hash(QUERY)
+        result = self.post({'extensions': self.extensions(sha256)})
+        self.assertEqual(result['errors'][0]['message'], 'PersistedQueryNotFound')
+        self.assertEqual(result['errors'][0]['extensions']['code'], 'PERSISTED_QUERY_NOT_FOUND')
+
+        result = self.post({'query': QUERY, 'extensions': self.extensions(sha256)})
+        self.assertNotIn('errors', result)
+        self.assertIsNotNone(document_cache.get(sha256))
+
+        # Hash only, as a GET.
+        response = self.client.get(self.GRAPHQL_URL, {'extensions': json.dumps(self.extensions(sha256))})
+        self.assertEqual(json.loads(response.content)['data'], result['data'])
+
+    def test_hash_mismatch(self):
+        result = self.post({'query': QUERY, 'extensions': self.extensions(query_hash('{ __typename }'))})
+        self.assertEqual(result['errors'][0]['extensions']['code'], 'PERSISTED_QUERY_HASH_MISMATCH')
+        self.assertNotIn('data', result)
+
+    def test_unsupported_version(self):
+        result = self.post({'extensions': {'persistedQuery': {'version': 2, 'sha256Hash': query_hash(QUERY)}}})
+        self.assertEqual(result['errors'][0]['extensions']['code'], 'PERSISTED_QUERY_NOT_SUPPORTED')
+
+
+class DocumentCacheTests(LibraryTestCase):
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = DocumentCache(maxsize=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        cache.set('c', 3)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual((cache.get('a'), cache.get('c')), (1, 3))
+
+    def test_documents_are_parsed_once(self):
+        self.query_data(QUERY)
+        entry = document_cache.get(query_hash(QUERY))
+        self.query_data(QUERY)
+        self.assertIs(document_cache.get(query_hash(QUERY)), entry)
@@ -0,0 +1,62 @@
+import json
+from unittest import mock
+
+from django.conf import settings
+from django.test import override_settings
+
+from api.graphql_views import DocumentCache
+
+from .utils import LibraryTestCase, create_library
+
+
+QUERY = '{ books(first: 10) { edges { node { title author { firstName bookSet { title } } } } } }'
+
+
+def limits(**options):
+    return override_settings(GRAPHENE={**settings.GRAPHENE, **options})
+
+
+class QueryLimitTests(LibraryTestCase):
+    def setUp(self):
+        super().setUp()
+        create_library(authors=2)
+        # Validation results are cached with the parsed documents.
+        patcher = mock.patch('api.graphql_views.document_cache', DocumentCache(10))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def measure(self):
+        response = self.query(QUERY)
+        self.assertResponseNoErrors(response)
+        return json.loads(response.content)['extensions']['cost']
+
+    def test_cost_is_reported(self):
+        # The connection, the 10 books' authors and their bookSet lists.
+        self.assertEqual(self.measure(), {'depth': 6, 'estimated': 21})
+
+    def test_operation_at_the_limits_runs(self):
+        cost = self.measure()
+        with limits(MAX_QUERY_DEPTH=cost['depth'], MAX_QUERY_COST=cost['estimated']):
+            self.setUp()
+            self.assertEqual(self.measure(), cost)
+
+    def test_too_deep_operation_is_rejected_before_execution(self):
+        with limits(MAX_QUERY_DEPTH=5), self.assertNumQueries(0):
+            response = self.query(QUERY)
+        self.assertEqual(response.status_code, 400)
+        error = json.loads(response.content)['errors'][0]
+        self.assertEqual(error['extensions'], {'code': 'QUERY_TOO_DEEP', 'depth': 6, 'maxDepth': 5})
+        self.assertNotIn('data', json.loads(response.content))
+
+    def test_too_expensive_operation_is_rejected_before_execution(self):
+        with limits(MAX_QUERY_COST=20), self.assertNumQueries(0):
+            response = self.query(QUERY)
+        self.assertEqual(response.status_code, 400)
+        error = json.loads(response.content)['errors'][0]
+        self.assertEqual(error['extensions'], {'code': 'QUERY_TOO_COMPLEX', 'cost': 21, 'maxCost': 20})
+
+    def test_variables_count_as_the_connection_limit(self):
+        query = 'query ($n: Int) { books(first: $n) { edges { node { title author { firstName } } } } }'
+        with limits(MAX_QUERY_COST=100):
+            response = self.query(query, variables={'n': 1})
+        self.assertEqual(json.loads(response.content)['errors'][0]['extensions']['cost'], 101)
@@ -0,0 +1,53 @@
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.db.models import Prefetch
+from django.test import TestCase
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from api.models import Author, Book, Genre
+from api.records import BOOK_FIELDS, book_records, iter_book_chunks
+from api.serializers import BookSerializer
+
+
+class BookRecordTests(TestCase):
+    def setUp(self):
+        author = Author.objects.create(first_name='First', last_name='Last', date_of_birth=date(1950, 1, 1))
+        genres = [Genre.objects.create(name=name) for name in ('C', 'A', 'B')]
+        self.book = Book.objects.create(
+            title='Linked', summary='-', author=author, published_date=date(2000, 1, 2), page_count=10,
+        )
+        # Added out of id order.
+        self.book.genre.add(genres[2])
+        self.book.genre.add(genres[0], genres[1])
+        Book.objects.create(title='Bare', summary='-')
+
+    def test_records_render_like_the_serializer(self):
+        books = Book.objects.order_by('id')
+        serialized = JSONRenderer().render(BookSerializer(books, many=True).data)
+        records = JSONRenderer().render(book_records(list(books.values(*BOOK_FIELDS))))
+        self.assertEqual(records, serialized)
+
+        chunks = [record for chunk in iter_book_chunks(books, 1) for record in chunk]
+        self.assertEqual(JSONRenderer().render(chunks), serialized)
+
+    def test_genres_in_id_order(self):
+        # Whatever order the genres were fetched in.
+        book = Book.objects.prefetch_related(Prefetch('genre', Genre.objects.order_by('-id'))).get(pk=self.book.pk)
+        genre_ids = [genre['id'] for genre in BookSerializer(book).data['genre']]
+        self.assertEqual(genre_ids, sorted(genre_ids))
+        record, = book_records(list(Book.objects.filter(pk=book.pk).values(*BOOK_FIELDS)))
+        self.assertEqual([genre['id'] for genre in record['genre']], genre_ids)
+
+    def test_write_response_matches_read(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create(username='admin', is_staff=True))
+        payload = {
+            'title': 'New', 'summary': '-', 'author': {'first_name': 'First', 'last_name': 'Last'},
+            'genre': [{'name': 'C'}, {'name': 'A'}],
+        }
+        created = client.post('/api/books/', payload, format='json')
+        self.assertEqual(created.status_code, 201)
+        read = client.get(f"/api/books/{created.json()['id']}/")
+        self.assertEqual(read.content, created.content)
@@ -0,0 +1,56 @@
+import time
+
+from api.cache import get_cached_response, invalidate, pk_tag, set_cached_response, tag_versions
+from api.models import Author
+
+from .utils import LibraryTestCase, create_library
+
+
+QUERY = '{ authors(first: 10) { edges { node { firstName } } } }'
+
+
+class ResponseCacheTests(LibraryTestCase):
+    def setUp(self):
+        super().setUp()
+        create_library(authors=2)
+
+    def names(self):
+        return [edge['node']['firstName'] for edge in self.query_data(QUERY)['authors']['edges']]
+
+    def test_first_result_is_stored_and_hit(self):
+        # The tags get their first versions while this request runs.
+        with self.assertNumQueries(1):
+            names = self.names()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.names(), names)
+
+    def test_write_invalidates_and_next_result_is_stored(self):
+        self.names()
+        author = Author.objects.get(first_name='First 0')
+        author.first_name = 'Renamed'
+        # Tags are invalidated once the write commits.
+        with self.captureOnCommitCallbacks(execute=True):
+            author.save()
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.names(), ['Renamed', 'First 1'])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.names(), ['Renamed', 'First 1'])
+
+    def test_unrelated_write_keeps_entry(self):
+        self.names()
+        with self.captureOnCommitCallbacks(execute=True):
+            create_library(authors=0, genres=1)
+        with self.assertNumQueries(0):
+            self.names()
+
+    def test_result_read_before_a_write_is_not_stored(self):
+        tag = pk_tag(Author, 1)
+        started_at = time.time()
+        tag_versions([tag])
+        invalidate(tag)
+        set_cached_response('key', {'stale': True}, {tag}, started_at)
+        self.assertIsNone(get_cached_response('key'))
+
+        set_cached_response('key', {'fresh': True}, {tag}, time.time())
+        self.assertEqual(get_cached_response('key'), {'fresh': True})
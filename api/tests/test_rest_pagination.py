@@ -0,0 +1,68 @@
+from datetime import date
+
+from django.test import TestCase
+from django.core.cache import cache
+
+from api.models import Book
+from api.pagination import KeysetPagination, keyset_page
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        for index in range(7):
+            Book.objects.create(
+                title=f'Book {index}', summary='-', published_date=date(2000 + index % 3, 1, 1), page_count=index,
+            )
+
+    def test_next_and_previous_links(self):
+        expected = list(Book.objects.order_by('published_date', 'id').values_list('id', flat=True))
+        ids, url, pages = [], '/api/books/?page_size=3', []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            page = response.json()
+            pages.append(page)
+            ids += [book['id'] for book in page['results']]
+            url = page['next']
+        self.assertEqual(ids, expected)
+        self.assertEqual([len(page['results']) for page in pages], [3, 3, 1])
+        self.assertIsNone(pages[0]['previous'])
+
+        # Back from the last page.
+        previous = self.client.get(pages[-1]['previous']).json()
+        self.assertEqual(previous['results'], pages[1]['results'])
+        self.assertEqual(self.client.get(previous['previous']).json()['results'], pages[0]['results'])
+
+    def test_order_is_stable_across_pages_after_inserts(self):
+        first = self.client.get('/api/books/?page_size=3&ordering=-published_date').json()
+        # Sorts before the cursor, so the next page isn't shifted by it.
+        Book.objects.create(title='New', summary='-', published_date=date(2010, 1, 1))
+        second = self.client.get(first['next']).json()
+        ids = [book['id'] for book in first['results'] + second['results']]
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertNotIn('New', [book['title'] for book in second['results']])
+
+    def test_invalid_cursor(self):
+        for param in ('after', 'before'):
+            response = self.client.get(f'/api/books/?{param}=garbage')
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json(), {param: 'Invalid cursor.'})
+
+    def test_first_and_last(self):
+        # The keyset_page() calls KeysetPagination pages with, combining
+        # first and last like the connections.
+        keys = KeysetPagination().get_keys(Book.objects.order_by('published_date'))
+        expected = list(Book.objects.order_by('published_date', 'id'))
+
+        rows, has_previous, has_next = keyset_page(Book.objects.all(), keys, first=3, last=5)
+        self.assertEqual(rows, expected[:3])
+        self.assertEqual((has_previous, has_next), (False, True))
+
+        rows, has_previous, has_next = keyset_page(Book.objects.all(), keys, first=3, last=2)
+        self.assertEqual(rows, expected[1:3])
+        self.assertEqual((has_previous, has_next), (True, True))
+
+        rows, _, has_next = keyset_page(Book.objects.all(), keys, first=10, last=10)
+        self.assertEqual(rows, expected)
+        self.assertFalse(has_next)
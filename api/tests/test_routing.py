@@ -0,0 +1,103 @@
+from asgiref.sync import sync_to_async
+from django.db import router
+from django.http import JsonResponse
+from django.test import AsyncClient, TestCase, override_settings
+from django.urls import path
+
+from api.models import Author, Book
+from api.routing import PRIMARY, STICKY_COOKIE, _state, allow_replica_reads
+
+
+def probe(request):
+    # Where reads go before and after the request's write, if any.
+    reads = [router.db_for_read(Book)]
+    if request.GET.get('write'):
+        Author.objects.create(first_name='First', last_name='Last')
+    elif request.GET.get('allow'):
+        allow_replica_reads()
+    reads.append(router.db_for_read(Book))
+    return JsonResponse({'reads': reads})
+
+
+async def async_probe(request):
+    reads = [router.db_for_read(Book)]
+    if request.GET.get('write'):
+        await sync_to_async(Author.objects.create)(first_name='First', last_name='Last')
+    reads.append(router.db_for_read(Book))
+    return JsonResponse({'reads': reads})
+
+
+urlpatterns = [
+    path('probe', probe),
+    path('async-probe', async_probe),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__, REPLICA_DATABASES=['replica1'], REPLICA_LAG=7)
+class ReplicaRouterTests(TestCase):
+    def reads(self, method='get', query='', **kwargs):
+        response = getattr(self.client, method)(f'/probe?{query}', **kwargs)
+        return response.json()['reads'], response
+
+    def test_reads_go_to_the_replica(self):
+        reads, response = self.reads()
+        self.assertEqual(reads, ['replica1', 'replica1'])
+        self.assertNotIn(STICKY_COOKIE, response.cookies)
+
+    def test_writes_go_to_the_primary(self):
+        self.assertEqual(router.db_for_write(Book), PRIMARY)
+        reads, _ = self.reads(method='post')
+        self.assertEqual(reads, [PRIMARY, PRIMARY])
+
+    def test_reads_after_a_write_stay_on_the_primary(self):
+        reads, response = self.reads(query='write=1')
+        self.assertEqual(reads, ['replica1', PRIMARY])
+        self.assertEqual(response.cookies[STICKY_COOKIE]['max-age'], 7)
+
+        # The cookie keeps the client on the primary.
+        reads, _ = self.reads()
+        self.assertEqual(reads, [PRIMARY, PRIMARY])
+        self.client.cookies.pop(STICKY_COOKIE)
+        self.assertEqual(self.reads()[0], ['replica1', 'replica1'])
+
+    def test_read_only_posts(self):
+        reads, _ = self.reads(method='post', query='allow=1')
+        self.assertEqual(reads, [PRIMARY, 'replica1'])
+
+        self.client.cookies[STICKY_COOKIE] = '1'
+        reads, _ = self.reads(method='post', query='allow=1')
+        self.assertEqual(reads, [PRIMARY, PRIMARY])
+
+    def test_state_ends_with_the_request(self):
+        self.reads(query='write=1')
+        self.assertIsNone(_state.get())
+        # Outside of requests everything uses the primary.
+        self.assertEqual(router.db_for_read(Book), PRIMARY)
+
+    async def test_async_requests(self):
+        client = AsyncClient()
+        response = await client.get('/async-probe')
+        self.assertEqual(response.json()['reads'], ['replica1', 'replica1'])
+
+        # The write in a worker thread changes the request's state as well.
+        response = await client.get('/async-probe?write=1')
+        self.assertEqual(response.json()['reads'], ['replica1', PRIMARY])
+        self.assertIn(STICKY_COOKIE, response.cookies)
+        self.assertIsNone(_state.get())
+
+    def test_instances_are_read_where_they_were_loaded(self):
+        book = Book(title='-', summary='-')
+        book._state.db = 'replica1'
+        self.assertEqual(router.db_for_read(Author, instance=book), 'replica1')
+
+    def test_migrations_skip_replicas(self):
+        self.assertTrue(router.allow_migrate(PRIMARY, 'api'))
+        self.assertFalse(router.allow_migrate('replica1', 'api'))
+
+
+class NoReplicaTests(TestCase):
+    def test_everything_uses_the_primary(self):
+        response = self.client.get('/api/books/')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(STICKY_COOKIE, response.cookies)
+        self.assertEqual(router.db_for_read(Book), PRIMARY)
@@ -0,0 +1,124 @@
+from datetime import date
+
+from django.db import connection
+from django.test import TestCase
+
+from api.bulk import create_books, update_books
+from api.models import Book
+from api.search import (
+    SEARCH_TABLE, decode_search_cursor, encode_search_cursor, matching_books, rebuild_index, search_page,
+)
+from api.tests.utils import LibraryTestCase
+
+
+def matching_titles(query):
+    return set(matching_books(query).values_list('title', flat=True))
+
+
+class SearchIndexTests(TestCase):
+    def assertIndexInSync(self):
+        # Compares the index with its content table, api_book.
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}, rank) VALUES ('integrity-check', 1)")
+
+    def test_index_has_no_copy_of_the_text(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name FROM sqlite_master WHERE name LIKE %s", [f'{SEARCH_TABLE}%'])
+            tables = {row[0] for row in cursor.fetchall()}
+        self.assertNotIn(f'{SEARCH_TABLE}_content', tables)
+
+    def test_save_and_delete(self):
+        book = Book.objects.create(title='Dragon Rider', summary='A knight and his dragon.')
+        self.assertEqual(matching_titles('dragons'), {'Dragon Rider'})
+
+        book.title = 'Sea Wolf'
+        book.summary = 'Sailors.'
+        book.save()
+        self.assertEqual(matching_titles('dragon'), set())
+        self.assertEqual(matching_titles('wolf'), {'Sea Wolf'})
+        self.assertIndexInSync()
+
+        book.delete()
+        self.assertEqual(matching_titles('wolf'), set())
+        self.assertIndexInSync()
+
+    def test_bulk_writes(self):
+        books = create_books([
+            {'title': f'Castle {index}', 'summary': 'Stone walls.', 'genre_ids': []} for index in range(3)
+        ])
+        self.assertEqual(matching_titles('castle'), {'Castle 0', 'Castle 1', 'Castle 2'})
+
+        update_books(books[:2], [{'title': 'Tower'}, {'summary': 'Wooden walls.'}])
+        self.assertEqual(matching_titles('castle'), {'Castle 1', 'Castle 2'})
+        self.assertEqual(matching_titles('wooden'), {'Castle 1'})
+
+        Book.objects.filter(title='Castle 2').update(summary='Moat.')
+        self.assertEqual(matching_titles('moat'), {'Castle 2'})
+
+        Book.objects.filter(title__startswith='Castle').delete()
+        self.assertEqual(matching_titles('walls'), {'Tower'})
+        self.assertIndexInSync()
+
+    def test_rebuild(self):
+        Book.objects.create(title='Dragon Rider', summary='-')
+        Book.objects.create(title='Sea Wolf', summary='-')
+        self.assertEqual(rebuild_index(), 2)
+        self.assertEqual(matching_titles('dragon'), {'Dragon Rider'})
+        self.assertIndexInSync()
+
+
+class SearchPagingTests(LibraryTestCase):
+    def setUp(self):
+        super().setUp()
+        # Identical books tie on their rank, the others differ by a little.
+        for index in range(5):
+            Book.objects.create(title='Dragon', summary='Dragon.', published_date=date(2000, 1, 1))
+        for index in range(5):
+            Book.objects.create(title='Dragon', summary='Dragon' + ' tale' * index, published_date=date(2000, 1, 1))
+        self.expected = [pk for _, pk in search_page('dragon', 100)[0]]
+
+    def test_cursor_keeps_the_exact_rank(self):
+        hit = (0.1 + 0.2, 7)
+        self.assertEqual(decode_search_cursor(encode_search_cursor(hit)), hit)
+        self.assertEqual(decode_search_cursor(encode_search_cursor((1, 7))), (1, 7))
+
+    def test_pages_visit_every_hit_once(self):
+        ids, after = [], None
+        while True:
+            hits, has_next = search_page('dragon', 3, after)
+            ids += [pk for _, pk in hits]
+            if not has_next:
+                break
+            after = hits[-1]
+        self.assertEqual(len(self.expected), 10)
+        self.assertEqual(ids, self.expected)
+
+    def test_rest_pages(self):
+        ids, url = [], '/api/books/?q=dragon&page_size=3'
+        while url:
+            page = self.client.get(url).json()
+            ids += [book['id'] for book in page['results']]
+            url = page['next']
+        self.assertEqual(ids, self.expected)
+
+    def test_graphql_pages(self):
+        ids, after = [], None
+        while True:
+            data = self.query_data(
+                'query ($after: String) { searchBooks(query: "dragon", first: 4, after: $after) {'
+                ' edges { node { id } } pageInfo { hasNextPage endCursor } } }',
+                variables={'after': after},
+            )['searchBooks']
+            ids += [int(edge['node']['id']) for edge in data['edges']]
+            if not data['pageInfo']['hasNextPage']:
+                break
+            after = data['pageInfo']['endCursor']
+        self.assertEqual(ids, self.expected)
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/books/?q=dragon&after=garbage')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'after': 'Invalid cursor.'})
+
+        response = self.query('{ searchBooks(query: "dragon", after: "garbage") { totalCount } }')
+        self.assertResponseHasErrors(response)
@@ -0,0 +1,80 @@
+import random
+from datetime import date
+
+from django.test import TestCase
+
+from api.bulk import create_books, update_books
+from api.models import Author, AuthorStats, Book, Genre, GenreStats, YearStats
+from api.stats import rebuild_stats
+
+
+def stats_rows():
+    # Rows counting no book are left out: rebuild_stats() doesn't create
+    # them, while incremental updates leave them at zero.
+    return (
+        set(AuthorStats.objects.exclude(book_count=0).values_list(
+            'author_id', 'book_count', 'page_count_total', 'paged_book_count',
+        )),
+        set(GenreStats.objects.exclude(book_count=0).values_list('genre_id', 'book_count')),
+        set(YearStats.objects.exclude(book_count=0).values_list('year', 'book_count')),
+    )
+
+
+class IncrementalStatsTests(TestCase):
+    def setUp(self):
+        self.random = random.Random(0)
+        self.authors = [Author.objects.create(first_name='First', last_name=str(i)) for i in range(4)]
+        self.genres = [Genre.objects.create(name=str(i)) for i in range(4)]
+
+    def book_values(self):
+        return {
+            'author_id': self.random.choice([None] + [author.pk for author in self.authors]),
+            'published_date': self.random.choice([None, date(2000, 1, 1), date(2001, 5, 1), date(2002, 9, 1)]),
+            'page_count': self.random.choice([None, 100, 250]),
+        }
+
+    def genre_sample(self):
+        return [genre.pk for genre in self.random.sample(self.genres, self.random.randint(0, 3))]
+
+    def random_edit(self, index):
+        books = list(Book.objects.all())
+        action = self.random.choice(['create', 'bulk_create', 'update', 'bulk_update', 'genres', 'delete'])
+        if action == 'create' or not books:
+            book = Book.objects.create(title=f'Book {index}', summary='-', **self.book_values())
+            book.genre.set(self.genre_sample())
+        elif action == 'bulk_create':
+            create_books([
+                {'title': f'Book {index}', 'summary': '-', 'genre_ids': self.genre_sample(), **self.book_values()}
+                for _ in range(self.random.randint(1, 3))
+            ])
+        elif action == 'update':
+            book = self.random.choice(books)
+            for field, value in self.book_values().items():
+                if self.random.random() < 0.5:
+                    setattr(book, field, value)
+            book.save()
+        elif action == 'bulk_update':
+            chosen = self.random.sample(books, min(len(books), 3))
+            update_books(chosen, [{**self.book_values(), 'genre_ids': self.genre_sample()} for _ in chosen])
+        elif action == 'genres':
+            book = self.random.choice(books)
+            change = self.random.choice(['add', 'remove', 'clear', 'reverse'])
+            if change == 'add':
+                book.genre.add(*self.genre_sample())
+            elif change == 'remove':
+                book.genre.remove(*self.genre_sample())
+            elif change == 'clear':
+                book.genre.clear()
+            else:
+                self.random.choice(self.genres).book_set.add(book)
+        else:
+            self.random.choice(books).delete()
+
+    def test_random_edits_match_rebuild(self):
+        for index in range(150):
+            self.random_edit(index)
+        incremental = stats_rows()
+        self.assertTrue(incremental[0] and incremental[1] and incremental[2])
+
+        rebuild_stats()
+        self.assertEqual(incremental, stats_rows())
@@ -0,0 +1,90 @@
+import threading
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connections
+from django.test import TransactionTestCase, override_settings
+
+from api.models import Author
+from api.writer import WriteQueue, serialized_write
+
+
+@serialized_write
+def create_author(index, fail=False):
+    author = Author.objects.create(first_name='First', last_name=str(index))
+    if fail:
+        raise ValueError(index)
+    return author.pk, threading.current_thread().name
+
+
+# The writer thread has its own connection, so the writes have to be
+# committed for real.
+@override_settings(WRITE_QUEUE=True)
+class WriteQueueTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        # Waits a little so the concurrent callers share batches.
+        self.queue = WriteQueue(max_batch=4, delay=0.05)
+        patcher = mock.patch('api.writer.write_queue', self.queue)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.queue.shutdown)
+
+    def call_concurrently(self, count):
+        outcomes = {}
+
+        def call(index):
+            try:
+                outcomes[index] = create_author(index, fail=index % 3 == 0)
+            except ValueError as e:
+                outcomes[index] = e
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=call, args=(index,)) for index in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return outcomes
+
+    def test_concurrent_callers(self):
+        with mock.patch.object(self.queue, '_commit', wraps=self.queue._commit) as commit:
+            outcomes = self.call_concurrently(12)
+        # Batches of up to max_batch jobs.
+        self.assertLess(commit.call_count, 12)
+        self.assertTrue(all(len(call.args[0]) <= 4 for call in commit.call_args_list))
+
+        for index, outcome in outcomes.items():
+            if index % 3 == 0:
+                # Each caller gets its own error, and only its write is rolled back.
+                self.assertIsInstance(outcome, ValueError)
+                self.assertEqual(outcome.args, (index,))
+            else:
+                pk, thread_name = outcome
+                self.assertEqual(thread_name, 'write-queue')
+                self.assertEqual(Author.objects.get(pk=pk).last_name, str(index))
+        self.assertEqual(len(outcomes), 12)
+        self.assertEqual(
+            sorted(Author.objects.values_list('last_name', flat=True), key=int),
+            [str(index) for index in range(12) if index % 3],
+        )
+
+    def test_shutdown(self):
+        futures = [self.queue.submit(create_author.__wrapped__, index) for index in range(3)]
+        self.queue.shutdown()
+
+        # Submitted jobs still ran, and the thread stopped.
+        self.assertEqual([future.result(timeout=0)[1] for future in futures], ['write-queue'] * 3)
+        self.assertFalse(self.queue._thread.is_alive())
+        self.assertEqual(Author.objects.count(), 3)
+        with self.assertRaises(RuntimeError):
+            self.queue.submit(create_author.__wrapped__, 3)
+        with self.assertRaises(RuntimeError):
+            create_author(3)
+
+    def test_queue_off(self):
+        with override_settings(WRITE_QUEUE=False):
+            pk, thread_name = create_author(0)
+        self.assertEqual(thread_name, threading.current_thread().name)
+        self.assertIsNone(self.queue._thread)
@@ -0,0 +1,39 @@
+import json
+from datetime import date
+
+from django.core.cache import cache
+from graphene_django.utils.testing import GraphQLTestCase
+
+from api.models import Author, Book, Genre
+
+
+class LibraryTestCase(GraphQLTestCase):
+    GRAPHQL_URL = '/api/graphql'
+
+    def setUp(self):
+        # Cached responses and persisted queries outlive the test database.
+        cache.clear()
+
+    def query_data(self, query, **kwargs):
+        response = self.query(query, **kwargs)
+        self.assertResponseNoErrors(response)
+        return json.loads(response.content)['data']
+
+
+def create_library(authors=3, books_per_author=2, genres=2):
+    # Authors born a year apart, each with books published a month apart and
+    # linked to every genre.
+    genre_list = [Genre.objects.create(name=f'Genre {index}') for index in range(genres)]
+    books = []
+    for index in range(authors):
+        author = Author.objects.create(
+            first_name=f'First {index}', last_name=f'Last {index}', date_of_birth=date(1950 + index, 1, 1),
+        )
+        for number in range(books_per_author):
+            book = Book.objects.create(
+                title=f'Book {index}.{number}', summary=f'Summary of book {index}.{number}', author=author,
+                published_date=date(2000 + index, number % 12 + 1, 1), page_count=100 + number,
+            )
+            book.genre.set(genre_list)
+            books.append(book)
+    return books
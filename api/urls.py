@@ -1,13 +1,17 @@
 from django.urls import path 
-from graphene_django.views import GraphQLView
+from .conf import graphene_setting
+from .graphql_views import AsyncLibraryGraphQLView, LibraryGraphQLView
+from .changes import change_stream
 from .schema import schema
 from . import views
 
 app_name = 'api'
 
+GraphQLView = AsyncLibraryGraphQLView if graphene_setting('ASYNC_EXECUTION', False) else LibraryGraphQLView
+
 urlpatterns = [
     # GRAPHQL API
-    path("graphql", GraphQLView.as_view(graphiql=True, schema=schema)),
+    path("graphql", GraphQLView.as_view(graphiql=True, schema=schema), name="graphql"),
     
     
     
@@ -22,7 +26,16 @@ urlpatterns = [
     path('genres/<int:id>/', views.GenreAPIView.as_view(), name='genre-detail'),
 
     path('books/', views.BookAPIView.as_view(), name='books'),
+    path('books/import/', views.BookImportAPIView.as_view(), name='book-import'),
+    path('books/export.<str:export_format>', views.BookExportAPIView.as_view(), name='book-export'),
     path('books/<int:id>/', views.BookAPIView.as_view(), name='book-detail'),
 
+    path('stats/authors/', views.AuthorStatsAPIView.as_view(), name='author-stats'),
+    path('stats/genres/', views.GenreStatsAPIView.as_view(), name='genre-stats'),
+    path('stats/years/', views.YearStatsAPIView.as_view(), name='year-stats'),
+
+    path('changes/', views.ChangesAPIView.as_view(), name='changes'),
+    path('changes/stream/', change_stream, name='change-stream'),
+
 ]
 
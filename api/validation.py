@@ -0,0 +1,150 @@
+from graphene_django.settings import graphene_settings
+from graphql import (
+    FieldNode,
+    FragmentSpreadNode,
+    GraphQLError,
+    InlineFragmentNode,
+    IntValueNode,
+    get_named_type,
+    get_nullable_type,
+    is_list_type,
+)
+from graphql.validation import ValidationRule
+
+from .conf import graphene_setting
+
+
+# Cost model: every object or list field resolved costs its weight (1 by
+# default, 0 for scalars and for connection wrappers such as edges/node) once
+# per parent object, and lists multiply the cost of everything below them by
+# their expected size: for connection edges `first`/`last` when given as
+# literals or the connection limit when they are variables or missing, and
+# DEFAULT_LIST_SIZE for plain lists such as bookSet.
+
+
+def analyze_operation(schema, get_fragment, operation):
+    root_type = schema.get_root_type(operation.operation)
+    return _analyze(schema, get_fragment, root_type, operation.selection_set, 1, frozenset())
+
+
+def analyze_document(schema, document):
+    fragments = {
+        definition.name.value: definition
+        for definition in document.definitions
+        if definition.kind == 'fragment_definition'
+    }
+    costs = {}
+    for definition in document.definitions:
+        if definition.kind == 'operation_definition':
+            name = definition.name.value if definition.name else None
+            costs[name] = analyze_operation(schema, fragments.get, definition)
+    return costs
+
+
+def _analyze(schema, get_fragment, parent_type, selection_set, multiplier, visited, page_size=1):
+    depth, cost = 0, 0
+    for selection in selection_set.selections:
+        if isinstance(selection, FieldNode):
+            name = selection.name.value
+            field = parent_type.fields.get(name) if hasattr(parent_type, 'fields') else None
+            if name.startswith('__') or field is None:
+                continue
+
+            cost += multiplier * _weight(parent_type, name, field)
+            field_depth = 1
+            if selection.selection_set:
+                # A connection's page size only multiplies its edges, not
+                # totalCount or pageInfo.
+                if 'first' in field.args or 'last' in field.args:
+                    sub_multiplier, sub_page_size = multiplier, _page_size(selection)
+                else:
+                    sub_multiplier, sub_page_size = multiplier * _list_size(parent_type, field, page_size), 1
+                sub_depth, sub_cost = _analyze(
+                    schema, get_fragment, get_named_type(field.type), selection.selection_set,
+                    sub_multiplier, visited, sub_page_size,
+                )
+                field_depth += sub_depth
+                cost += sub_cost
+            depth = max(depth, field_depth)
+            continue
+
+        if isinstance(selection, FragmentSpreadNode):
+            name = selection.name.value
+            fragment = get_fragment(name)
+            if fragment is None or name in visited:
+                continue
+            fragment_visited = visited | {name}
+        elif isinstance(selection, InlineFragmentNode):
+            fragment = selection
+            fragment_visited = visited
+        else:
+            continue
+
+        fragment_type = parent_type
+        if fragment.type_condition:
+            fragment_type = schema.get_type(fragment.type_condition.name.value) or parent_type
+        sub_depth, sub_cost = _analyze(
+            schema, get_fragment, fragment_type, fragment.selection_set, multiplier,
+            fragment_visited, page_size,
+        )
+        depth = max(depth, sub_depth)
+        cost += sub_cost
+
+    return depth, cost
+
+
+def _weight(parent_type, name, field):
+    weights = graphene_setting('QUERY_COST_WEIGHTS', {})
+    key = f'{parent_type.name}.{name}'
+    if key in weights:
+        return weights[key]
+    if not hasattr(get_named_type(field.type), 'fields'):
+        return 0
+    if _is_connection_wrapper(parent_type):
+        return 0
+    return 1
+
+
+def _page_size(node):
+    max_limit = graphene_settings.RELAY_CONNECTION_MAX_LIMIT
+    sizes = [
+        int(argument.value.value) if isinstance(argument.value, IntValueNode) else max_limit
+        for argument in node.arguments
+        if argument.name.value in ('first', 'last')
+    ]
+    return min(sizes) if sizes else max_limit
+
+
+def _list_size(parent_type, field, page_size):
+    if not is_list_type(get_nullable_type(field.type)):
+        return 1
+    if _is_connection_wrapper(parent_type):
+        return page_size
+    return graphene_setting('DEFAULT_LIST_SIZE', 10)
+
+
+def _is_connection_wrapper(graphql_type):
+    return graphql_type.name.endswith(('Connection', 'Edge'))
+
+
+class QueryCostRule(ValidationRule):
+    def enter_operation_definition(self, node, *args):
+        depth, cost = analyze_operation(self.context.schema, self.context.get_fragment, node)
+
+        max_depth = graphene_setting('MAX_QUERY_DEPTH')
+        if max_depth is not None and depth > max_depth:
+            self.report_error(GraphQLError(
+                f'Query depth {depth} exceeds the maximum allowed depth of {max_depth}.',
+                node,
+                extensions={'code': 'QUERY_TOO_DEEP', 'depth': depth, 'maxDepth': max_depth},
+            ))
+
+        max_cost = graphene_setting('MAX_QUERY_COST')
+        if max_cost is not None and cost > max_cost:
+            self.report_error(GraphQLError(
+                f'Query cost {cost} exceeds the maximum allowed cost of {max_cost}.',
+                node,
+                extensions={'code': 'QUERY_TOO_COMPLEX', 'cost': cost, 'maxCost': max_cost},
+            ))
+
+        return self.SKIP
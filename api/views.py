@@ -1,15 +1,72 @@
 from rest_framework.authentication import BasicAuthentication
 from rest_framework.permissions import AllowAny, IsAdminUser
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.response import Response
 from rest_framework import generics, status
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.settings import api_settings
 from rest_framework.views import APIView
 
+from django.conf import settings
 from django.contrib.auth import login
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 
+from itertools import islice
+import codecs
+import csv
+import io
+import json
+
 from .serializers import UserLoginSerializer  
 from .serializers import *
 from .permissions import IsAdminOrAllowAny
+from .bulk import import_books
+from .records import BOOK_FIELDS, book_records, iter_book_chunks
+from .renderers import FastJSONRenderer
+from .search import BookSearchPagination
+from .cache import pk_tag, table_tag
+from .changes import changes_page
+from .conditional import conditional
+from .routing import mark_written
+from .writer import serialized_write
+from .stats import STATS_TAG
+from .filters import (
+    AUTHOR_FILTERS, AUTHOR_ORDERINGS, BOOK_FILTERS, BOOK_ORDERINGS, GENRE_FILTERS, GENRE_ORDERINGS,
+    filter_queryset, ordering_keys,
+)
+
+
+def filter_list(request, queryset, filters, orderings):
+    # Applies the list filters and the `ordering` from the query string; the
+    # keyset pagination follows the resulting order_by().
+    try:
+        queryset = filter_queryset(queryset, filters, request.query_params)
+    except ValueError as e:
+        raise ValidationError({str(e): 'Invalid value.'})
+    try:
+        keys = ordering_keys(orderings, request.query_params.get('ordering') or None)
+    except KeyError:
+        raise ValidationError({'ordering': f"Must be one of: {', '.join(orderings)}."})
+    return queryset.order_by(*keys)
+
+
+# Tags of the data each GET serves, for the ETag / Last-Modified validators.
+
+def author_tags(request, id=None):
+    # book_count comes from the summary tables.
+    return [pk_tag(Author, id) if id else table_tag(Author), STATS_TAG]
+
+
+def genre_tags(request, id=None):
+    return [pk_tag(Genre, id) if id else table_tag(Genre)]
+
+
+def book_tags(request, id=None):
+    # Books embed their author and genres.
+    return [pk_tag(Book, id) if id else table_tag(Book), table_tag(Author), table_tag(Genre)]
 
 
 class SignupAPIView(generics.CreateAPIView):
@@ -39,22 +96,26 @@ class UserLoginAPIView(APIView):
 
 
 
-class AuthorAPIView(APIView):
+class AuthorAPIView(generics.GenericAPIView):
     authentication_classes = [BasicAuthentication]
     permission_classes = [IsAdminOrAllowAny]
 
 
+    @conditional(author_tags)
     def get(self, request, id=None, format=None):
         if id:
-            author = get_object_or_404(Author, id=id)
+            author = get_object_or_404(Author.objects.with_age().with_book_count(), id=id)
             serializer = AuthorSerializer(author)
             return Response(serializer.data)
         else:
-            authors = Author.objects.all()
+            authors = self.paginate_queryset(
+                filter_list(request, Author.objects.with_age().with_book_count(), AUTHOR_FILTERS, AUTHOR_ORDERINGS)
+            )
             serializer = AuthorSerializer(authors, many=True)
-            return Response(serializer.data)
+            return self.get_paginated_response(serializer.data)
 
 
+    @serialized_write
     def post(self, request, format=None):
         serializer = AuthorSerializer(data=request.data)
         if serializer.is_valid():
@@ -62,6 +123,7 @@ class AuthorAPIView(APIView):
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @serialized_write
     def put(self, request, id, format=None):
         author = get_object_or_404(Author, id=id)
         serializer = AuthorSerializer(author, data=request.data)
@@ -70,26 +132,31 @@ class AuthorAPIView(APIView):
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @serialized_write
     def delete(self, request, id, format=None):
         author = get_object_or_404(Author, id=id)
         author.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     
-class GenreAPIView(APIView):
+class GenreAPIView(generics.GenericAPIView):
     authentication_classes = [BasicAuthentication]
     permission_classes = [IsAdminOrAllowAny]
 
+    @conditional(genre_tags)
     def get(self, request, id=None, format=None):
         if id:
             genre = get_object_or_404(Genre, id=id)
             serializer = GenreSerializer(genre)
             return Response(serializer.data)
         else:
-            genres = Genre.objects.all()
+            genres = self.paginate_queryset(
+                filter_list(request, Genre.objects.all(), GENRE_FILTERS, GENRE_ORDERINGS)
+            )
             serializer = GenreSerializer(genres, many=True)
-            return Response(serializer.data)
+            return self.get_paginated_response(serializer.data)
 
+    @serialized_write
     def post(self, request, format=None):
         serializer = GenreSerializer(data=request.data)
         if serializer.is_valid():
@@ -97,6 +164,7 @@ class GenreAPIView(APIView):
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @serialized_write
     def put(self, request, id, format=None):
         genre = get_object_or_404(Genre, id=id)
         serializer = GenreSerializer(genre, data=request.data)
@@ -105,26 +173,46 @@ class GenreAPIView(APIView):
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @serialized_write
     def delete(self, request, id, format=None):
         genre = get_object_or_404(Genre, id=id)
         genre.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     
-class BookAPIView(APIView):
+class BookAPIView(generics.GenericAPIView):
     authentication_classes = [BasicAuthentication]
     permission_classes = [IsAdminOrAllowAny]
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
 
+    @property
+    def pagination_class(self):
+        # `?q=` turns the list into full-text search results.
+        if self.request.query_params.get('q'):
+            return BookSearchPagination
+        return api_settings.DEFAULT_PAGINATION_CLASS
+
+    @conditional(book_tags)
     def get(self, request, id=None, format=None):
+        # Reads skip BookSerializer: api/records.py builds the same payloads
+        # from values() rows, with one query each for authors and genres.
         if id:
-            book = get_object_or_404(Book, id=id)
-            serializer = BookSerializer(book)
-            return Response(serializer.data)
+            book = get_object_or_404(Book.objects.values(*BOOK_FIELDS), id=id)
+            return Response(book_records([book])[0])
         else:
-            books = Book.objects.all()
-            serializer = BookSerializer(books, many=True)
-            return Response(serializer.data)
+            books = Book.objects.values(*BOOK_FIELDS)
+            if request.query_params.get('q'):
+                # Search pages are cut by rank, so filters can't be applied
+                # to them afterwards without dropping hits.
+                combined = [name for name in (*BOOK_FILTERS, 'ordering') if request.query_params.get(name)]
+                if combined:
+                    raise ValidationError({name: "Can't be combined with q." for name in combined})
+            else:
+                books = filter_list(request, books, BOOK_FILTERS, BOOK_ORDERINGS)
+            books = self.paginate_queryset(books)
+            return self.get_paginated_response(book_records(books))
 
+    @serialized_write
     def post(self, request, format=None):
         serializer = BookSerializer(data=request.data)
         
@@ -134,6 +222,7 @@ class BookAPIView(APIView):
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @serialized_write
     def put(self, request, id, format=None):
         book = get_object_or_404(Book, id=id)
         serializer = BookSerializer(book, data=request.data)
@@ -142,8 +231,204 @@ class BookAPIView(APIView):
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @serialized_write
     def delete(self, request, id, format=None):
         book = get_object_or_404(Book, id=id)
         book.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
-        
\ No newline at end of file
+
+
+@serialized_write
+def import_chunk(records):
+    # One chunk of an import, through the write queue like other writes.
+    with transaction.atomic():
+        return import_books(records)
+
+
+class BookImportAPIView(APIView):
+    authentication_classes = [BasicAuthentication]
+    permission_classes = [IsAdminOrAllowAny]
+
+    chunk_size = 500
+    ndjson_content_types = ['application/x-ndjson', 'application/jsonl', 'application/json-seq']
+    csv_content_types = ['text/csv']
+
+    def post(self, request, format=None):
+        # The body is read line by line from the request stream and imported
+        # chunk by chunk, so memory use doesn't depend on the upload size.
+        # Progress is streamed back as one JSON line per chunk.
+        content_type = request.content_type.split(';')[0].strip().lower()
+        lines = codecs.iterdecode(request.stream or [], 'utf-8')
+
+        if content_type in self.ndjson_content_types:
+            records = self.read_ndjson(lines)
+        elif content_type in self.csv_content_types:
+            records = self.read_csv(lines)
+        else:
+            return Response(
+                {'detail': f'Unsupported content type "{content_type}".'},
+                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            )
+
+        # The chunks are written while the response streams, after the
+        # routing middleware has returned.
+        mark_written()
+        return StreamingHttpResponse(self.run_import(records), content_type='application/x-ndjson')
+
+    def read_ndjson(self, lines):
+        for number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield number, json.loads(line)
+            except ValueError:
+                yield number, None
+
+    def read_csv(self, lines):
+        # Columns: title, summary, published_date, page_count,
+        # author_first_name, author_last_name, author_date_of_birth,
+        # author_date_of_death and genres (names separated by "|").
+        reader = csv.DictReader(lines)
+        for row in reader:
+            row = {key: value or None for key, value in row.items()}
+            yield reader.line_num, {
+                'title': row.get('title'),
+                'summary': row.get('summary'),
+                'published_date': row.get('published_date'),
+                'page_count': row.get('page_count'),
+                'author': {
+                    'first_name': row.get('author_first_name'),
+                    'last_name': row.get('author_last_name'),
+                    'date_of_birth': row.get('author_date_of_birth'),
+                    'date_of_death': row.get('author_date_of_death'),
+                },
+                'genre': [{'name': name.strip()} for name in (row.get('genres') or '').split('|') if name.strip()],
+            }
+
+    def run_import(self, records):
+        totals = {'rows': 0, 'created': 0, 'failed': 0}
+        while chunk := list(islice(records, self.chunk_size)):
+            valid, errors = [], []
+            for line, data in chunk:
+                if not isinstance(data, dict):
+                    errors.append({'line': line, 'errors': {'non_field_errors': ['Invalid record.']}})
+                    continue
+                serializer = BookSerializer(data=data)
+                if serializer.is_valid():
+                    valid.append(serializer.validated_data)
+                else:
+                    errors.append({'line': line, 'errors': serializer.errors})
+
+            created = import_chunk(valid) if valid else []
+
+            totals['rows'] += len(chunk)
+            totals['created'] += len(created)
+            totals['failed'] += len(errors)
+            yield json.dumps({**totals, 'errors': errors}) + '\n'
+
+        yield json.dumps({**totals, 'done': True}) + '\n'
+
+
+class BookExportAPIView(APIView):
+    authentication_classes = [BasicAuthentication]
+    permission_classes = [IsAdminOrAllowAny]
+
+    chunk_size = 2000
+    csv_header = [
+        'id', 'title', 'summary', 'published_date', 'page_count',
+        'author_first_name', 'author_last_name', 'author_date_of_birth', 'author_date_of_death', 'genres',
+    ]
+
+    def get(self, request, export_format, format=None):
+        # Every book with its author and genres, written one chunk at a time
+        # as the queryset iterator produces them.
+        chunks = iter_book_chunks(Book.objects.order_by('pk'), self.chunk_size)
+
+        if export_format == 'ndjson':
+            content, content_type = self.render_ndjson(chunks), 'application/x-ndjson'
+        elif export_format == 'csv':
+            content, content_type = self.render_csv(chunks), 'text/csv'
+        else:
+            raise NotFound(f'Unsupported export format "{export_format}".')
+
+        response = StreamingHttpResponse(content, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="books.{export_format}"'
+        return response
+
+    def render_ndjson(self, chunks):
+        for records in chunks:
+            yield ''.join(json.dumps(record, cls=DjangoJSONEncoder) + '\n' for record in records)
+
+    def render_csv(self, chunks):
+        # Same columns as the CSV accepted by BookImportAPIView, plus id.
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(self.csv_header)
+        for records in chunks:
+            for record in records:
+                author = record['author'] or {}
+                writer.writerow([
+                    record['id'], record['title'], record['summary'], record['published_date'], record['page_count'],
+                    author.get('first_name'), author.get('last_name'),
+                    author.get('date_of_birth'), author.get('date_of_death'),
+                    '|'.join(genre['name'] for genre in record['genre']),
+                ])
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+
+class ChangesAPIView(APIView):
+    authentication_classes = [BasicAuthentication]
+    permission_classes = [IsAdminOrAllowAny]
+
+    def get(self, request, format=None):
+        # Changes after the `after` cursor, oldest first (see
+        # api/changes.py). Clients store `cursor` and come back with it, right
+        # away while `has_more` is set.
+        after = self.query_int(request, 'after', 0, minimum=0)
+        limit = min(
+            self.query_int(request, 'limit', getattr(settings, 'CHANGE_FEED_PAGE_SIZE', 100), minimum=1),
+            getattr(settings, 'CHANGE_FEED_MAX_PAGE_SIZE', 1000),
+        )
+        entries, has_more = changes_page(after, limit)
+        return Response({
+            'cursor': entries[-1]['cursor'] if entries else after,
+            'has_more': has_more,
+            'results': entries,
+        })
+
+    def query_int(self, request, name, default, minimum):
+        try:
+            value = int(request.query_params.get(name, default))
+        except ValueError:
+            value = None
+        if value is None or value < minimum:
+            raise ValidationError({name: f'Must be an integer of at least {minimum}.'})
+        return value
+
+
+# Library statistics, read from the summary tables (see api/stats.py).
+
+class AuthorStatsAPIView(generics.ListAPIView):
+    authentication_classes = [BasicAuthentication]
+    permission_classes = [IsAdminOrAllowAny]
+    pagination_class = None
+    serializer_class = AuthorStatsSerializer
+    queryset = AuthorStats.objects.filter(book_count__gt=0).select_related('author').order_by('-book_count', 'author_id')
+
+
+class GenreStatsAPIView(generics.ListAPIView):
+    authentication_classes = [BasicAuthentication]
+    permission_classes = [IsAdminOrAllowAny]
+    pagination_class = None
+    serializer_class = GenreStatsSerializer
+    queryset = GenreStats.objects.filter(book_count__gt=0).select_related('genre').order_by('-book_count', 'genre_id')
+
+
+class YearStatsAPIView(generics.ListAPIView):
+    authentication_classes = [BasicAuthentication]
+    permission_classes = [IsAdminOrAllowAny]
+    pagination_class = None
+    serializer_class = YearStatsSerializer
+    queryset = YearStats.objects.filter(book_count__gt=0).order_by('year')
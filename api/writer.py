@@ -0,0 +1,133 @@
+import asyncio
+import contextvars
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from functools import wraps
+
+from django.conf import settings
+from django.db import connections, transaction
+
+from .aio import in_async_context
+from .routing import PRIMARY
+
+
+# Serialized writes for SQLite, which only allows one writer at a time.
+# Instead of racing for the database lock, write resolvers and views hand
+# their work to a single writer thread. It runs the jobs queued meanwhile one
+# after the other, each in its own savepoint, and commits them together, so
+# concurrent writers share one transaction (and one sync to disk) and a
+# failing job only rolls back its own changes. Callers get their result once
+# the transaction has committed.
+# Other processes serving the same file still compete for the lock; they
+# wait for it through busy_timeout.
+
+
+def write_queue_enabled():
+    return getattr(settings, 'WRITE_QUEUE', False)
+
+
+class WriteQueue:
+    def __init__(self, max_batch=64, delay=0):
+        self.max_batch = max_batch
+        # Seconds to wait for more jobs before committing a batch.
+        self.delay = delay
+        self._jobs = queue.SimpleQueue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._shut_down = False
+
+    def submit(self, fn, *args, **kwargs):
+        # Runs fn(*args, **kwargs) in the writer thread and returns a Future
+        # of its result. The job sees the caller's context variables, e.g.
+        # its request's routing state.
+        future = Future()
+        with self._lock:
+            if self._shut_down:
+                raise RuntimeError('The write queue has been shut down.')
+            self._jobs.put((contextvars.copy_context(), fn, args, kwargs, future))
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='write-queue', daemon=True)
+                self._thread.start()
+        return future
+
+    def shutdown(self, wait=True):
+        # The jobs submitted so far still run; later submits raise
+        # RuntimeError.
+        with self._lock:
+            self._shut_down = True
+            thread = self._thread
+            if thread is not None and thread.is_alive():
+                self._jobs.put(None)
+        if wait and thread is not None:
+            thread.join()
+
+    def _run(self):
+        try:
+            while True:
+                batch = self._next_batch()
+                jobs = [job for job in batch if job is not None]
+                if jobs:
+                    self._commit(jobs)
+                if len(jobs) < len(batch):
+                    # Shut down, nothing can have been queued after it.
+                    return
+        finally:
+            connections[PRIMARY].close()
+
+    def _next_batch(self):
+        batch = [self._jobs.get()]
+        deadline = time.monotonic() + self.delay
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._jobs.get(timeout=max(deadline - time.monotonic(), 0)))
+            except queue.Empty:
+                break
+        return batch
+
+    def _commit(self, batch):
+        batch = [job for job in batch if job[-1].set_running_or_notify_cancel()]
+        results = []
+        try:
+            with transaction.atomic(using=PRIMARY):
+                for context, fn, args, kwargs, future in batch:
+                    try:
+                        with transaction.atomic(using=PRIMARY):
+                            results.append((future, context.run(fn, *args, **kwargs), None))
+                    except Exception as e:
+                        results.append((future, None, e))
+        except Exception as e:
+            # The commit itself failed, so did every job. The connection is
+            # reopened for the next batch.
+            connections[PRIMARY].close()
+            for *_, future in batch:
+                future.set_exception(e)
+            return
+        for future, result, error in results:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+
+write_queue = WriteQueue(
+    max_batch=getattr(settings, 'WRITE_QUEUE_MAX_BATCH', 64),
+    delay=getattr(settings, 'WRITE_QUEUE_DELAY', 0),
+)
+
+
+def serialized_write(method):
+    # For mutation resolvers and view methods that write. With the queue
+    # enabled they run in the writer thread, as plain sync code (see
+    # api/aio.py); the async view awaits them. Writes already inside a
+    # transaction, e.g. ATOMIC_MUTATIONS, stay on their own connection.
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        if not write_queue_enabled() or connections[PRIMARY].in_atomic_block:
+            return method(*args, **kwargs)
+        future = write_queue.submit(method, *args, **kwargs)
+        if in_async_context():
+            return asyncio.wrap_future(future)
+        return future.result()
+    return wrapper
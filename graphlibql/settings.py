@@ -37,6 +37,7 @@ INSTALLED_APPS = [
 
 
 MIDDLEWARE = [
+    'api.metrics.metrics_middleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -44,6 +45,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.routing.replica_routing_middleware',
 ]
 
 ROOT_URLCONF = 'graphlibql.urls'
@@ -77,6 +79,82 @@ DATABASES = {
     }
 }
 
+# Read replicas, see api/routing.py. DATABASE_REPLICAS lists SQLite files
+# standing in for them locally, e.g. "replica1.sqlite3,replica2.sqlite3";
+# `python manage.py sync_replicas` copies the primary into them.
+REPLICA_DATABASES = []
+for number, name in enumerate(filter(None, os.environ.get('DATABASE_REPLICAS', '').split(',')), start=1):
+    DATABASES[f'replica{number}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / name.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+    REPLICA_DATABASES.append(f'replica{number}')
+
+DATABASE_ROUTERS = ['api.routing.ReplicaRouter']
+
+# SQLite tuned for serving concurrent requests, turned on by
+# SQLITE_PRODUCTION. WAL lets readers run while a write is in progress,
+# busy_timeout (ms) makes writers wait for the lock instead of failing with
+# "database is locked", and IMMEDIATE transactions take that lock up front.
+SQLITE_PRODUCTION = os.environ.get('SQLITE_PRODUCTION', 'False').lower() in ['true', 'yes', '1']
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000)),
+    # Safe with WAL: a power loss can only lose the last commits.
+    'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+    'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+    # Negative values are in KiB.
+    'cache_size': int(os.environ.get('SQLITE_CACHE_SIZE', -64000)),
+}
+if SQLITE_PRODUCTION:
+    for database in DATABASES.values():
+        database['OPTIONS'] = {
+            'init_command': ''.join(f'PRAGMA {name}={value};' for name, value in SQLITE_PRAGMAS.items()),
+            'transaction_mode': 'IMMEDIATE',
+        }
+
+# Run writes through a single writer thread that commits the writes queued
+# meanwhile in one transaction, see api/writer.py. Batches are capped at
+# WRITE_QUEUE_MAX_BATCH jobs; WRITE_QUEUE_DELAY (seconds) waits for more.
+WRITE_QUEUE = SQLITE_PRODUCTION
+WRITE_QUEUE_MAX_BATCH = 64
+WRITE_QUEUE_DELAY = 0
+
+# Seconds a replica may lag behind the primary. Clients read from the
+# primary for this long after writing, and data changed more recently isn't
+# cached from a replica read.
+REPLICA_LAG = int(os.environ.get('REPLICA_LAG', 5))
+
+# Request and GraphQL resolver metrics, served in the Prometheus format at
+# /metrics to the METRICS_ALLOWED_IPS; see api/metrics.py.
+METRICS = os.environ.get('METRICS', 'False').lower() in ['true', 'yes', '1']
+METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']
+
+# Change feed, see api/changes.py. /api/changes/ returns CHANGE_FEED_PAGE_SIZE
+# entries per page unless `limit` asks for more, up to the maximum. The
+# /api/changes/stream/ Server-Sent Events (ASGI only) check for new entries
+# every CHANGE_STREAM_POLL_INTERVAL seconds, send a keepalive comment after
+# CHANGE_STREAM_HEARTBEAT idle seconds and close after CHANGE_STREAM_TIMEOUT,
+# when the client reconnects.
+CHANGE_FEED_PAGE_SIZE = 100
+CHANGE_FEED_MAX_PAGE_SIZE = 1000
+CHANGE_STREAM_POLL_INTERVAL = 1
+CHANGE_STREAM_HEARTBEAT = 15
+CHANGE_STREAM_TIMEOUT = 300
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+# The GraphQL response cache is invalidated through this cache, so processes
+# serving the same database have to share it (e.g. Redis or Memcached).
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -132,12 +210,48 @@ REST_FRAMEWORK = {
         'rest_framework.authentication.BaseAuthentication'
     ],
 
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.KeysetPagination',
     'PAGE_SIZE': 100
 }
 
 graphiql = True
 
 GRAPHENE = {
-    "SCHEMA": "api.schema.schema"
+    "SCHEMA": "api.schema.schema",
+
+    # Parsed and validated documents kept in memory per process.
+    "DOCUMENT_CACHE_SIZE": 1000,
+    # Lifetime (seconds) of automatic persisted queries in the default cache; None keeps them forever.
+    "PERSISTED_QUERY_TIMEOUT": None,
+
+    # Operations deeper or more expensive than this are rejected before execution.
+    "MAX_QUERY_DEPTH": 10,
+    "MAX_QUERY_COST": 5000,
+    # Expected size of list fields without first/last arguments, e.g. bookSet.
+    "DEFAULT_LIST_SIZE": 10,
+    # Per-field weights ("Type.field"), overriding 1 for objects and 0 for scalars.
+    "QUERY_COST_WEIGHTS": {
+        "AuthorConnection.totalCount": 10,
+        "GenreConnection.totalCount": 10,
+        "BookConnection.totalCount": 10,
+    },
+
+    # Cache query results, invalidated when the objects they touched change.
+    "RESPONSE_CACHE": True,
+    "RESPONSE_CACHE_ALIAS": "default",
+    "RESPONSE_CACHE_TIMEOUT": 300,
+
+    # Largest list accepted by createBooks/updateBooks.
+    "BULK_MUTATION_MAX_SIZE": 1000,
+    # Most operations accepted in one batched (JSON array) request.
+    "BATCH_MAX_SIZE": 10,
+    # Items of a @stream list sent per part of a multipart response.
+    "STREAM_BATCH_SIZE": 20,
+
+    # With METRICS on, add the operation's timings (total, SQL and per
+    # resolver path) to the response `extensions`.
+    "METRICS_EXTENSIONS": False,
+
+    # Serve /graphql with the async view; graphlibql/asgi.py turns this on.
+    "ASYNC_EXECUTION": os.environ.get("GRAPHQL_ASYNC", 'False').lower() in ['true', 'yes', '1'],
 }
\ No newline at end of file